@@ -0,0 +1,75 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Time the Purchase Receipt -> Purchase Invoice mapping against line count.
+
+Runs the overridden make_purchase_invoice on existing submitted Purchase
+Receipts of different sizes and prints the mean time per receipt. Nothing is
+saved; the transaction is rolled back after each run.
+
+	bench --site <site> execute erpnext_utils.erpnext_utils.benchmarks.purchase_invoice_mapping.run
+	bench --site <site> execute erpnext_utils.erpnext_utils.benchmarks.purchase_invoice_mapping.run --kwargs "{'receipts': 20, 'repeat': 5}"
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint
+
+from erpnext_utils.erpnext_utils.overrides.purchase_receipt import make_purchase_invoice
+
+
+def get_sample_receipts(receipts=10):
+	"""Submitted Purchase Receipts spread evenly over the range of line counts"""
+	rows = frappe.db.sql(
+		"""
+		select pr.name, count(pr_item.name) as lines
+		from `tabPurchase Receipt` pr
+		inner join `tabPurchase Receipt Item` pr_item on pr_item.parent = pr.name
+		where pr.docstatus = 1 and pr.is_return = 0
+		group by pr.name
+		order by lines asc, pr.name asc
+		""",
+		as_dict=True,
+	)
+	if len(rows) <= receipts:
+		return rows
+
+	step = (len(rows) - 1) / (receipts - 1) if receipts > 1 else 0
+	return [rows[round(i * step)] for i in range(receipts)]
+
+
+def time_mapping(source_name, repeat=3):
+	"""Mean seconds per make_purchase_invoice call on one Purchase Receipt"""
+	elapsed = 0
+	for _i in range(repeat):
+		start = time.perf_counter()
+		try:
+			make_purchase_invoice(source_name)
+		except frappe.ValidationError:
+			# Fully invoiced receipts still exercise the item mapping before failing
+			frappe.clear_messages()
+		elapsed += time.perf_counter() - start
+		frappe.db.rollback()
+
+	return elapsed / repeat
+
+
+def run(receipts=10, repeat=3):
+	receipts = cint(receipts) or 10
+	repeat = cint(repeat) or 3
+
+	results = []
+	for row in get_sample_receipts(receipts):
+		seconds = time_mapping(row.name, repeat)
+		results.append({"purchase_receipt": row.name, "lines": row.lines, "ms": round(seconds * 1000, 1)})
+
+	print(f"{'Purchase Receipt':<24}{'Lines':>8}{'ms':>10}{'ms/line':>10}")
+	for result in results:
+		print(
+			f"{result['purchase_receipt']:<24}{result['lines']:>8}{result['ms']:>10}"
+			f"{result['ms'] / result['lines']:>10.2f}"
+		)
+
+	return results
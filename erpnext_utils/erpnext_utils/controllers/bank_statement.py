@@ -0,0 +1,408 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Matching of imported bank statements against Unpresented Cheques.
+
+Statements (CSV or OFX) are read line by line and never loaded whole. Before
+reading, the Unpresented Cheques of the bank account, issued from it or
+deposited into it, are fetched with one query on Cheque.bank_account. The
+cheques are then indexed two ways:
+
+- a hash index on the normalised cheque number, for lines that carry one;
+- an amount index with sorted cheque dates per amount, for lines without a
+  cheque number. These match within the amount and date tolerances.
+
+Withdrawals only match issued cheques and deposits only match received
+ones, and a cheque is matched at most once. Matched cheques are set to
+Cleared with one UPDATE per clearance date.
+"""
+
+import csv
+import io
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint, flt, getdate, now
+
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import update_summary_for_status_change
+
+# statement line field -> accepted CSV column names (lower case, spaces as underscores)
+STATEMENT_COLUMNS = {
+	"date": ("date", "posting_date", "transaction_date", "value_date"),
+	"amount": ("amount",),
+	"withdrawal": ("withdrawal", "debit"),
+	"deposit": ("deposit", "credit"),
+	"cheque_number": ("cheque_number", "cheque_no", "check_number", "cheque", "instrument_number"),
+	"description": ("description", "narration", "particulars", "memo"),
+}
+
+DEFAULT_DATE_TOLERANCE = 7
+
+# Matches / unmatched lines returned in the summary
+MAX_DETAIL_ROWS = 1000
+
+# Cheques set to Cleared per UPDATE
+CLEARANCE_CHUNK_SIZE = 1000
+
+
+@frappe.whitelist()
+def match_bank_statement(
+	bank_account,
+	data=None,
+	file_url=None,
+	file_format="csv",
+	amount_tolerance=0,
+	date_tolerance=DEFAULT_DATE_TOLERANCE,
+	apply=0,
+	enqueue=0,
+):
+	"""
+	Match a bank statement against the Unpresented Cheques of a Bank Account.
+
+	:param data: CSV or OFX text.
+	:param file_url: URL of an uploaded File, used when `data` is not given.
+	:param file_format: "csv" or "ofx".
+	:param amount_tolerance: Allowed absolute amount difference.
+	:param date_tolerance: Allowed days between cheque date and statement date
+		for lines without a cheque number.
+	:param apply: Set matched cheques to Cleared; otherwise only preview.
+	:param enqueue: Run as a background job; the summary is published on the
+		`bank_statement_matched` realtime event.
+	"""
+	if not data and not file_url:
+		frappe.throw("Please provide statement data or a file")
+
+	if not frappe.db.get_value("Bank Account", {"name": bank_account, "is_company_account": 1}):
+		frappe.throw(f"Bank Account '{bank_account}' not found or not a company account")
+
+	frappe.has_permission("Cheque", "write" if cint(apply) else "read", throw=True)
+
+	kwargs = dict(
+		bank_account=bank_account,
+		data=data,
+		file_url=file_url,
+		file_format=file_format,
+		amount_tolerance=amount_tolerance,
+		date_tolerance=date_tolerance,
+		apply=apply,
+	)
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.bank_statement.run_statement_matching",
+			queue="long",
+			timeout=6000,
+			user=frappe.session.user,
+			**kwargs,
+		)
+		return {"job_id": job.id if job else None}
+
+	return run_statement_matching(**kwargs)
+
+
+def run_statement_matching(
+	bank_account,
+	data=None,
+	file_url=None,
+	file_format="csv",
+	amount_tolerance=0,
+	date_tolerance=DEFAULT_DATE_TOLERANCE,
+	apply=0,
+	user=None,
+):
+	start = time.perf_counter()
+	matcher = ChequeMatcher(get_unpresented_cheques(bank_account), flt(amount_tolerance), cint(date_tolerance))
+
+	summary = frappe._dict(lines=0, matched=0, by_cheque_number=0, by_amount=0, unmatched=0, cleared=0, matches=[], unmatched_lines=[])
+	matched_cheques = []
+
+	with open_statement(data, file_url) as lines:
+		for line in iter_statement_lines(lines, file_format):
+			summary.lines += 1
+			cheque, method, reason = matcher.match(line)
+
+			if not cheque:
+				summary.unmatched += 1
+				if len(summary.unmatched_lines) < MAX_DETAIL_ROWS:
+					summary.unmatched_lines.append({"line": line.line_no, "amount": line.amount, "reason": reason})
+				continue
+
+			summary.matched += 1
+			summary[method] += 1
+			cheque.clearance_date = line.date
+			matched_cheques.append(cheque)
+			if len(summary.matches) < MAX_DETAIL_ROWS:
+				summary.matches.append(
+					{"line": line.line_no, "cheque": cheque.name, "cheque_number": cheque.cheque_number, "method": method}
+				)
+
+	if cint(apply):
+		summary.cleared = clear_cheques(matched_cheques)
+
+	summary.elapsed_seconds = round(time.perf_counter() - start, 3)
+	frappe.logger("erpnext_utils").info(
+		f"[Bank Statement] {bank_account}: {summary.matched}/{summary.lines} lines matched, "
+		f"{summary.cleared} cheques cleared in {summary.elapsed_seconds}s"
+	)
+
+	if user:
+		frappe.publish_realtime("bank_statement_matched", summary, user=user)
+
+	return summary
+
+
+def get_unpresented_cheques(bank_account):
+	"""Unpresented Cheques issued from or deposited into a Bank Account"""
+	cheque = frappe.qb.DocType("Cheque")
+	return (
+		frappe.qb.from_(cheque)
+		.select(
+			cheque.name,
+			cheque.cheque_number,
+			cheque.cheque_type,
+			cheque.cheque_date,
+			cheque.amount,
+			cheque.status,
+			cheque.bank_account,
+			cheque.cheque_book,
+		)
+		.where(
+			(cheque.bank_account == bank_account)
+			& (cheque.cheque_type.isin(["Issued", "Received"]))
+			& (cheque.status == "Unpresented")
+		)
+	).run(as_dict=True)
+
+
+def normalize_cheque_number(value):
+	"""Digits only, without leading zeros"""
+	digits = re.sub(r"\D", "", str(value or ""))
+	return digits.lstrip("0") or digits
+
+
+class ChequeMatcher:
+	def __init__(self, cheques, amount_tolerance=0, date_tolerance=DEFAULT_DATE_TOLERANCE):
+		self.amount_tolerance = abs(flt(amount_tolerance))
+		self.date_tolerance = abs(cint(date_tolerance))
+		self.matched = set()
+
+		# (cheque type, cheque number) -> cheques
+		self.by_number = defaultdict(list)
+		# (cheque type, amount in cents) -> sorted [(cheque date ordinal, cheque index)]
+		self.by_amount = defaultdict(list)
+		self.cheques = cheques
+
+		for idx, cheque in enumerate(cheques):
+			number = normalize_cheque_number(cheque.cheque_number)
+			if number:
+				self.by_number[(cheque.cheque_type, number)].append(cheque)
+			if cheque.cheque_date:
+				self.by_amount[(cheque.cheque_type, to_cents(cheque.amount))].append(
+					(getdate(cheque.cheque_date).toordinal(), idx)
+				)
+
+		for dates in self.by_amount.values():
+			dates.sort()
+
+		# cheque type -> sorted amounts in cents that have cheques
+		self.amounts = defaultdict(list)
+		for cheque_type, cents in sorted(self.by_amount):
+			self.amounts[cheque_type].append(cents)
+
+	def match(self, line):
+		"""Return (cheque, method, None) or (None, None, reason)"""
+		if not line.amount:
+			return None, None, "No amount"
+
+		cheque_type = "Issued" if line.amount < 0 else "Received"
+		amount = abs(line.amount)
+
+		number = normalize_cheque_number(line.cheque_number)
+		if number:
+			candidates = [c for c in self.by_number.get((cheque_type, number), ()) if c.name not in self.matched]
+			if not candidates:
+				return None, None, f"No unpresented {cheque_type.lower()} cheque {line.cheque_number}"
+
+			for cheque in candidates:
+				if abs(flt(cheque.amount) - amount) <= self.amount_tolerance:
+					self.matched.add(cheque.name)
+					return cheque, "by_cheque_number", None
+
+			return None, None, f"Amount differs from cheque {candidates[0].name} ({candidates[0].amount})"
+
+		if not line.date:
+			return None, None, "No date"
+
+		cheque = self.match_by_amount(cheque_type, amount, getdate(line.date).toordinal())
+		if not cheque:
+			return None, None, "No cheque within amount and date tolerance"
+
+		self.matched.add(cheque.name)
+		return cheque, "by_amount", None
+
+	def match_by_amount(self, cheque_type, amount, date_ordinal):
+		"""Closest unmatched cheque by amount, then by date, within the tolerances"""
+		cents = to_cents(amount)
+		tolerance_cents = to_cents(self.amount_tolerance)
+
+		# Only the amounts that exist within the tolerance band are visited
+		amounts = self.amounts.get(cheque_type, ())
+		start = bisect_left(amounts, cents - tolerance_cents)
+		end = bisect_right(amounts, cents + tolerance_cents)
+
+		best = None
+		for bucket in amounts[start:end]:
+			dates = self.by_amount[(cheque_type, bucket)]
+
+			idx = bisect_left(dates, (date_ordinal - self.date_tolerance, -1))
+			while idx < len(dates) and dates[idx][0] <= date_ordinal + self.date_tolerance:
+				cheque = self.cheques[dates[idx][1]]
+				if cheque.name not in self.matched:
+					rank = (abs(bucket - cents), abs(dates[idx][0] - date_ordinal))
+					if best is None or rank < best[0]:
+						best = (rank, cheque)
+				idx += 1
+
+		return best[1] if best else None
+
+
+def to_cents(amount):
+	return int(round(flt(amount) * 100))
+
+
+def clear_cheques(cheques):
+	"""
+	Set matched cheques to Cleared with one UPDATE per clearance date and chunk.
+
+	Each chunk is locked first and only cheques that are still Unpresented are
+	cleared, counted and moved in the Cheque Summary; cheques cleared or
+	cancelled meanwhile by another job are left alone.
+	"""
+	by_date = defaultdict(list)
+	for cheque in cheques:
+		by_date[cheque.clearance_date].append(cheque)
+
+	table = frappe.qb.DocType("Cheque")
+	timestamp = now()
+	cleared = []
+	for clearance_date, rows in by_date.items():
+		for start in range(0, len(rows), CLEARANCE_CHUNK_SIZE):
+			chunk = rows[start : start + CLEARANCE_CHUNK_SIZE]
+			unpresented = set(
+				(
+					frappe.qb.from_(table)
+					.select(table.name)
+					.where(table.name.isin([cheque.name for cheque in chunk]) & (table.status == "Unpresented"))
+					.for_update()
+				).run(pluck=True)
+			)
+			chunk = [cheque for cheque in chunk if cheque.name in unpresented]
+			if not chunk:
+				continue
+
+			(
+				frappe.qb.update(table)
+				.set(table.status, "Cleared")
+				.set(table.clearance_date, clearance_date)
+				.set(table.modified, timestamp)
+				.set(table.modified_by, frappe.session.user)
+				.where(table.name.isin([cheque.name for cheque in chunk]) & (table.status == "Unpresented"))
+			).run()
+			cleared.extend(chunk)
+
+	update_summary_for_status_change(cleared, "Cleared")
+	return len(cleared)
+
+
+@contextmanager
+def open_statement(data=None, file_url=None):
+	"""Yield an iterator over the statement's text lines; files are read lazily"""
+	if data:
+		yield io.StringIO(data.decode("utf-8-sig") if isinstance(data, bytes) else data)
+		return
+
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+	file_doc.check_permission("read")
+	with open(file_doc.get_full_path(), encoding="utf-8-sig", newline="") as handle:
+		yield handle
+
+
+def iter_statement_lines(lines, file_format="csv"):
+	if file_format == "ofx":
+		return iter_ofx_lines(lines)
+	return iter_csv_lines(lines)
+
+
+def iter_csv_lines(lines):
+	"""Yield statement lines from CSV, with columns resolved through STATEMENT_COLUMNS"""
+	reader = csv.reader(lines)
+	header = [column.strip().lower().replace(" ", "_") for column in next(reader, [])]
+
+	positions = {}
+	for field, aliases in STATEMENT_COLUMNS.items():
+		for alias in aliases:
+			if alias in header:
+				positions[field] = header.index(alias)
+				break
+
+	if "date" not in positions or not ({"amount", "withdrawal", "deposit"} & set(positions)):
+		frappe.throw("Statement must have a date column and an amount or withdrawal/deposit columns")
+
+	def value(row, field):
+		position = positions.get(field)
+		return row[position].strip() if position is not None and position < len(row) else ""
+
+	# line 1 is the header
+	for line_no, row in enumerate(reader, 2):
+		if not any(row):
+			continue
+
+		if "amount" in positions:
+			amount = flt(value(row, "amount").replace(",", ""))
+		else:
+			amount = flt(value(row, "deposit").replace(",", "")) - flt(value(row, "withdrawal").replace(",", ""))
+
+		yield frappe._dict(
+			line_no=line_no,
+			date=getdate(value(row, "date")) if value(row, "date") else None,
+			amount=amount,
+			cheque_number=value(row, "cheque_number"),
+			description=value(row, "description"),
+		)
+
+
+def iter_ofx_lines(lines):
+	"""Yield statement lines from the <STMTTRN> blocks of an OFX (SGML or XML) file"""
+	transaction = None
+	line_no = 0
+
+	for raw_line in lines:
+		# Several tags may share one line
+		for chunk in raw_line.split("<"):
+			chunk = chunk.strip()
+			if not chunk:
+				continue
+
+			tag, _sep, value = chunk.partition(">")
+			tag = tag.strip().upper()
+
+			if tag == "STMTTRN":
+				transaction = {}
+			elif tag == "/STMTTRN" and transaction is not None:
+				line_no += 1
+				posted = transaction.get("DTPOSTED", "")[:8]
+				yield frappe._dict(
+					line_no=line_no,
+					date=getdate(f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}") if len(posted) == 8 else None,
+					amount=flt(transaction.get("TRNAMT")),
+					cheque_number=transaction.get("CHECKNUM", ""),
+					description=transaction.get("NAME") or transaction.get("MEMO", ""),
+				)
+				transaction = None
+			elif transaction is not None and not tag.startswith("/"):
+				transaction[tag] = value.strip()
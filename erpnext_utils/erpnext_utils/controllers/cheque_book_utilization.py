@@ -0,0 +1,137 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Utilization and exhaustion forecast of active Cheque Books.
+
+Used, voided and remaining leaves come from the leaf sets stored on each
+Cheque Book (see controllers/cheque_books.py), so no Cheque rows are
+counted. The burn rate comes from one grouped query over recently issued
+Cheques. Thousands of books cost two queries in total.
+"""
+
+import frappe
+from frappe.desk.doctype.notification_log.notification_log import enqueue_create_notification
+from frappe.query_builder.functions import Count
+from frappe.utils import add_days, cint, flt, get_datetime, getdate, today
+from frappe.utils.user import get_users_with_role
+
+from erpnext_utils.erpnext_utils.controllers.cheque_books import LeafSet
+from erpnext_utils.erpnext_utils.controllers.settings_cache import get_voucher_settings
+
+DEFAULT_BURN_RATE_DAYS = 30
+DEFAULT_WARNING_DAYS = 15
+
+
+def get_cheque_book_utilization(bank_account=None, burn_rate_days=None, as_on_date=None):
+	"""
+	Utilization of active Cheque Books, ordered by bank account and series.
+
+	:param bank_account: Limit to one Bank Account.
+	:param burn_rate_days: Days of Cheque history for the burn rate.
+	:return: One dict per book with leaf counts, burn rate (leaves/day) and
+		the forecast exhaustion date (None when the book is not in use).
+	"""
+	burn_rate_days = cint(burn_rate_days) or cint(get_voucher_settings().cheque_book_burn_rate_days) or DEFAULT_BURN_RATE_DAYS
+	as_on_date = getdate(as_on_date or today())
+
+	filters = {"is_active": 1}
+	if bank_account:
+		filters["bank_account"] = bank_account
+
+	books = frappe.get_all(
+		"Cheque Book",
+		filters=filters,
+		fields=["name", "bank_account", "start_series", "end_series", "start_number", "end_number", "used_leaves", "voided_leaves"],
+		order_by="bank_account asc, start_number asc",
+	)
+	if not books:
+		return []
+
+	issued = get_issued_leaf_counts(add_days(as_on_date, -burn_rate_days), bank_account)
+
+	rows = []
+	for book in books:
+		used = LeafSet.parse(book.used_leaves)
+		voided = LeafSet.parse(book.voided_leaves)
+		total = cint(book.end_number) - cint(book.start_number) + 1
+		remaining = max(total - len(LeafSet(used.intervals + voided.intervals)), 0)
+
+		burn_rate = flt(issued.get(book.name, 0)) / burn_rate_days
+		days_to_exhaustion = int(remaining / burn_rate) if burn_rate else None
+
+		rows.append(
+			frappe._dict(
+				cheque_book=book.name,
+				bank_account=book.bank_account,
+				start_series=book.start_series,
+				end_series=book.end_series,
+				total_leaves=total,
+				used_count=len(used),
+				voided_count=len(voided),
+				remaining_leaves=remaining,
+				utilization=flt((total - remaining) * 100 / total, 2) if total else 0,
+				burn_rate=flt(burn_rate, 2),
+				days_to_exhaustion=days_to_exhaustion,
+				exhaustion_date=add_days(as_on_date, days_to_exhaustion) if days_to_exhaustion is not None else None,
+			)
+		)
+
+	return rows
+
+
+def get_issued_leaf_counts(since, bank_account=None):
+	"""{cheque book: cheques issued since the date}, from one grouped query"""
+	cheque = frappe.qb.DocType("Cheque")
+	query = (
+		frappe.qb.from_(cheque)
+		.select(cheque.cheque_book, Count("*").as_("issued"))
+		.where(
+			(cheque.cheque_type == "Issued")
+			& (cheque.creation >= get_datetime(since))
+			& cheque.cheque_book.isnotnull()
+		)
+		.groupby(cheque.cheque_book)
+	)
+	if bank_account:
+		query = query.where(cheque.bank_account == bank_account)
+
+	return {row.cheque_book: row.issued for row in query.run(as_dict=True)}
+
+
+def warn_cheque_book_exhaustion():
+	"""Scheduler (daily): notify Accounts Managers of cheque books about to run out"""
+	warning_days = cint(get_voucher_settings().cheque_book_warning_days) or DEFAULT_WARNING_DAYS
+
+	at_risk = {}
+	for row in get_cheque_book_utilization():
+		if row.remaining_leaves == 0 or (row.days_to_exhaustion is not None and row.days_to_exhaustion <= warning_days):
+			at_risk.setdefault(row.bank_account, []).append(row)
+
+	if not at_risk:
+		return
+
+	recipients = get_accounts_managers()
+	for bank_account, rows in at_risk.items():
+		books = ", ".join(
+			f"{row.cheque_book} ({row.remaining_leaves} leaves left"
+			+ (f", ~{row.days_to_exhaustion} days" if row.days_to_exhaustion is not None else "")
+			+ ")"
+			for row in rows
+		)
+		frappe.logger("erpnext_utils").warning(f"[Cheque Books] Running out for {bank_account}: {books}")
+
+		if recipients:
+			enqueue_create_notification(
+				recipients,
+				{
+					"type": "Alert",
+					"document_type": "Bank Account",
+					"document_name": bank_account,
+					"subject": f"Cheque books of {bank_account} are running out: {books}",
+				},
+			)
+
+
+def get_accounts_managers():
+	return [user for user in get_users_with_role("Accounts Manager") if user != "Administrator"]
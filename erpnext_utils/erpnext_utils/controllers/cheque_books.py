@@ -0,0 +1,300 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Cheque leaf allocation for Cheque Books.
+
+Used and voided leaves of a book are kept on the Cheque Book itself as
+compact interval sets ("100001-100250,100252"), so "is this leaf used" and
+"next free leaf" never scan Cheque rows. The text is parsed into a sorted
+interval list (linear in the number of intervals, not leaves), and lookups
+are a binary search over it. Every change goes through
+`SELECT ... FOR UPDATE` on the Cheque Book row, which serialises concurrent
+allocations across workers until the surrounding transaction commits, and
+re-parses the locked row. The advisory `is_leaf_used` check reuses the
+parsed sets per book and leaf text for the rest of the request.
+
+Resolving a cheque number to its book uses the integer bounds
+(start_number / end_number, Long Int) of the active books of a bank account,
+cached per account as a sorted interval list and cleared when a Cheque Book
+is saved or deleted.
+"""
+
+from bisect import bisect_right
+
+import frappe
+
+CHEQUE_BOOK_RANGES_KEY = "erpnext_utils:cheque_book_ranges"
+
+# Largest leaf number the Long Int (bigint) bounds can hold
+MAX_CHEQUE_NUMBER = 2**63 - 1
+
+LEAF_FIELDS = ["name", "bank_account", "start_series", "end_series", "current_series", "used_leaves", "voided_leaves"]
+
+
+class LeafSet:
+	"""Sorted, merged set of closed integer intervals"""
+
+	__slots__ = ("intervals",)
+
+	def __init__(self, intervals=None):
+		self.intervals = []
+		for start, end in sorted(intervals or []):
+			self._append(start, end)
+
+	@classmethod
+	def parse(cls, text):
+		intervals = []
+		for part in (text or "").split(","):
+			part = part.strip()
+			if not part:
+				continue
+			start, _sep, end = part.partition("-")
+			intervals.append((int(start), int(end or start)))
+		return cls(intervals)
+
+	def serialize(self):
+		return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in self.intervals)
+
+	def __contains__(self, number):
+		idx = bisect_right(self.intervals, (number, float("inf"))) - 1
+		return idx >= 0 and self.intervals[idx][0] <= number <= self.intervals[idx][1]
+
+	def __len__(self):
+		return sum(end - start + 1 for start, end in self.intervals)
+
+	def add(self, number):
+		self.add_range(number, number)
+
+	def add_range(self, start, end):
+		intervals = self.intervals
+		idx = bisect_right(intervals, (start, float("inf")))
+
+		# Merge with the previous interval when overlapping or adjacent
+		if idx and intervals[idx - 1][1] >= start - 1:
+			idx -= 1
+			start = intervals[idx][0]
+			end = max(end, intervals[idx][1])
+
+		last = idx
+		while last < len(intervals) and intervals[last][0] <= end + 1:
+			end = max(end, intervals[last][1])
+			last += 1
+
+		intervals[idx:last] = [(start, end)]
+
+	def remove(self, number):
+		idx = bisect_right(self.intervals, (number, float("inf"))) - 1
+		if idx < 0 or not (self.intervals[idx][0] <= number <= self.intervals[idx][1]):
+			return
+
+		start, end = self.intervals[idx]
+		pieces = []
+		if start < number:
+			pieces.append((start, number - 1))
+		if number < end:
+			pieces.append((number + 1, end))
+		self.intervals[idx : idx + 1] = pieces
+
+	def next_free(self, number):
+		"""Smallest integer >= number that is not in the set"""
+		idx = bisect_right(self.intervals, (number, float("inf"))) - 1
+		if idx >= 0 and self.intervals[idx][1] >= number:
+			return self.intervals[idx][1] + 1
+		return number
+
+	def _append(self, start, end):
+		if self.intervals and self.intervals[-1][1] >= start - 1:
+			self.intervals[-1] = (self.intervals[-1][0], max(end, self.intervals[-1][1]))
+		else:
+			self.intervals.append((start, end))
+
+
+def cheque_number_to_int(cheque_number):
+	try:
+		return int(str(cheque_number).strip())
+	except (TypeError, ValueError):
+		frappe.throw(f"Cheque number '{cheque_number}' must contain only numeric values")
+
+
+def format_cheque_number(number, cheque_book):
+	"""Keep the zero padding of the book's series"""
+	return str(number).zfill(len(str(cheque_book.start_series)))
+
+
+def get_cheque_book_ranges(bank_account):
+	"""Sorted (start_number, end_number, name) of the active Cheque Books of a bank account"""
+	if frappe.flags.erpnext_utils_cheque_book_ranges is None:
+		frappe.flags.erpnext_utils_cheque_book_ranges = {}
+
+	request_cache = frappe.flags.erpnext_utils_cheque_book_ranges
+	if bank_account not in request_cache:
+		ranges = frappe.cache().hget(CHEQUE_BOOK_RANGES_KEY, bank_account)
+		if ranges is None:
+			ranges = [
+				(book.start_number, book.end_number, book.name)
+				for book in frappe.get_all(
+					"Cheque Book",
+					filters={"bank_account": bank_account, "is_active": 1},
+					fields=["name", "start_number", "end_number"],
+					order_by="start_number asc",
+				)
+			]
+			frappe.cache().hset(CHEQUE_BOOK_RANGES_KEY, bank_account, ranges)
+
+		request_cache[bank_account] = ranges
+
+	return request_cache[bank_account]
+
+
+def get_cheque_book_for_number(bank_account, cheque_number):
+	"""Name of the active Cheque Book of a bank account whose series contains the cheque number"""
+	if not bank_account or not str(cheque_number or "").strip().isdigit():
+		return None
+
+	number = int(str(cheque_number).strip())
+	ranges = get_cheque_book_ranges(bank_account)
+
+	# Ranges of one bank account never overlap (see ChequeBook.validate)
+	idx = bisect_right(ranges, (number, float("inf"))) - 1
+	if idx >= 0 and ranges[idx][0] <= number <= ranges[idx][1]:
+		return ranges[idx][2]
+
+	return None
+
+
+def clear_cheque_book_ranges_cache(bank_account=None):
+	if bank_account:
+		frappe.cache().hdel(CHEQUE_BOOK_RANGES_KEY, bank_account)
+	else:
+		frappe.cache().delete_value(CHEQUE_BOOK_RANGES_KEY)
+
+	frappe.flags.erpnext_utils_cheque_book_ranges = None
+
+
+def is_leaf_used(cheque_book, cheque_number):
+	"""
+	Check a leaf against a Cheque Book row that includes used_leaves/voided_leaves.
+
+	Advisory only (no lock); allocation re-checks under the row lock.
+	"""
+	number = cheque_number_to_int(cheque_number)
+	return number in get_leaf_set(cheque_book.name, cheque_book.used_leaves) or number in get_leaf_set(
+		cheque_book.name, cheque_book.voided_leaves
+	)
+
+
+def get_leaf_set(cheque_book_name, text):
+	"""Parsed leaf set, memoised for the request per book and leaf text; do not modify it"""
+	if frappe.flags.erpnext_utils_leaf_sets is None:
+		frappe.flags.erpnext_utils_leaf_sets = {}
+
+	request_cache = frappe.flags.erpnext_utils_leaf_sets
+	key = (cheque_book_name, text or "")
+	if key not in request_cache:
+		request_cache[key] = LeafSet.parse(text)
+
+	return request_cache[key]
+
+
+def first_free_leaf(number, used, voided):
+	"""Smallest leaf >= number that is neither used nor voided"""
+	while True:
+		free = voided.next_free(used.next_free(number))
+		if free == number:
+			return number
+		number = free
+
+
+def lock_cheque_book(cheque_book_name):
+	"""Lock the Cheque Book row for the rest of the transaction and return its leaf fields"""
+	cheque_book = frappe.db.get_value("Cheque Book", cheque_book_name, LEAF_FIELDS, as_dict=True, for_update=True)
+	if not cheque_book:
+		frappe.throw(f"Cheque Book '{cheque_book_name}' not found")
+	return cheque_book
+
+
+def lock_cheque_books(cheque_book_names):
+	"""
+	Lock several Cheque Book rows with one query.
+
+	Rows are locked in name order so concurrent batches cannot deadlock.
+	"""
+	if not cheque_book_names:
+		return {}
+
+	cheque_book = frappe.qb.DocType("Cheque Book")
+	rows = (
+		frappe.qb.from_(cheque_book)
+		.select(*[cheque_book[field] for field in LEAF_FIELDS])
+		.where(cheque_book.name.isin(list(cheque_book_names)))
+		.orderby(cheque_book.name)
+		.for_update()
+	).run(as_dict=True)
+
+	return {row.name: row for row in rows}
+
+
+def allocate_next_cheque_number(cheque_book_name):
+	"""Reserve the next free leaf of a book and return it as a cheque number"""
+	cheque_book = lock_cheque_book(cheque_book_name)
+	used = LeafSet.parse(cheque_book.used_leaves)
+	voided = LeafSet.parse(cheque_book.voided_leaves)
+
+	end = int(cheque_book.end_series)
+	number = first_free_leaf(int(cheque_book.start_series), used, voided)
+
+	if number > end:
+		frappe.throw(f"Cheque series has been exhausted for Cheque Book '{cheque_book_name}'. End: {end}")
+
+	used.add(number)
+	update_cheque_book_leaves(cheque_book, used, voided)
+
+	return format_cheque_number(number, cheque_book)
+
+
+def mark_cheque_leaf_used(cheque_book_name, cheque_number):
+	"""Record a leaf as issued; throws when another transaction already took it"""
+	cheque_book = lock_cheque_book(cheque_book_name)
+	number = cheque_number_to_int(cheque_number)
+
+	if not int(cheque_book.start_series) <= number <= int(cheque_book.end_series):
+		frappe.throw(f"Cheque number '{cheque_number}' is outside the series of Cheque Book '{cheque_book_name}'")
+
+	used = LeafSet.parse(cheque_book.used_leaves)
+	voided = LeafSet.parse(cheque_book.voided_leaves)
+	if number in used or number in voided:
+		frappe.throw(f"Cheque number '{cheque_number}' is already used in cheque book '{cheque_book_name}'")
+
+	used.add(number)
+	update_cheque_book_leaves(cheque_book, used, voided)
+
+
+def void_cheque_leaves(cheque_book_name, cheque_numbers):
+	"""Move leaves of cancelled cheques from used to voided; they are never reissued"""
+	cheque_book = lock_cheque_book(cheque_book_name)
+	used = LeafSet.parse(cheque_book.used_leaves)
+	voided = LeafSet.parse(cheque_book.voided_leaves)
+
+	for cheque_number in cheque_numbers:
+		number = cheque_number_to_int(cheque_number)
+		used.remove(number)
+		voided.add(number)
+
+	update_cheque_book_leaves(cheque_book, used, voided)
+
+
+def update_cheque_book_leaves(cheque_book, used, voided):
+	"""Write the leaf sets and the next free leaf without a full document save"""
+	end = int(cheque_book.end_series)
+	next_free = first_free_leaf(int(cheque_book.start_series), used, voided)
+
+	frappe.db.set_value(
+		"Cheque Book",
+		cheque_book.name,
+		{
+			"used_leaves": used.serialize(),
+			"voided_leaves": voided.serialize(),
+			"current_series": format_cheque_number(min(next_free, end), cheque_book),
+		},
+	)
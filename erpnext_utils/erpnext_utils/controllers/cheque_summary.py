@@ -0,0 +1,148 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Incremental maintenance of the Cheque Summary table.
+
+Cheque Summary holds one row per (bank account, cheque book, cheque type,
+status, cheque date). Each row carries the number and amount of cheques for
+that key and is named by a hash of the key. Changes are applied as deltas
+with one multi-row `INSERT ... ON DUPLICATE KEY UPDATE`, so concurrent
+updates add up instead of overwriting each other.
+
+Cheque.on_update / on_trash keep the table current for document saves. The
+bulk paths (cancellation, PDC maturity, payment runs) apply the same deltas
+for the rows they insert or update directly.
+"""
+
+import hashlib
+
+import frappe
+from frappe.query_builder.functions import Count, Sum
+from frappe.utils import flt, getdate, now
+
+SUMMARY_KEY_FIELDS = ("bank_account", "cheque_book", "cheque_type", "status", "cheque_date")
+
+# Rows written per INSERT statement
+SUMMARY_CHUNK_SIZE = 500
+
+
+def get_summary_key(cheque, status=None):
+	"""Summary key of a Cheque (document or dict); `status` overrides the cheque's status"""
+	return (
+		cheque.get("bank_account") or None,
+		cheque.get("cheque_book") or None,
+		cheque.get("cheque_type") or None,
+		status or cheque.get("status") or None,
+		str(getdate(cheque.get("cheque_date"))) if cheque.get("cheque_date") else None,
+	)
+
+
+def get_summary_name(key):
+	return hashlib.sha1("|".join("" if value is None else str(value) for value in key).encode()).hexdigest()
+
+
+def add_cheque_delta(deltas, cheque, sign=1, status=None):
+	key = get_summary_key(cheque, status)
+	count, amount = deltas.get(key, (0, 0))
+	deltas[key] = (count + sign, amount + sign * flt(cheque.get("amount")))
+
+
+def update_cheque_summary(deltas):
+	"""Apply {summary key: (count delta, amount delta)} to Cheque Summary"""
+	rows = [(key, count, amount) for key, (count, amount) in deltas.items() if count or flt(amount)]
+	if not rows:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+
+	for start in range(0, len(rows), SUMMARY_CHUNK_SIZE):
+		chunk = rows[start : start + SUMMARY_CHUNK_SIZE]
+		values = []
+		for key, count, amount in chunk:
+			values.extend((get_summary_name(key), timestamp, timestamp, user, user, *key, count, amount))
+
+		placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+		frappe.db.sql(
+			f"""
+			insert into `tabCheque Summary`
+				(name, creation, modified, owner, modified_by,
+				bank_account, cheque_book, cheque_type, status, cheque_date,
+				cheque_count, amount)
+			values {placeholders}
+			on duplicate key update
+				cheque_count = cheque_count + values(cheque_count),
+				amount = amount + values(amount),
+				modified = values(modified),
+				modified_by = values(modified_by)
+			""",
+			values,
+		)
+
+
+def on_cheque_update(doc):
+	"""Cheque.on_update: move the cheque from its previous key to its current key"""
+	deltas = {}
+	doc_before_save = doc.get_doc_before_save()
+	if doc_before_save:
+		add_cheque_delta(deltas, doc_before_save, -1)
+	add_cheque_delta(deltas, doc)
+	update_cheque_summary(deltas)
+
+
+def on_cheque_trash(doc):
+	deltas = {}
+	add_cheque_delta(deltas, doc, -1)
+	update_cheque_summary(deltas)
+
+
+def add_cheques_to_summary(cheques):
+	"""Count cheques written with a bulk INSERT"""
+	deltas = {}
+	for cheque in cheques:
+		add_cheque_delta(deltas, cheque)
+	update_cheque_summary(deltas)
+
+
+def update_summary_for_status_change(cheques, status):
+	"""
+	Move cheques updated in bulk to a new status.
+
+	`cheques` are the rows as they were before the UPDATE and must include
+	the summary key fields and amount.
+	"""
+	deltas = {}
+	for cheque in cheques:
+		if cheque.get("status") == status:
+			continue
+		add_cheque_delta(deltas, cheque, -1)
+		add_cheque_delta(deltas, cheque, status=status)
+	update_cheque_summary(deltas)
+
+
+def rebuild_cheque_summary():
+	"""Recompute Cheque Summary from Cheque with one grouped query"""
+	cheque = frappe.qb.DocType("Cheque")
+	totals = (
+		frappe.qb.from_(cheque)
+		.select(
+			cheque.bank_account,
+			cheque.cheque_book,
+			cheque.cheque_type,
+			cheque.status,
+			cheque.cheque_date,
+			Count("*").as_("cheque_count"),
+			Sum(cheque.amount).as_("amount"),
+		)
+		.groupby(cheque.bank_account, cheque.cheque_book, cheque.cheque_type, cheque.status, cheque.cheque_date)
+	).run(as_dict=True)
+
+	frappe.db.delete("Cheque Summary")
+
+	deltas = {}
+	for row in totals:
+		key = get_summary_key(row)
+		count, amount = deltas.get(key, (0, 0))
+		deltas[key] = (count + row.cheque_count, amount + flt(row.amount))
+	update_cheque_summary(deltas)
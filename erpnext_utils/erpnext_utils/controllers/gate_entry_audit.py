@@ -0,0 +1,238 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Audit of Gate Entry references on procurement documents.
+
+Gate Entries are walked in keyset-paginated chunks (by name). For each
+chunk, every item table is read with one query. The query left-joins the
+referenced Gate Entry Item and Material Request Item and returns only the
+rows with a problem. Findings are written to a private CSV file row by row,
+so memory use does not depend on the size of the audited period.
+"""
+
+import csv
+import os
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+from erpnext_utils.erpnext_utils.controllers.gate_entry_links import LINKED_ITEM_TABLES
+
+# Gate Entries audited per query round
+DEFAULT_CHUNK_SIZE = 500
+
+# Detail rows returned per item table by the single Gate Entry check
+DEFAULT_PAGE_LENGTH = 100
+
+# Item table -> (upstream document field, upstream row field)
+UPSTREAM_REFERENCE_FIELDS = {
+	"Purchase Order Item": ("material_request", "material_request_item"),
+	"Purchase Receipt Item": ("purchase_order", "purchase_order_item"),
+	"Purchase Invoice Item": ("purchase_receipt", "pr_detail"),
+}
+
+MISSING_GATE_ENTRY_ITEM = "Missing Gate Entry Item"
+FOREIGN_GATE_ENTRY_ITEM = "Gate Entry Item Not In Gate Entry"
+BROKEN_MATERIAL_REQUEST_LINK = "Broken Material Request Link"
+
+AUDIT_COLUMNS = ("gate_entry", "doctype", "parent", "row", "item_code", "issue", "reference")
+
+
+def get_reference_counts(gate_entry):
+	"""{dashboard key: (total items, items with gate_entry_item)} of one Gate Entry, from one query"""
+	query = " union all ".join(
+		f"""
+		select '{key}' as link_key, count(*) as total_items,
+			sum(ifnull(gate_entry_item, '') != '') as items_with_gate_entry_item
+		from `tab{doctype}`
+		where gate_entry = %(gate_entry)s
+		"""
+		for doctype, key in LINKED_ITEM_TABLES.items()
+	)
+
+	return {
+		row.link_key: (cint(row.total_items), cint(row.items_with_gate_entry_item))
+		for row in frappe.db.sql(query, {"gate_entry": gate_entry}, as_dict=True)
+	}
+
+
+def get_reference_details(gate_entry, doctype, start=0, page_length=DEFAULT_PAGE_LENGTH):
+	"""One page of the items of `doctype` that reference a Gate Entry"""
+	return frappe.get_all(
+		doctype,
+		filters={"gate_entry": gate_entry},
+		fields=["name", "parent", "item_code", "gate_entry", "gate_entry_item", *UPSTREAM_REFERENCE_FIELDS[doctype]],
+		order_by="parent asc, idx asc",
+		start=cint(start),
+		page_length=cint(page_length) or DEFAULT_PAGE_LENGTH,
+	)
+
+
+def iter_gate_entry_chunks(from_date=None, to_date=None, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""Yield lists of submitted Gate Entry names, keyset-paginated by name"""
+	chunk_size = cint(chunk_size) or DEFAULT_CHUNK_SIZE
+	filters = {"docstatus": 1}
+	if from_date and to_date:
+		filters["gate_entry_date"] = ["between", [from_date, to_date]]
+	elif from_date:
+		filters["gate_entry_date"] = [">=", from_date]
+	elif to_date:
+		filters["gate_entry_date"] = ["<=", to_date]
+
+	last_name = None
+	while True:
+		chunk_filters = dict(filters)
+		if last_name:
+			chunk_filters["name"] = [">", last_name]
+
+		names = frappe.get_all(
+			"Gate Entry", filters=chunk_filters, order_by="name asc", page_length=chunk_size, pluck="name"
+		)
+		if not names:
+			return
+
+		yield names
+		last_name = names[-1]
+
+
+def iter_reference_findings(gate_entries):
+	"""Yield a finding dict for every broken reference of the given Gate Entries"""
+	for doctype in LINKED_ITEM_TABLES:
+		# Only Purchase Order Items carry Material Request links
+		check_mr = doctype == "Purchase Order Item"
+		mr_fields = "null as material_request_item, null as found_mr_item"
+		mr_join = mr_condition = ""
+		if check_mr:
+			mr_fields = "item.material_request_item, mr_item.name as found_mr_item"
+			mr_join = """
+				left join `tabMaterial Request Item` mr_item
+					on mr_item.name = item.material_request_item and mr_item.parent = item.material_request"""
+			mr_condition = "or (ifnull(item.material_request_item, '') != '' and mr_item.name is null)"
+
+		rows = frappe.db.sql(
+			f"""
+			select
+				item.gate_entry, item.parent, item.name, item.item_code, item.gate_entry_item,
+				{mr_fields},
+				gate_entry_item.name as found_gate_entry_item
+			from `tab{doctype}` item
+			left join `tabGate Entry Item` gate_entry_item
+				on gate_entry_item.name = item.gate_entry_item and gate_entry_item.parent = item.gate_entry
+			{mr_join}
+			where item.gate_entry in %(gate_entries)s
+				and item.docstatus < 2
+				and (
+					ifnull(item.gate_entry_item, '') = ''
+					or gate_entry_item.name is null
+					{mr_condition}
+				)
+			order by item.gate_entry, item.parent, item.idx
+			""",
+			{"gate_entries": gate_entries},
+			as_dict=True,
+		)
+
+		for row in rows:
+			finding = {
+				"gate_entry": row.gate_entry,
+				"doctype": doctype,
+				"parent": row.parent,
+				"row": row.name,
+				"item_code": row.item_code,
+			}
+			if not row.gate_entry_item:
+				yield {**finding, "issue": MISSING_GATE_ENTRY_ITEM, "reference": None}
+			elif not row.found_gate_entry_item:
+				yield {**finding, "issue": FOREIGN_GATE_ENTRY_ITEM, "reference": row.gate_entry_item}
+			if row.material_request_item and not row.found_mr_item:
+				yield {**finding, "issue": BROKEN_MATERIAL_REQUEST_LINK, "reference": row.material_request_item}
+
+	# Gate Entry Items whose Material Request Item is gone or belongs to another Material Request
+	for row in frappe.db.sql(
+		"""
+		select gate_entry_item.parent, gate_entry_item.name, gate_entry_item.item_code, gate_entry_item.material_request_item
+		from `tabGate Entry Item` gate_entry_item
+		left join `tabMaterial Request Item` mr_item
+			on mr_item.name = gate_entry_item.material_request_item
+			and mr_item.parent = gate_entry_item.material_request
+		where gate_entry_item.parent in %(gate_entries)s
+			and ifnull(gate_entry_item.material_request_item, '') != ''
+			and mr_item.name is null
+		order by gate_entry_item.parent, gate_entry_item.idx
+		""",
+		{"gate_entries": gate_entries},
+		as_dict=True,
+	):
+		yield {
+			"gate_entry": row.parent,
+			"doctype": "Gate Entry Item",
+			"parent": row.parent,
+			"row": row.name,
+			"item_code": row.item_code,
+			"issue": BROKEN_MATERIAL_REQUEST_LINK,
+			"reference": row.material_request_item,
+		}
+
+
+@frappe.whitelist()
+def run_gate_entry_audit(from_date=None, to_date=None, enqueue=1):
+	"""
+	Audit the references of all submitted Gate Entries in a date range.
+
+	:param enqueue: Run as a background job (default); the result is
+		published on the `gate_entry_audit_complete` realtime event.
+	:return: The audit summary with the `file_url` of the findings CSV.
+	"""
+	frappe.has_permission("Gate Entry", "read", throw=True)
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.gate_entry_audit.process_gate_entry_audit",
+			queue="long",
+			timeout=6000,
+			from_date=from_date,
+			to_date=to_date,
+			user=frappe.session.user,
+		)
+		return {"job_id": job.id if job else None}
+
+	return process_gate_entry_audit(from_date, to_date)
+
+
+def process_gate_entry_audit(from_date=None, to_date=None, chunk_size=DEFAULT_CHUNK_SIZE, user=None):
+	"""Stream the findings of all Gate Entries into a private CSV File"""
+	file_name = f"gate-entry-audit-{now_datetime().strftime('%Y%m%d-%H%M%S')}.csv"
+	path = frappe.get_site_path("private", "files", file_name)
+	summary = frappe._dict(gate_entries=0, findings=0, issues={})
+
+	with open(path, "w", newline="") as f:
+		writer = csv.DictWriter(f, fieldnames=AUDIT_COLUMNS)
+		writer.writeheader()
+		for gate_entries in iter_gate_entry_chunks(from_date, to_date, chunk_size):
+			summary.gate_entries += len(gate_entries)
+			for finding in iter_reference_findings(gate_entries):
+				writer.writerow(finding)
+				summary.findings += 1
+				summary.issues[finding["issue"]] = summary.issues.get(finding["issue"], 0) + 1
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+			"file_size": os.path.getsize(path),
+		}
+	).insert(ignore_permissions=True)
+	summary.file_url = file_doc.file_url
+	frappe.db.commit()
+
+	frappe.logger("erpnext_utils").info(
+		f"[Gate Entry Audit] {summary.gate_entries} Gate Entries audited, {summary.findings} findings"
+	)
+
+	if user:
+		frappe.publish_realtime("gate_entry_audit_complete", summary, user=user)
+
+	return summary
@@ -0,0 +1,92 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Procurement documents linked to Gate Entries.
+
+Purchase Order, Purchase Receipt and Purchase Invoice items carry the custom
+`gate_entry` field. The parents linked to any number of gate entries are read
+with one UNION query over the three item tables, which goes through the
+(gate_entry, parent) indexes installed by the add_gate_entry_indexes patch.
+Results are cached per gate entry in redis and cleared by the PO/PR/PI
+doc_events in hooks.py.
+"""
+
+import frappe
+
+GATE_ENTRY_LINKS_KEY = "erpnext_utils:gate_entry_links"
+
+# Item table -> key of the parent list in the dashboard data
+LINKED_ITEM_TABLES = {
+	"Purchase Order Item": "purchase_orders",
+	"Purchase Receipt Item": "purchase_receipts",
+	"Purchase Invoice Item": "purchase_invoices",
+}
+
+
+def empty_links():
+	return {key: [] for key in LINKED_ITEM_TABLES.values()}
+
+
+def get_gate_entry_links(gate_entries):
+	"""{gate entry: {"purchase_orders": [...], "purchase_receipts": [...], "purchase_invoices": [...]}}"""
+	gate_entries = list(dict.fromkeys(name for name in gate_entries if name))
+	if not gate_entries:
+		return {}
+
+	cache = frappe.cache()
+	links = {}
+	missing = []
+	for name in gate_entries:
+		cached = cache.hget(GATE_ENTRY_LINKS_KEY, name)
+		if cached is None:
+			missing.append(name)
+		else:
+			links[name] = cached
+
+	if missing:
+		fetched = {name: empty_links() for name in missing}
+		for gate_entry, key, parent in query_gate_entry_links(missing):
+			fetched[gate_entry][key].append(parent)
+
+		for name, data in fetched.items():
+			cache.hset(GATE_ENTRY_LINKS_KEY, name, data)
+		links.update(fetched)
+
+	return {name: links[name] for name in gate_entries}
+
+
+def query_gate_entry_links(gate_entries):
+	"""(gate entry, dashboard key, parent) rows of all linked items, from one UNION query"""
+	query = " union ".join(
+		f"""
+		select distinct gate_entry, '{key}' as link_key, parent
+		from `tab{doctype}`
+		where gate_entry in %(gate_entries)s
+		"""
+		for doctype, key in LINKED_ITEM_TABLES.items()
+	)
+
+	return frappe.db.sql(f"{query} order by parent", {"gate_entries": gate_entries})
+
+
+def clear_gate_entry_links_cache(doc, method=None):
+	"""
+	doc_events: drop the cached links of the gate entries referenced by a PO/PR/PI.
+
+	Gate entries referenced before the save are cleared too, so removing or
+	changing an item's gate_entry does not leave a stale link behind.
+	"""
+	items = list(doc.get("items") or [])
+	doc_before_save = doc.get_doc_before_save()
+	if doc_before_save:
+		items.extend(doc_before_save.get("items") or [])
+
+	for gate_entry in {item.get("gate_entry") for item in items if item.get("gate_entry")}:
+		frappe.cache().hdel(GATE_ENTRY_LINKS_KEY, gate_entry)
+
+
+def add_gate_entry_indexes():
+	for doctype in LINKED_ITEM_TABLES:
+		if frappe.db.has_column(doctype, "gate_entry"):
+			frappe.db.add_index(doctype, ["gate_entry", "parent"])
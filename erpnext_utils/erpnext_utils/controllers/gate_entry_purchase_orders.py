@@ -0,0 +1,191 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Bulk Purchase Order generation from inward Gate Entries.
+
+Eligible items are Gate Entry Items with a Material Request link that are
+not yet on a Purchase Order that is not cancelled. They are read for all
+selected Gate Entries with one query and grouped by (supplier, company).
+One Purchase Order is inserted per group, each under its own savepoint, so
+a failing group does not undo the others.
+"""
+
+import frappe
+from frappe.utils import cint, getdate
+
+# Gate Entries read per query round
+GATE_ENTRY_CHUNK_SIZE = 500
+
+
+def get_gate_entries(gate_entries=None, from_date=None, to_date=None):
+	"""Submitted inward Gate Entries the user can read, by name or by gate entry date range"""
+	filters = {"docstatus": 1, "gate_entry_type": "Inward"}
+	if gate_entries:
+		filters["name"] = ["in", gate_entries]
+	if from_date and to_date:
+		filters["gate_entry_date"] = ["between", [from_date, to_date]]
+	elif from_date:
+		filters["gate_entry_date"] = [">=", from_date]
+	elif to_date:
+		filters["gate_entry_date"] = ["<=", to_date]
+
+	return frappe.get_list(
+		"Gate Entry",
+		filters=filters,
+		fields=["name", "supplier", "company", "gate_entry_date"],
+		order_by="gate_entry_date asc, name asc",
+	)
+
+
+def get_eligible_items(gate_entries):
+	"""Gate Entry Items with a Material Request link and no active Purchase Order Item, in entry order"""
+	return frappe.db.sql(
+		"""
+		select
+			gate_entry_item.parent as gate_entry, gate_entry_item.name as gate_entry_item,
+			gate_entry_item.item_code, gate_entry_item.item_name, gate_entry_item.description,
+			gate_entry_item.qty, gate_entry_item.uom, gate_entry_item.rate, gate_entry_item.warehouse,
+			gate_entry_item.material_request, gate_entry_item.material_request_item,
+			mr_item.schedule_date
+		from `tabGate Entry Item` gate_entry_item
+		left join `tabMaterial Request Item` mr_item on mr_item.name = gate_entry_item.material_request_item
+		where gate_entry_item.parent in %(gate_entries)s
+			and ifnull(gate_entry_item.material_request, '') != ''
+			and ifnull(gate_entry_item.material_request_item, '') != ''
+			and not exists (
+				select 1 from `tabPurchase Order Item` po_item
+				where po_item.gate_entry = gate_entry_item.parent
+					and po_item.gate_entry_item = gate_entry_item.name
+					and po_item.docstatus < 2
+			)
+		order by gate_entry_item.parent, gate_entry_item.idx
+		""",
+		{"gate_entries": gate_entries},
+		as_dict=True,
+	)
+
+
+@frappe.whitelist()
+def make_purchase_orders_from_gate_entries(gate_entries=None, from_date=None, to_date=None, enqueue=1):
+	"""
+	Create one Purchase Order per supplier and company from many Gate Entries.
+
+	:param gate_entries: List (or JSON list) of Gate Entries; or use the date range.
+	:param enqueue: Run as a background job (default); the summary is
+		published on the `gate_entry_purchase_orders_complete` realtime event.
+	"""
+	gate_entries = frappe.parse_json(gate_entries) if isinstance(gate_entries, str) else gate_entries
+	if not gate_entries and not (from_date or to_date):
+		frappe.throw("Select Gate Entries or a date range")
+
+	frappe.has_permission("Purchase Order", "create", throw=True)
+	for gate_entry in gate_entries or []:
+		frappe.has_permission("Gate Entry", "read", gate_entry, throw=True)
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.gate_entry_purchase_orders.process_gate_entry_purchase_orders",
+			queue="long",
+			timeout=6000,
+			gate_entries=gate_entries,
+			from_date=from_date,
+			to_date=to_date,
+			user=frappe.session.user,
+		)
+		return {"job_id": job.id if job else None}
+
+	return process_gate_entry_purchase_orders(gate_entries, from_date, to_date)
+
+
+def process_gate_entry_purchase_orders(gate_entries=None, from_date=None, to_date=None, user=None):
+	"""Group the eligible Gate Entry Items by supplier and company and insert one Purchase Order per group"""
+	summary = frappe._dict(created=[], failed=[], skipped=[])
+
+	entries = {row.name: row for row in get_gate_entries(gate_entries, from_date, to_date)}
+	for row in entries.values():
+		if not row.supplier:
+			summary.skipped.append({"gate_entry": row.name, "reason": "No supplier"})
+
+	names = [row.name for row in entries.values() if row.supplier]
+	groups = {}
+	for start in range(0, len(names), GATE_ENTRY_CHUNK_SIZE):
+		for item in get_eligible_items(names[start : start + GATE_ENTRY_CHUNK_SIZE]):
+			entry = entries[item.gate_entry]
+			groups.setdefault((entry.supplier, entry.company), []).append(item)
+
+	for (supplier, company), items in groups.items():
+		group_entries = list(dict.fromkeys(item.gate_entry for item in items))
+		frappe.db.savepoint("gate_entry_purchase_order")
+		try:
+			purchase_order = make_purchase_order(supplier, company, items, entries)
+		except Exception as e:
+			frappe.db.rollback(save_point="gate_entry_purchase_order")
+			summary.failed.append(
+				{
+					"supplier": supplier,
+					"company": company,
+					"gate_entries": group_entries,
+					"error": frappe.utils.strip_html(str(e)) or e.__class__.__name__,
+				}
+			)
+			frappe.clear_messages()
+			continue
+
+		frappe.db.commit()
+		summary.created.append(
+			{
+				"purchase_order": purchase_order.name,
+				"supplier": supplier,
+				"company": company,
+				"gate_entries": group_entries,
+				"items": len(items),
+			}
+		)
+
+	frappe.logger("erpnext_utils").info(
+		f"[Gate Entry PO] {len(summary.created)} Purchase Orders created, {len(summary.failed)} failed, "
+		f"{len(summary.skipped)} Gate Entries skipped"
+	)
+
+	if user:
+		frappe.publish_realtime("gate_entry_purchase_orders_complete", summary, user=user)
+
+	return summary
+
+
+def make_purchase_order(supplier, company, items, entries):
+	"""Insert a draft Purchase Order for the Gate Entry Items of one supplier and company"""
+	transaction_date = max(getdate(entries[item.gate_entry].gate_entry_date) for item in items)
+
+	purchase_order = frappe.new_doc("Purchase Order")
+	purchase_order.supplier = supplier
+	purchase_order.company = company
+	purchase_order.transaction_date = transaction_date
+
+	for item in items:
+		purchase_order.append(
+			"items",
+			{
+				"item_code": item.item_code,
+				"item_name": item.item_name,
+				"description": item.description,
+				"qty": item.qty,
+				"uom": item.uom,
+				"stock_uom": item.uom,
+				"conversion_factor": 1,
+				"rate": item.rate,
+				"warehouse": item.warehouse,
+				"schedule_date": max(getdate(item.schedule_date), transaction_date) if item.schedule_date else transaction_date,
+				"material_request": item.material_request,
+				"material_request_item": item.material_request_item,
+				"gate_entry": item.gate_entry,
+				"gate_entry_item": item.gate_entry_item,
+			},
+		)
+
+	purchase_order.schedule_date = min(row.schedule_date for row in purchase_order.items)
+	purchase_order.run_method("set_missing_values")
+	purchase_order.insert()
+
+	return purchase_order
@@ -0,0 +1,191 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Pure-Python GL map builder for vouchers.
+
+Turns a voucher's `accounts` rows into lightweight GLMapEntry records in one
+pass. Posting (gl_posting.make_gl_entries) and the GL preview both consume
+the same map, so no GL Entry documents are constructed just to get numbers.
+"""
+
+import frappe
+from frappe.utils import flt, nowdate
+
+from erpnext_utils.erpnext_utils.controllers.settings_cache import get_company_default_cost_center
+
+# Side on which the account rows are posted; the voucher (cash/bank/PDC)
+# account is posted on the opposite side for the total.
+ROW_SIDE = {
+	"Payment": "debit",
+	"Bank Payment": "debit",
+	"Receipt": "credit",
+	"Bank Receipt": "credit",
+}
+
+
+class GLMapEntry:
+	"""One GL Entry worth of values, without Document overhead"""
+
+	__slots__ = (
+		"posting_date",
+		"transaction_date",
+		"fiscal_year",
+		"account",
+		"account_currency",
+		"debit",
+		"credit",
+		"debit_in_account_currency",
+		"credit_in_account_currency",
+		"cost_center",
+		"party_type",
+		"party",
+		"company",
+		"voucher_type",
+		"voucher_no",
+		"voucher_subtype",
+		"against",
+		"remarks",
+		"is_opening",
+		"is_cancelled",
+	)
+
+	def __init__(self, **kwargs):
+		for field in self.__slots__:
+			setattr(self, field, kwargs.get(field))
+
+		self.debit = flt(self.debit)
+		self.credit = flt(self.credit)
+		if self.debit_in_account_currency is None:
+			self.debit_in_account_currency = self.debit
+		if self.credit_in_account_currency is None:
+			self.credit_in_account_currency = self.credit
+		self.is_opening = self.is_opening or "No"
+		self.is_cancelled = self.is_cancelled or 0
+
+	def get(self, field, default=None):
+		value = getattr(self, field, None)
+		return default if value is None else value
+
+	def as_dict(self):
+		return frappe._dict({field: getattr(self, field) for field in self.__slots__})
+
+	def __repr__(self):
+		return f"<GLMapEntry {self.account} Dr {self.debit} Cr {self.credit}>"
+
+
+def build_gl_map(
+	posting_date,
+	accounts,
+	company,
+	voucher_type=None,
+	voucher_account=None,
+	voucher_doctype=None,
+	voucher_no=None,
+	remarks=None,
+):
+	"""
+	Build the GL map for a voucher in a single pass over `accounts`.
+
+	For Payment / Receipt / Bank Payment / Bank Receipt each positive row is
+	posted on its ROW_SIDE against `voucher_account`, and one balancing entry
+	for the total is posted on `voucher_account`. Any other voucher_type posts
+	the rows' own debit/credit as given.
+
+	:return: list of GLMapEntry
+	"""
+	posting_date = posting_date or nowdate()
+	default_cost_center = _DefaultCostCenter(company)
+
+	if voucher_type not in ROW_SIDE:
+		return [
+			GLMapEntry(
+				posting_date=posting_date,
+				account=acc.account,
+				debit=acc.get("debit", 0),
+				credit=acc.get("credit", 0),
+				cost_center=acc.get("cost_center") or default_cost_center.get(),
+				party_type=acc.get("party_type"),
+				party=acc.get("party"),
+				company=company,
+				voucher_type=voucher_doctype or acc.get("voucher_type") or voucher_type,
+				voucher_no=voucher_no or acc.get("voucher_no"),
+				voucher_subtype=acc.get("voucher_subtype"),
+				against=acc.get("against"),
+				remarks=remarks,
+			)
+			for acc in accounts
+		]
+
+	row_side = ROW_SIDE[voucher_type]
+	voucher_side = "credit" if row_side == "debit" else "debit"
+
+	gl_map = []
+	against_accounts = []
+	total_amount = 0
+
+	for acc in accounts:
+		amount = acc.get("amount") or 0
+		total_amount += amount
+		if amount <= 0:
+			continue
+
+		against_accounts.append(acc.account)
+		gl_map.append(
+			GLMapEntry(
+				posting_date=posting_date,
+				account=acc.account,
+				cost_center=acc.get("cost_center") or default_cost_center.get(),
+				party_type=acc.get("party_type"),
+				party=acc.get("party"),
+				company=company,
+				voucher_type=voucher_doctype or voucher_type,
+				voucher_no=voucher_no,
+				voucher_subtype=voucher_doctype,
+				against=voucher_account,
+				remarks=remarks,
+				**{row_side: amount},
+			)
+		)
+
+	if voucher_account:
+		# Cost center of the voucher entry comes from the first account row
+		voucher_cost_center = accounts[0].get("cost_center") if accounts else None
+		if not voucher_cost_center:
+			if voucher_type == "Bank Receipt":
+				frappe.throw("Cost Center (Official or Out Of Books) is mandatory for all vouchers")
+			voucher_cost_center = default_cost_center.get()
+
+		gl_map.append(
+			GLMapEntry(
+				posting_date=posting_date,
+				account=voucher_account,
+				cost_center=voucher_cost_center,
+				company=company,
+				voucher_type=voucher_doctype or voucher_type,
+				voucher_no=voucher_no,
+				voucher_subtype=voucher_doctype,
+				against=",".join(against_accounts),
+				remarks=remarks,
+				**{voucher_side: total_amount},
+			)
+		)
+
+	return gl_map
+
+
+class _DefaultCostCenter:
+	"""Resolves the company default cost center at most once per voucher"""
+
+	__slots__ = ("company", "value", "resolved")
+
+	def __init__(self, company):
+		self.company = company
+		self.value = None
+		self.resolved = False
+
+	def get(self):
+		if not self.resolved:
+			self.value = get_company_default_cost_center(self.company)
+			self.resolved = True
+		return self.value
@@ -0,0 +1,313 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Batched GL posting for vouchers.
+
+A voucher's GL map (one GLMapEntry per GL Entry) is validated once as a whole and
+then written with a single multi-row INSERT inside the submit transaction,
+instead of building and inserting one GL Entry document per row.
+"""
+
+import time
+
+import frappe
+from frappe.utils import flt, getdate, now, nowdate
+
+from erpnext_utils.erpnext_utils.controllers.settings_cache import get_company_defaults
+
+GL_ENTRY_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"posting_date",
+	"transaction_date",
+	"fiscal_year",
+	"account",
+	"account_currency",
+	"debit",
+	"credit",
+	"debit_in_account_currency",
+	"credit_in_account_currency",
+	"cost_center",
+	"party_type",
+	"party",
+	"company",
+	"voucher_type",
+	"voucher_no",
+	"voucher_subtype",
+	"against",
+	"remarks",
+	"is_opening",
+	"is_cancelled",
+)
+
+# Rows per INSERT when progress is published for a queued submission
+PROGRESS_CHUNK_SIZE = 500
+
+
+def make_gl_entries(gl_map, company, voucher_label=None, progress_doc=None):
+	"""
+	Validate the whole GL map once and bulk insert it.
+
+	:param gl_map: List of GLMapEntry records (see gl_map.build_gl_map).
+	:param company: Company the voucher is posted in.
+	:param voucher_label: Used in the timing log line, e.g. "Bank Payment Voucher BP-0001".
+	:param progress_doc: When given, realtime progress is published against this document.
+	:return: Names of the inserted GL Entries.
+	"""
+	if not gl_map:
+		return []
+
+	start = time.perf_counter()
+
+	validate_gl_map(gl_map, company)
+	names = bulk_insert_gl_entries(gl_map, progress_doc)
+
+	elapsed_ms = (time.perf_counter() - start) * 1000
+	frappe.logger("erpnext_utils").info(
+		f"[GL Posting] Posted {len(names)} GL Entries for {voucher_label or company} in {elapsed_ms:.1f} ms"
+	)
+
+	return names
+
+
+def validate_gl_map(gl_map, company):
+	"""
+	Validate a voucher's GL map in one pass.
+
+	Replaces the per-document GL Entry validation: accounts and cost centers are
+	checked with one query each, and the fiscal year is resolved once per
+	posting date. Party, frozen account and freeze date, mandatory accounting
+	dimension and account currency checks follow GL Entry, with the settings
+	read once per map.
+	"""
+	total_debit = total_credit = 0
+
+	for idx, entry in enumerate(gl_map, 1):
+		if not entry.account:
+			frappe.throw(f"GL Entry {idx}: Account is mandatory")
+
+		entry.posting_date = entry.posting_date or nowdate()
+
+		if entry.debit < 0 or entry.credit < 0:
+			frappe.throw(f"GL Entry {idx}: Negative debit or credit not allowed for account {entry.account}")
+
+		total_debit += entry.debit
+		total_credit += entry.credit
+
+	if flt(total_debit - total_credit, 2):
+		frappe.throw(
+			f"Debit and Credit not equal for this voucher. Difference is {flt(total_debit - total_credit, 2)}"
+		)
+
+	accounts = get_account_details({entry.account for entry in gl_map})
+	cost_centers = get_cost_center_details({entry.cost_center for entry in gl_map})
+	company_currency = get_company_defaults(company).default_currency
+	freeze_settings = get_accounts_freeze_settings()
+	dimensions = [dimension for dimension in get_mandatory_dimensions() if dimension.company == company]
+	fiscal_years = {}
+
+	for idx, entry in enumerate(gl_map, 1):
+		account = accounts.get(entry.account)
+		if not account:
+			frappe.throw(f"GL Entry {idx}: Account '{entry.account}' does not exist")
+		if account.is_group:
+			frappe.throw(f"GL Entry {idx}: Account '{entry.account}' is a group account and cannot be used in transactions")
+		if account.disabled:
+			frappe.throw(f"GL Entry {idx}: Account '{entry.account}' is disabled")
+		if account.company != company:
+			frappe.throw(f"GL Entry {idx}: Account '{entry.account}' does not belong to Company '{company}'")
+
+		if account.account_type in ("Receivable", "Payable") and not (entry.party_type and entry.party):
+			frappe.throw(f"GL Entry {idx}: Party Type and Party are required for {account.account_type} account {entry.account}")
+
+		if account.freeze_account == "Yes":
+			if not freeze_settings.frozen_accounts_modifier:
+				frappe.throw(f"GL Entry {idx}: Account '{entry.account}' is frozen")
+			if not freeze_settings.is_modifier:
+				frappe.throw(f"GL Entry {idx}: Not authorized to post to frozen Account '{entry.account}'")
+
+		if (
+			freeze_settings.acc_frozen_upto
+			and getdate(entry.posting_date) <= getdate(freeze_settings.acc_frozen_upto)
+			and not freeze_settings.is_modifier
+		):
+			frappe.throw(
+				f"GL Entry {idx}: You are not authorized to add or update entries before {freeze_settings.acc_frozen_upto}"
+			)
+
+		account_currency = account.account_currency or company_currency
+		if (entry.account_currency or company_currency) != account_currency:
+			frappe.throw(
+				f"GL Entry {idx}: Accounting Entry for account {entry.account} can only be made in currency {account_currency}"
+			)
+
+		for dimension in dimensions:
+			mandatory = (
+				dimension.mandatory_for_pl if account.report_type == "Profit and Loss" else dimension.mandatory_for_bs
+			)
+			if mandatory and not entry.get(dimension.fieldname):
+				frappe.throw(
+					f"GL Entry {idx}: Accounting Dimension '{dimension.label or dimension.fieldname}' is required "
+					f"for '{account.report_type}' account {entry.account}"
+				)
+
+		cost_center = entry.cost_center
+		if account.report_type == "Profit and Loss" and not cost_center:
+			frappe.throw(f"GL Entry {idx}: Cost Center is required for 'Profit and Loss' account {entry.account}")
+		if cost_center:
+			cost_center_details = cost_centers.get(cost_center)
+			if not cost_center_details:
+				frappe.throw(f"GL Entry {idx}: Cost Center '{cost_center}' does not exist")
+			if cost_center_details.is_group:
+				frappe.throw(f"GL Entry {idx}: Cost Center '{cost_center}' is a group cost center")
+			if cost_center_details.company != company:
+				frappe.throw(f"GL Entry {idx}: Cost Center '{cost_center}' does not belong to Company '{company}'")
+
+		if entry.posting_date not in fiscal_years:
+			fiscal_years[entry.posting_date] = get_fiscal_year_name(entry.posting_date, company)
+
+		entry.fiscal_year = fiscal_years[entry.posting_date]
+		entry.account_currency = account_currency
+		entry.company = company
+
+
+def get_account_details(accounts):
+	"""Fetch validity details for a set of accounts in one query, keyed by account name"""
+	accounts = [account for account in accounts if account]
+	if not accounts:
+		return {}
+
+	return {
+		row.name: row
+		for row in frappe.get_all(
+			"Account",
+			filters={"name": ["in", accounts]},
+			fields=[
+				"name",
+				"is_group",
+				"disabled",
+				"company",
+				"account_currency",
+				"report_type",
+				"account_type",
+				"freeze_account",
+			],
+		)
+	}
+
+
+def get_cost_center_details(cost_centers):
+	"""Fetch validity details for a set of cost centers in one query, keyed by cost center name"""
+	cost_centers = [cost_center for cost_center in cost_centers if cost_center]
+	if not cost_centers:
+		return {}
+
+	return {
+		row.name: row
+		for row in frappe.get_all(
+			"Cost Center",
+			filters={"name": ["in", cost_centers]},
+			fields=["name", "is_group", "company"],
+		)
+	}
+
+
+def get_accounts_freeze_settings():
+	"""Accounts freeze date and the role allowed to post to frozen accounts or before that date"""
+	settings = frappe._dict(
+		frappe.db.get_value(
+			"Accounts Settings", None, ["acc_frozen_upto", "frozen_accounts_modifier"], as_dict=True
+		)
+		or {}
+	)
+	settings.is_modifier = bool(
+		settings.frozen_accounts_modifier and settings.frozen_accounts_modifier in frappe.get_roles()
+	)
+	return settings
+
+
+def get_mandatory_dimensions():
+	"""Accounting dimensions mandatory for Profit and Loss or Balance Sheet accounts, per company"""
+	from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
+		get_checks_for_pl_and_bs_accounts,
+	)
+
+	return [
+		frappe._dict(dimension)
+		for dimension in get_checks_for_pl_and_bs_accounts()
+		if (dimension.get("mandatory_for_pl") or dimension.get("mandatory_for_bs")) and not dimension.get("disabled")
+	]
+
+
+def get_fiscal_year_name(posting_date, company):
+	from erpnext.accounts.utils import get_fiscal_year
+
+	return get_fiscal_year(posting_date, company=company)[0]
+
+
+def bulk_insert_gl_entries(gl_map, progress_doc=None):
+	"""
+	Write a validated GL map with one multi-row INSERT.
+
+	Runs inside the caller's transaction, so a failure rolls back together
+	with the voucher submission. With `progress_doc` the rows are written in
+	chunks of PROGRESS_CHUNK_SIZE and progress is published after each one.
+	"""
+	timestamp = now()
+	user = frappe.session.user
+	values = []
+	names = []
+
+	for entry in gl_map:
+		name = frappe.generate_hash(length=10)
+		names.append(name)
+		values.append(
+			(
+				name,
+				timestamp,
+				timestamp,
+				user,
+				user,
+				entry.posting_date,
+				entry.transaction_date or entry.posting_date,
+				entry.fiscal_year,
+				entry.account,
+				entry.account_currency,
+				entry.debit,
+				entry.credit,
+				entry.debit_in_account_currency,
+				entry.credit_in_account_currency,
+				entry.cost_center,
+				entry.party_type,
+				entry.party,
+				entry.company,
+				entry.voucher_type,
+				entry.voucher_no,
+				entry.voucher_subtype,
+				entry.against,
+				entry.remarks,
+				entry.is_opening,
+				entry.is_cancelled,
+			)
+		)
+
+	if not progress_doc:
+		frappe.db.bulk_insert("GL Entry", GL_ENTRY_FIELDS, values)
+		return names
+
+	for start in range(0, len(values), PROGRESS_CHUNK_SIZE):
+		chunk = values[start : start + PROGRESS_CHUNK_SIZE]
+		frappe.db.bulk_insert("GL Entry", GL_ENTRY_FIELDS, chunk)
+		frappe.publish_progress(
+			(start + len(chunk)) * 100 / len(values),
+			title="Posting GL Entries",
+			doctype=progress_doc.doctype,
+			docname=progress_doc.name,
+			description=f"{start + len(chunk)} of {len(values)} GL Entries posted",
+		)
+
+	return names
@@ -0,0 +1,340 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Open Purchase Material Requests offered for Gate Entries, and their status.
+
+The open set (submitted, Purchase type, Pending or Partially Ordered) is
+searched and paginated in SQL: company, text, warehouse and a
+(transaction_date, name) keyset cursor are all query conditions. The
+(material_request_type, docstatus, company, transaction_date, name) index
+serves the page in order, so a page costs LIMIT rows, not the whole set.
+Pages are kept in redis for OPEN_MATERIAL_REQUESTS_TTL seconds. Material
+Request on_change (which also fires on status updates through db_set) and
+on_trash clear them, and the short TTL covers direct SQL writes.
+
+The status of a Purchase Material Request follows its quantities: an item
+counts as covered up to the larger of its ordered qty and the qty of
+submitted Gate Entries against it. Statuses of many requests are derived
+with one grouped query and written with one CASE update.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import cint, flt, getdate, now
+
+OPEN_MATERIAL_REQUESTS_KEY = "erpnext_utils:open_material_requests"
+OPEN_MATERIAL_REQUESTS_TTL = 60
+OPEN_STATUSES = ("Pending", "Partially Ordered")
+
+# Statuses recomputed from quantities; later stages (received, stopped...) are left alone
+RECOMPUTED_STATUSES = ("Pending", "Partially Ordered", "Ordered")
+
+# Material Requests recomputed per query round
+STATUS_CHUNK_SIZE = 500
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 500
+
+# Material Request Item fields a caller may ask for
+MATERIAL_REQUEST_ITEM_FIELDS = (
+	"name",
+	"item_code",
+	"item_name",
+	"description",
+	"qty",
+	"stock_qty",
+	"ordered_qty",
+	"uom",
+	"stock_uom",
+	"conversion_factor",
+	"warehouse",
+	"rate",
+	"schedule_date",
+)
+DEFAULT_MATERIAL_REQUEST_ITEM_FIELDS = (
+	"name",
+	"item_code",
+	"item_name",
+	"description",
+	"qty",
+	"stock_qty",
+	"ordered_qty",
+	"uom",
+	"warehouse",
+	"rate",
+)
+
+
+def search_open_material_requests(txt=None, company=None, warehouse=None, limit=DEFAULT_LIMIT, cursor=None):
+	"""
+	One page of open Material Requests, ordered by transaction date and name (newest first).
+
+	:param txt: Matched against the name and title.
+	:param warehouse: Matches the default warehouse or any item warehouse.
+	:param cursor: (transaction_date, name) of the last row of the previous page.
+	"""
+	limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+	txt = (txt or "").strip()
+	cursor = frappe.parse_json(cursor) if isinstance(cursor, str) else cursor
+
+	values = {"statuses": OPEN_STATUSES, "limit": limit}
+	conditions = []
+	if company:
+		conditions.append("mr.company = %(company)s")
+		values["company"] = company
+	if cursor:
+		conditions.append(
+			"(mr.transaction_date < %(cursor_date)s"
+			" or (mr.transaction_date = %(cursor_date)s and mr.name < %(cursor_name)s))"
+		)
+		values["cursor_date"] = getdate(cursor[0])
+		values["cursor_name"] = cursor[1]
+	if txt:
+		conditions.append("(mr.name like %(txt)s or mr.title like %(txt)s)")
+		values["txt"] = f"%{txt}%"
+	if warehouse:
+		conditions.append(
+			"""(mr.set_warehouse = %(warehouse)s or exists (
+				select 1 from `tabMaterial Request Item` mr_item
+				where mr_item.parent = mr.name and mr_item.warehouse = %(warehouse)s
+			))"""
+		)
+		values["warehouse"] = warehouse
+
+	cache_key = f"{OPEN_MATERIAL_REQUESTS_KEY}:" + hashlib.sha1(
+		frappe.as_json({key: str(value) for key, value in values.items()}).encode()
+	).hexdigest()
+	page = frappe.cache().get_value(cache_key)
+	if page is not None:
+		return page
+
+	page = frappe.db.sql(
+		f"""
+		select mr.name, mr.title, mr.transaction_date, mr.schedule_date, mr.status, mr.company, mr.set_warehouse
+		from `tabMaterial Request` mr
+		where mr.material_request_type = 'Purchase'
+			and mr.docstatus = 1
+			and mr.status in %(statuses)s
+			{"".join(f" and {condition}" for condition in conditions)}
+		order by mr.transaction_date desc, mr.name desc
+		limit %(limit)s
+		""",
+		values,
+		as_dict=True,
+	)
+	frappe.cache().set_value(cache_key, page, expires_in_sec=OPEN_MATERIAL_REQUESTS_TTL)
+
+	return page
+
+
+def get_pending_material_request_items(material_requests, fields=None):
+	"""
+	{Material Request: [items still to be ordered]} for many Material Requests, from one query.
+
+	Items with ordered_qty < stock_qty are selected in SQL. `fields` must be
+	a subset of MATERIAL_REQUEST_ITEM_FIELDS; `name` is always returned.
+	"""
+	material_requests = list(dict.fromkeys(mr for mr in material_requests if mr))
+	if not material_requests:
+		return {}
+
+	fields = list(fields or DEFAULT_MATERIAL_REQUEST_ITEM_FIELDS)
+	invalid = [fieldname for fieldname in fields if fieldname not in MATERIAL_REQUEST_ITEM_FIELDS]
+	if invalid:
+		frappe.throw(f"Invalid Material Request Item fields: {', '.join(invalid)}")
+	if "name" not in fields:
+		fields.insert(0, "name")
+
+	mr_item = frappe.qb.DocType("Material Request Item")
+	rows = (
+		frappe.qb.from_(mr_item)
+		.select(mr_item.parent, *(mr_item[fieldname] for fieldname in fields))
+		.where(
+			mr_item.parent.isin(material_requests)
+			& (mr_item.stock_qty > 0)
+			& (mr_item.ordered_qty < mr_item.stock_qty)
+		)
+		.orderby(mr_item.parent)
+		.orderby(mr_item.idx)
+	).run(as_dict=True)
+
+	items = {mr: [] for mr in material_requests}
+	for row in rows:
+		items[row.pop("parent")].append(row)
+
+	return items
+
+
+def get_material_request_item_coverage(mr_items=None, material_request=None, gate_entry=None):
+	"""
+	{Material Request Item: row} with stock_qty and covered_qty, from one query.
+
+	Items are covered up to the larger of their ordered qty and the qty on
+	submitted Gate Entries other than `gate_entry`. Pass the item names or a
+	Material Request to read all of its items.
+	"""
+	if mr_items:
+		item_condition = "mr_item.name in %(mr_items)s"
+		gate_entry_condition = "gate_entry_item.material_request_item in %(mr_items)s"
+	elif material_request:
+		item_condition = "mr_item.parent = %(material_request)s"
+		gate_entry_condition = "gate_entry_item.material_request = %(material_request)s"
+	else:
+		return {}
+
+	rows = frappe.db.sql(
+		f"""
+		select
+			mr_item.name, mr_item.parent, mr_item.item_code, mr_item.stock_qty, mr_item.ordered_qty,
+			greatest(mr_item.ordered_qty, ifnull(gate_entry.qty, 0)) as covered_qty
+		from `tabMaterial Request Item` mr_item
+		left join (
+			select gate_entry_item.material_request_item, sum(gate_entry_item.qty) as qty
+			from `tabGate Entry Item` gate_entry_item
+			inner join `tabGate Entry` gate_entry on gate_entry.name = gate_entry_item.parent
+			where gate_entry.docstatus = 1
+				and gate_entry.name != %(gate_entry)s
+				and {gate_entry_condition}
+			group by gate_entry_item.material_request_item
+		) gate_entry on gate_entry.material_request_item = mr_item.name
+		where {item_condition}
+		""",
+		{"mr_items": list(mr_items or []), "material_request": material_request, "gate_entry": gate_entry or ""},
+		as_dict=True,
+	)
+
+	return {row.name: row for row in rows}
+
+
+def get_material_request_statuses(material_requests):
+	"""{Material Request: (current status, status derived from quantities)}"""
+	rows = frappe.db.sql(
+		"""
+		select
+			mr.name, mr.status,
+			sum(mr_item.stock_qty) as stock_qty,
+			sum(least(mr_item.stock_qty, greatest(mr_item.ordered_qty, ifnull(gate_entry.qty, 0)))) as covered_qty
+		from `tabMaterial Request` mr
+		inner join `tabMaterial Request Item` mr_item on mr_item.parent = mr.name
+		left join (
+			select gate_entry_item.material_request_item, sum(gate_entry_item.qty) as qty
+			from `tabGate Entry Item` gate_entry_item
+			inner join `tabGate Entry` gate_entry on gate_entry.name = gate_entry_item.parent
+			where gate_entry.docstatus = 1
+				and gate_entry_item.material_request in %(material_requests)s
+			group by gate_entry_item.material_request_item
+		) gate_entry on gate_entry.material_request_item = mr_item.name
+		where mr.name in %(material_requests)s
+			and mr.docstatus = 1
+			and mr.material_request_type = 'Purchase'
+			and mr.status in %(statuses)s
+		group by mr.name, mr.status
+		""",
+		{"material_requests": material_requests, "statuses": RECOMPUTED_STATUSES},
+		as_dict=True,
+	)
+
+	statuses = {}
+	for row in rows:
+		if flt(row.covered_qty) <= 0:
+			status = "Pending"
+		elif flt(row.covered_qty) >= flt(row.stock_qty):
+			status = "Ordered"
+		else:
+			status = "Partially Ordered"
+		statuses[row.name] = (row.status, status)
+
+	return statuses
+
+
+def update_material_request_statuses(material_requests):
+	"""Recompute the status of Purchase Material Requests and write the changes with one UPDATE per chunk"""
+	material_requests = list(dict.fromkeys(mr for mr in material_requests if mr))
+	changed = {}
+
+	for start in range(0, len(material_requests), STATUS_CHUNK_SIZE):
+		chunk = material_requests[start : start + STATUS_CHUNK_SIZE]
+		chunk_changes = {
+			name: status
+			for name, (current, status) in get_material_request_statuses(chunk).items()
+			if current != status
+		}
+		if not chunk_changes:
+			continue
+
+		values = []
+		for name, status in chunk_changes.items():
+			values.extend((name, status))
+
+		frappe.db.sql(
+			f"""
+			update `tabMaterial Request`
+			set
+				status = case name {" ".join(["when %s then %s"] * len(chunk_changes))} end,
+				modified = %s,
+				modified_by = %s
+			where name in ({", ".join(["%s"] * len(chunk_changes))})
+			""",
+			(*values, now(), frappe.session.user, *chunk_changes),
+		)
+		changed.update(chunk_changes)
+
+	if changed:
+		clear_open_material_requests_cache()
+
+	return changed
+
+
+@frappe.whitelist()
+def repair_material_request_statuses(enqueue=1):
+	"""
+	Recompute the status of every submitted Purchase Material Request.
+
+	For sites where statuses drifted from their quantities. Runs as a
+	background job by default.
+	"""
+	frappe.only_for("System Manager")
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.material_requests.process_material_request_status_repair",
+			queue="long",
+			timeout=6000,
+		)
+		return {"job_id": job.id if job else None}
+
+	return process_material_request_status_repair()
+
+
+def process_material_request_status_repair():
+	"""Walk Purchase Material Requests by name in chunks and fix their statuses"""
+	changed = {}
+	last_name = None
+	while True:
+		filters = {"docstatus": 1, "material_request_type": "Purchase", "status": ["in", RECOMPUTED_STATUSES]}
+		if last_name:
+			filters["name"] = [">", last_name]
+
+		names = frappe.get_all(
+			"Material Request", filters=filters, order_by="name asc", page_length=STATUS_CHUNK_SIZE, pluck="name"
+		)
+		if not names:
+			break
+
+		changed.update(update_material_request_statuses(names))
+		frappe.db.commit()
+		last_name = names[-1]
+
+	frappe.logger("erpnext_utils").info(f"[Material Requests] Status repaired on {len(changed)} Material Requests")
+
+	return {"updated": len(changed)}
+
+
+def clear_open_material_requests_cache(doc=None, method=None, *args):
+	frappe.cache().delete_keys(OPEN_MATERIAL_REQUESTS_KEY)
+
+
+def add_material_request_indexes():
+	frappe.db.add_index("Material Request", ["material_request_type", "docstatus", "company", "transaction_date", "name"])
@@ -0,0 +1,269 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Batch submission of Payment Entries for supplier payment runs.
+
+Inside `cheque_batch`, the Payment Entry cheque hooks (overrides/payment_entry.py)
+stop querying per document. Before any entry is submitted, the batch fetches
+the Bank Accounts and existing Cheque names of all entries with one query
+each. It locks every Cheque Book involved with one SELECT ... FOR UPDATE.
+Leaves are then checked and reserved in memory against the locked rows, so
+allocation stays consistent with concurrent workers. When the batch is
+flushed, the Cheque Book leaf sets are written once per book and all Cheques
+are inserted with one bulk INSERT.
+"""
+
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint, now
+
+from erpnext_utils.erpnext_utils.controllers.cheque_books import (
+	LeafSet,
+	cheque_number_to_int,
+	get_cheque_book_for_number,
+	lock_cheque_books,
+	update_cheque_book_leaves,
+)
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import add_cheques_to_summary
+from erpnext_utils.erpnext_utils.overrides.payment_entry import is_cheque_payment, make_cheque_context
+
+CHEQUE_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"cheque_number",
+	"cheque_book",
+	"bank_account",
+	"party_type",
+	"party",
+	"cheque_type",
+	"cheque_date",
+	"status",
+	"amount",
+	"reference_doctype",
+	"reference_name",
+)
+
+# Payment Entries submitted per transaction by the payment run job
+DEFAULT_CHUNK_SIZE = 100
+
+
+class ChequeBatch:
+	"""Cheque state of a batch of Payment Entries, shared through frappe.flags.cheque_batch"""
+
+	def __init__(self):
+		# Cheque Book name -> locked row with `used` / `voided` LeafSets
+		self.cheque_books = {}
+		# Existing and reserved Cheque names (Cheques are named by cheque number)
+		self.cheque_names = set()
+		# Payment Entry name -> (cheque_book, leaf, Cheque row values)
+		self.pending = {}
+
+	def prefetch(self, docs):
+		"""Resolve the cheque context of every cheque Payment Entry and lock their Cheque Books"""
+		cheque_docs = [doc for doc in docs if doc.reference_no and doc.paid_from and is_cheque_payment(doc)]
+		if not cheque_docs:
+			return
+
+		bank_accounts = dict(
+			frappe.get_all(
+				"Bank Account",
+				filters={"account": ["in", list({doc.paid_from for doc in cheque_docs})], "is_company_account": 1},
+				fields=["account", "name"],
+				as_list=True,
+			)
+		)
+
+		# Entries that cannot be resolved here are left to the per-document
+		# lookup, which raises the usual error for that entry only
+		for doc in cheque_docs:
+			bank_account = bank_accounts.get(doc.paid_from)
+			cheque_book = get_cheque_book_for_number(bank_account, doc.reference_no)
+			if cheque_book:
+				doc.flags.cheque_context = make_cheque_context(doc, bank_account, cheque_book)
+
+		cheque_books = {doc.flags.cheque_context.cheque_book for doc in cheque_docs if doc.flags.cheque_context}
+		for name, row in lock_cheque_books(cheque_books).items():
+			row.used = LeafSet.parse(row.used_leaves)
+			row.voided = LeafSet.parse(row.voided_leaves)
+			self.cheque_books[name] = row
+
+		self.cheque_names = set(
+			frappe.get_all(
+				"Cheque",
+				filters={"name": ["in", list({doc.reference_no for doc in cheque_docs})]},
+				pluck="name",
+			)
+		)
+
+	def has_cheque_book(self, cheque_book):
+		return cheque_book in self.cheque_books
+
+	def is_leaf_used(self, cheque_book, cheque_number):
+		row = self.cheque_books[cheque_book]
+		number = cheque_number_to_int(cheque_number)
+		return number in row.used or number in row.voided
+
+	def add_cheque(self, doc, cheque_book, values):
+		"""Reserve the leaf of a Payment Entry and queue its Cheque for the bulk insert"""
+		row = self.cheque_books[cheque_book]
+		number = cheque_number_to_int(values["cheque_number"])
+
+		if number in row.used or number in row.voided:
+			frappe.throw(f"Cheque number '{values['cheque_number']}' is already used in cheque book '{cheque_book}'")
+		if values["cheque_number"] in self.cheque_names:
+			frappe.throw(f"Cheque {values['cheque_number']} already exists", frappe.DuplicateEntryError)
+
+		row.used.add(number)
+		self.cheque_names.add(values["cheque_number"])
+		self.pending[doc.name] = (cheque_book, number, values)
+
+	def discard(self, doc):
+		"""Release the reservation of a Payment Entry whose submission was rolled back"""
+		if doc.name not in self.pending:
+			return
+
+		cheque_book, number, values = self.pending.pop(doc.name)
+		self.cheque_books[cheque_book].used.remove(number)
+		self.cheque_names.discard(values["cheque_number"])
+
+	def flush(self):
+		"""Write the leaf sets once per Cheque Book and insert all pending Cheques"""
+		if not self.pending:
+			return
+
+		for name in {cheque_book for cheque_book, _number, _values in self.pending.values()}:
+			row = self.cheque_books[name]
+			update_cheque_book_leaves(row, row.used, row.voided)
+
+		timestamp = now()
+		user = frappe.session.user
+		frappe.db.bulk_insert(
+			"Cheque",
+			CHEQUE_FIELDS,
+			[
+				(values["cheque_number"], timestamp, timestamp, user, user, 0)
+				+ tuple(values.get(field) for field in CHEQUE_FIELDS[6:])
+				for _cheque_book, _number, values in self.pending.values()
+			],
+		)
+		add_cheques_to_summary([values for _cheque_book, _number, values in self.pending.values()])
+		self.pending = {}
+
+
+@contextmanager
+def cheque_batch(docs):
+	"""
+	Batch the cheque hooks of the given Payment Entries.
+
+	Submit the entries inside the block. The Cheque Book rows stay locked
+	until the caller commits.
+	"""
+	batch = ChequeBatch()
+	batch.prefetch(docs)
+	frappe.flags.cheque_batch = batch
+	try:
+		yield batch
+		batch.flush()
+	finally:
+		frappe.flags.cheque_batch = None
+
+
+@frappe.whitelist()
+def submit_payment_entries(names, enqueue=1, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	Submit the draft Payment Entries of a payment run.
+
+	:param names: List (or JSON list) of Payment Entry names.
+	:param enqueue: Run as a background job (default); the summary is
+		published on the `payment_run_complete` realtime event.
+	:param chunk_size: Payment Entries submitted per transaction.
+	"""
+	names = frappe.parse_json(names) if isinstance(names, str) else names
+	frappe.has_permission("Payment Entry", "submit", throw=True)
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.payment_runs.process_payment_entry_submission",
+			queue="long",
+			timeout=6000,
+			names=names,
+			chunk_size=chunk_size,
+			user=frappe.session.user,
+		)
+		return {"job_id": job.id if job else None}
+
+	return process_payment_entry_submission(names, chunk_size)
+
+
+def process_payment_entry_submission(names, chunk_size=DEFAULT_CHUNK_SIZE, user=None):
+	"""
+	Submit Payment Entries in chunks, one transaction per chunk.
+
+	Each entry is submitted under a savepoint. A failed entry is rolled back
+	and its cheque reservation is released; the rest of the chunk carries on.
+	If the chunk's cheque locking or bulk Cheque insert fails, the whole chunk
+	is rolled back, logged and reported as failed, and the run continues with
+	the next chunk, so the summary is always returned and published.
+	"""
+	chunk_size = cint(chunk_size) or DEFAULT_CHUNK_SIZE
+	summary = frappe._dict(submitted=[], failed=[])
+
+	for start in range(0, len(names), chunk_size):
+		docs = []
+		for name in names[start : start + chunk_size]:
+			try:
+				docs.append(frappe.get_doc("Payment Entry", name))
+			except Exception as e:
+				add_failure(summary, name, e)
+
+		chunk_submitted = []
+		chunk_failed = set()
+		try:
+			with cheque_batch(docs) as batch:
+				for doc in docs:
+					frappe.db.savepoint("payment_run")
+					try:
+						doc.submit()
+					except Exception as e:
+						frappe.db.rollback(save_point="payment_run")
+						batch.discard(doc)
+						add_failure(summary, doc.name, e)
+						chunk_failed.add(doc.name)
+						continue
+
+					chunk_submitted.append(doc.name)
+		except Exception as e:
+			# Locking or the final Cheque insert failed: the chunk's submissions
+			# are rolled back with it, the other chunks carry on
+			frappe.db.rollback()
+			frappe.log_error(
+				title=f"Payment Run: chunk of {len(docs)} Payment Entries rolled back",
+				message=f"{', '.join(doc.name for doc in docs)}\n\n{frappe.get_traceback()}",
+			)
+			for doc in docs:
+				if doc.name not in chunk_failed:
+					add_failure(summary, doc.name, e)
+			continue
+
+		summary.submitted.extend(chunk_submitted)
+		frappe.db.commit()
+
+	frappe.logger("erpnext_utils").info(
+		f"[Payment Run] {len(summary.submitted)} Payment Entries submitted, {len(summary.failed)} failed"
+	)
+
+	if user:
+		frappe.publish_realtime("payment_run_complete", summary, user=user)
+
+	return summary
+
+
+def add_failure(summary, name, error):
+	summary.failed.append({"name": name, "error": frappe.utils.strip_html(str(error)) or error.__class__.__name__})
+	frappe.clear_messages()
@@ -0,0 +1,208 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Maturity processing for post dated cheques.
+
+Bank vouchers with a future cheque date post against the Voucher Settings
+post dated cheque account and create their Cheque with status "Post Dated".
+Once the cheque date arrives, the daily job moves the balance from the PDC
+account to the voucher's bank account and sets the cheque to "Unpresented".
+
+Cheques are processed in batches on the (status, cheque_date) index. Each
+batch is read with a row lock, then posts its GL Entries and flips the cheque
+statuses in one transaction, so overlapping runs cannot mature a cheque
+twice and the job can be re-run after an interruption. A cheque whose GL
+Entries fail validation (closed fiscal year, frozen date, disabled account
+...) is logged and skipped without holding up the rest of the batch.
+"""
+
+import frappe
+from frappe.utils import now, today
+
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import update_summary_for_status_change
+from erpnext_utils.erpnext_utils.controllers.gl_map import GLMapEntry
+from erpnext_utils.erpnext_utils.controllers.gl_posting import bulk_insert_gl_entries, validate_gl_map
+from erpnext_utils.erpnext_utils.controllers.settings_cache import get_company_default_cost_center
+from erpnext_utils.erpnext_utils.controllers.voucher_controller import get_post_dated_cheque_account
+
+MATURITY_BATCH_SIZE = 500
+
+
+def process_matured_post_dated_cheques(as_on_date=None):
+	"""Scheduler (daily): reclassify every post dated cheque dated on or before today"""
+	as_on_date = as_on_date or today()
+	post_dated_account = None
+	last_key = None
+	processed = 0
+
+	while True:
+		cheques = get_matured_cheques(as_on_date, last_key)
+		if not cheques:
+			break
+
+		post_dated_account = post_dated_account or get_post_dated_cheque_account()
+		last_key = (cheques[-1].cheque_date, cheques[-1].name)
+		processed += reclassify_cheques(cheques, post_dated_account)
+		frappe.db.commit()
+
+	if processed:
+		frappe.logger("erpnext_utils").info(f"[PDC Maturity] Reclassified {processed} post dated cheques as on {as_on_date}")
+
+	return processed
+
+
+def get_matured_cheques(as_on_date, last_key=None):
+	"""
+	Next batch of matured post dated cheques, keyset-paginated on (cheque_date, name).
+
+	The rows stay locked until the batch commits; a concurrent run waits and
+	then no longer sees them as Post Dated.
+	"""
+	cheque = frappe.qb.DocType("Cheque")
+	query = (
+		frappe.qb.from_(cheque)
+		.select(
+			cheque.name,
+			cheque.cheque_number,
+			cheque.cheque_date,
+			cheque.cheque_type,
+			cheque.status,
+			cheque.bank_account,
+			cheque.cheque_book,
+			cheque.amount,
+			cheque.reference_doctype,
+			cheque.reference_name,
+		)
+		.where((cheque.status == "Post Dated") & (cheque.cheque_date <= as_on_date))
+		.orderby(cheque.cheque_date)
+		.orderby(cheque.name)
+		.limit(MATURITY_BATCH_SIZE)
+		.for_update()
+	)
+
+	if last_key:
+		last_date, last_name = last_key
+		query = query.where(
+			(cheque.cheque_date > last_date) | ((cheque.cheque_date == last_date) & (cheque.name > last_name))
+		)
+
+	return query.run(as_dict=True)
+
+
+def reclassify_cheques(cheques, post_dated_account):
+	"""Post the maturity GL Entries of a batch and mark its cheques Unpresented"""
+	vouchers = get_reference_vouchers(cheques)
+
+	gl_maps = {}
+	cheques_by_name = {}
+
+	for cheque in cheques:
+		voucher = vouchers.get((cheque.reference_doctype, cheque.reference_name))
+		if not voucher or voucher.docstatus != 1 or not voucher.gl_bank_account:
+			frappe.logger("erpnext_utils").warning(
+				f"[PDC Maturity] Skipping cheque {cheque.name}: no submitted voucher with a bank account"
+			)
+			continue
+
+		# Issued: Dr PDC / Cr bank. Received: Dr bank / Cr PDC.
+		if cheque.cheque_type == "Received":
+			debit_account, credit_account = voucher.gl_bank_account, post_dated_account
+		else:
+			debit_account, credit_account = post_dated_account, voucher.gl_bank_account
+
+		common = dict(
+			posting_date=cheque.cheque_date,
+			cost_center=voucher.cost_center or get_company_default_cost_center(voucher.company),
+			company=voucher.company,
+			voucher_type=cheque.reference_doctype,
+			voucher_no=cheque.reference_name,
+			voucher_subtype=cheque.reference_doctype,
+			remarks=f"Post Dated Cheque #{cheque.cheque_number} matured on {cheque.cheque_date}",
+		)
+
+		gl_maps[cheque.name] = (
+			voucher.company,
+			[
+				GLMapEntry(account=debit_account, debit=cheque.amount, against=credit_account, **common),
+				GLMapEntry(account=credit_account, credit=cheque.amount, against=debit_account, **common),
+			],
+		)
+		cheques_by_name[cheque.name] = cheque
+
+	valid = validate_maturity_gl_maps(gl_maps)
+	if not valid:
+		return 0
+
+	# The batch was read "for update", so every valid cheque is still Post Dated
+	# and owned by this run until it commits.
+	matured = [cheques_by_name[name] for name in valid]
+
+	cheque_table = frappe.qb.DocType("Cheque")
+	(
+		frappe.qb.update(cheque_table)
+		.set(cheque_table.status, "Unpresented")
+		.set(cheque_table.modified, now())
+		.set(cheque_table.modified_by, frappe.session.user)
+		.where(cheque_table.name.isin(valid) & (cheque_table.status == "Post Dated"))
+	).run()
+
+	bulk_insert_gl_entries([entry for name in valid for entry in gl_maps[name][1]])
+	update_summary_for_status_change(matured, "Unpresented")
+
+	return len(matured)
+
+
+def validate_maturity_gl_maps(gl_maps):
+	"""
+	Validate {cheque: (company, GL map)} and return the cheques that passed.
+
+	Each company's entries are validated together; when that fails, its
+	cheques are validated one by one so a single bad cheque is logged and
+	skipped instead of failing the batch.
+	"""
+	cheques_by_company = {}
+	for cheque_name, (company, _gl_map) in gl_maps.items():
+		cheques_by_company.setdefault(company, []).append(cheque_name)
+
+	valid = []
+	for company, cheque_names in cheques_by_company.items():
+		try:
+			validate_gl_map([entry for name in cheque_names for entry in gl_maps[name][1]], company)
+		except Exception:
+			frappe.clear_messages()
+		else:
+			valid.extend(cheque_names)
+			continue
+
+		for name in cheque_names:
+			try:
+				validate_gl_map(gl_maps[name][1], company)
+			except Exception:
+				frappe.clear_messages()
+				frappe.log_error(
+					title=f"PDC Maturity: cheque {name} skipped", reference_doctype="Cheque", reference_name=name
+				)
+				continue
+			valid.append(name)
+
+	return valid
+
+
+def get_reference_vouchers(cheques):
+	"""Fetch the vouchers behind a batch of cheques with one query per voucher doctype"""
+	names_by_doctype = {}
+	for cheque in cheques:
+		if cheque.reference_doctype and cheque.reference_name:
+			names_by_doctype.setdefault(cheque.reference_doctype, set()).add(cheque.reference_name)
+
+	vouchers = {}
+	for doctype, names in names_by_doctype.items():
+		for voucher in frappe.get_all(
+			doctype,
+			filters={"name": ["in", list(names)]},
+			fields=["name", "docstatus", "company", "gl_bank_account", "cost_center"],
+		):
+			vouchers[(doctype, voucher.name)] = voucher
+
+	return vouchers
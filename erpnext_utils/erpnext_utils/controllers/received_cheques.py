@@ -0,0 +1,86 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Duplicate detection for received cheques.
+
+A received cheque is a duplicate when a Cheque that is not Cancelled exists
+with the same (cheque_number, bank, party_type, party). Lookups go through
+the composite Cheque index on those fields. Many keys are checked with one
+query, and results are memoised for the rest of the request, so a batch of
+deposits validated together costs one query.
+"""
+
+import frappe
+
+
+def get_received_cheque_key(cheque_number, bank, party_type, party):
+	return (str(cheque_number or "").strip(), bank or None, party_type or None, party or None)
+
+
+def find_received_cheques(keys):
+	"""{key: existing Cheque name} for the keys that are already received"""
+	if frappe.flags.erpnext_utils_received_cheques is None:
+		frappe.flags.erpnext_utils_received_cheques = {}
+
+	memo = frappe.flags.erpnext_utils_received_cheques
+	missing = {key for key in keys if key not in memo}
+
+	if missing:
+		found = {}
+		for row in frappe.get_all(
+			"Cheque",
+			filters={"cheque_number": ["in", list({key[0] for key in missing})], "status": ["!=", "Cancelled"]},
+			fields=["name", "cheque_number", "bank", "party_type", "party"],
+		):
+			found[get_received_cheque_key(row.cheque_number, row.bank, row.party_type, row.party)] = row.name
+
+		for key in missing:
+			memo[key] = found.get(key)
+
+	return {key: memo[key] for key in keys if memo.get(key)}
+
+
+def remember_received_cheque(key, cheque_name):
+	"""Record a Cheque created in this request so later checks see it without a query"""
+	if frappe.flags.erpnext_utils_received_cheques is not None:
+		frappe.flags.erpnext_utils_received_cheques[key] = cheque_name
+
+
+def clear_received_cheques_memo():
+	frappe.flags.erpnext_utils_received_cheques = None
+
+
+@frappe.whitelist()
+def check_received_cheques(cheques):
+	"""
+	Check a batch of incoming cheques for duplicates with one query.
+
+	:param cheques: List (or JSON list) of dicts with cheque_number, bank,
+		party_type and party.
+	:return: One dict per input cheque, in order, with `duplicate_of` (the
+		existing Cheque) and `repeated_at` (1-based position of an earlier
+		identical cheque in the batch), each None when not applicable.
+	"""
+	cheques = frappe.parse_json(cheques) if isinstance(cheques, str) else cheques
+	frappe.has_permission("Cheque", "read", throw=True)
+
+	keys = [
+		get_received_cheque_key(cheque.get("cheque_number"), cheque.get("bank"), cheque.get("party_type"), cheque.get("party"))
+		for cheque in cheques
+	]
+	existing = find_received_cheques(keys)
+
+	first_seen = {}
+	results = []
+	for idx, key in enumerate(keys, 1):
+		results.append(
+			{
+				"cheque_number": key[0],
+				"duplicate_of": existing.get(key),
+				"repeated_at": first_seen.get(key),
+			}
+		)
+		first_seen.setdefault(key, idx)
+
+	return results
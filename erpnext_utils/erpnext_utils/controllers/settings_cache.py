@@ -0,0 +1,113 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Cache for static configuration read while posting vouchers.
+
+Values are memoised per request in frappe.flags and shared across workers
+through the site's redis cache. Saving a Company, Mode of Payment or Voucher
+Settings clears the corresponding entries (see doc_events in hooks.py and
+VoucherSettings.on_update).
+"""
+
+import frappe
+
+COMPANY_DEFAULTS_KEY = "erpnext_utils:company_defaults"
+VOUCHER_SETTINGS_KEY = "erpnext_utils:voucher_settings"
+CHEQUE_MODES_KEY = "erpnext_utils:cheque_modes_of_payment"
+
+COMPANY_DEFAULT_FIELDS = ("abbr", "cost_center", "default_currency")
+VOUCHER_SETTINGS_FIELDS = (
+	"default_post_dated_cheque_account",
+	"default_post_dated_cheque",
+	"default_bank_payment_account",
+	"queue_submission_above_rows",
+	"cheque_book_burn_rate_days",
+	"cheque_book_warning_days",
+)
+
+
+def get_company_defaults(company):
+	"""Return abbr, cost_center and default_currency of a company"""
+	if not company:
+		return frappe._dict()
+
+	if frappe.flags.erpnext_utils_company_defaults is None:
+		frappe.flags.erpnext_utils_company_defaults = {}
+
+	request_cache = frappe.flags.erpnext_utils_company_defaults
+	if company not in request_cache:
+		defaults = frappe.cache().hget(COMPANY_DEFAULTS_KEY, company)
+		if defaults is None:
+			defaults = frappe.db.get_value("Company", company, COMPANY_DEFAULT_FIELDS, as_dict=True) or {}
+			frappe.cache().hset(COMPANY_DEFAULTS_KEY, company, defaults)
+
+		request_cache[company] = frappe._dict(defaults)
+
+	return request_cache[company]
+
+
+def get_company_abbr(company):
+	return get_company_defaults(company).get("abbr")
+
+
+def get_company_default_cost_center(company):
+	return get_company_defaults(company).get("cost_center")
+
+
+def get_voucher_settings():
+	"""Return the Voucher Settings values without loading the Single document"""
+	if frappe.flags.erpnext_utils_voucher_settings is None:
+		settings = frappe.cache().get_value(VOUCHER_SETTINGS_KEY)
+		if settings is None:
+			settings = {
+				fieldname: frappe.db.get_single_value("Voucher Settings", fieldname)
+				for fieldname in VOUCHER_SETTINGS_FIELDS
+			}
+			frappe.cache().set_value(VOUCHER_SETTINGS_KEY, settings)
+
+		frappe.flags.erpnext_utils_voucher_settings = frappe._dict(settings)
+
+	return frappe.flags.erpnext_utils_voucher_settings
+
+
+def is_cheque_mode_of_payment(mode_of_payment):
+	"""Whether a Mode of Payment is a cheque mode, i.e. its name contains "cheque" or "check" """
+	if not mode_of_payment:
+		return False
+
+	if frappe.flags.erpnext_utils_cheque_modes is None:
+		frappe.flags.erpnext_utils_cheque_modes = {}
+
+	request_cache = frappe.flags.erpnext_utils_cheque_modes
+	if mode_of_payment not in request_cache:
+		is_cheque = frappe.cache().hget(CHEQUE_MODES_KEY, mode_of_payment)
+		if is_cheque is None:
+			mode_name = (frappe.db.get_value("Mode of Payment", mode_of_payment, "name") or "").lower()
+			is_cheque = "cheque" in mode_name or "check" in mode_name
+			frappe.cache().hset(CHEQUE_MODES_KEY, mode_of_payment, is_cheque)
+
+		request_cache[mode_of_payment] = is_cheque
+
+	return request_cache[mode_of_payment]
+
+
+def clear_company_defaults_cache(doc=None, method=None):
+	"""doc_events hook: Company on_update / on_trash"""
+	if doc:
+		frappe.cache().hdel(COMPANY_DEFAULTS_KEY, doc.name)
+	else:
+		frappe.cache().delete_value(COMPANY_DEFAULTS_KEY)
+
+	frappe.flags.erpnext_utils_company_defaults = None
+
+
+def clear_voucher_settings_cache(doc=None, method=None):
+	frappe.cache().delete_value(VOUCHER_SETTINGS_KEY)
+	frappe.flags.erpnext_utils_voucher_settings = None
+
+
+def clear_cheque_modes_cache(doc=None, method=None, *args):
+	"""doc_events hook: Mode of Payment on_update / on_trash / after_rename"""
+	frappe.cache().delete_value(CHEQUE_MODES_KEY)
+	frappe.flags.erpnext_utils_cheque_modes = None
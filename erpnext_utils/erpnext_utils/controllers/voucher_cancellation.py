@@ -0,0 +1,295 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Cancellation and GL reversal for vouchers.
+
+All active GL Entries of the cancelled vouchers are read with one query on
+(voucher_type, voucher_no), marked cancelled with one UPDATE and reversed
+with one bulk INSERT. This covers the normal entries, the post dated cheque
+entries and any PDC maturity reclassification posted under the voucher.
+Linked Cheque records are cancelled in the same transaction.
+"""
+
+import frappe
+from frappe.utils import cint, flt, now
+
+from erpnext_utils.erpnext_utils.controllers.cheque_books import get_cheque_book_for_number, void_cheque_leaves
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import update_summary_for_status_change
+from erpnext_utils.erpnext_utils.controllers.gl_map import GLMapEntry
+from erpnext_utils.erpnext_utils.controllers.gl_posting import bulk_insert_gl_entries
+from erpnext_utils.erpnext_utils.controllers.received_cheques import clear_received_cheques_memo
+from erpnext_utils.erpnext_utils.controllers.voucher_controller import VOUCHER_GL_TYPES
+
+# Vouchers cancelled per transaction by the batch job
+CANCELLATION_CHUNK_SIZE = 200
+
+
+def cancel_voucher(doc):
+	"""on_cancel of the voucher doctypes"""
+	# GL Entries are reversed here; they must not block the cancellation
+	doc.ignore_linked_doctypes = ("GL Entry",)
+
+	if not doc.flags.skip_gl_reversal:
+		make_reverse_gl_entries(doc.doctype, [doc.name])
+	if not doc.flags.skip_cheque_cancellation:
+		cancel_linked_cheques(doc.doctype, [doc])
+
+
+def make_reverse_gl_entries(voucher_type, voucher_nos):
+	"""
+	Reverse every active GL Entry of the given vouchers in bulk.
+
+	:return: Names of the reversing GL Entries.
+	"""
+	if not voucher_nos:
+		return []
+
+	gl_entries = frappe.get_all(
+		"GL Entry",
+		filters={"voucher_type": voucher_type, "voucher_no": ["in", voucher_nos], "is_cancelled": 0},
+		fields=[
+			"posting_date",
+			"transaction_date",
+			"fiscal_year",
+			"account",
+			"account_currency",
+			"debit",
+			"credit",
+			"debit_in_account_currency",
+			"credit_in_account_currency",
+			"cost_center",
+			"party_type",
+			"party",
+			"company",
+			"voucher_type",
+			"voucher_no",
+			"voucher_subtype",
+			"against",
+		],
+	)
+	if not gl_entries:
+		return []
+
+	reverse_gl_map = [
+		GLMapEntry(
+			**{
+				**gle,
+				"debit": gle.credit,
+				"credit": gle.debit,
+				"debit_in_account_currency": gle.credit_in_account_currency,
+				"credit_in_account_currency": gle.debit_in_account_currency,
+				"remarks": f"On cancellation of {gle.voucher_no}",
+				"is_cancelled": 1,
+			}
+		)
+		for gle in gl_entries
+	]
+
+	gle = frappe.qb.DocType("GL Entry")
+	(
+		frappe.qb.update(gle)
+		.set(gle.is_cancelled, 1)
+		.set(gle.modified, now())
+		.set(gle.modified_by, frappe.session.user)
+		.where(
+			(gle.voucher_type == voucher_type) & (gle.voucher_no.isin(voucher_nos)) & (gle.is_cancelled == 0)
+		)
+	).run()
+
+	return bulk_insert_gl_entries(reverse_gl_map)
+
+
+def cancel_linked_cheques(reference_doctype, docs):
+	"""
+	Cancel the Cheque records created by the given documents.
+
+	Cheques are found by their reference. Cheques created before references
+	were stored are matched per document (see find_legacy_cheques). Leaves of
+	issued cheques are voided in their Cheque Book so they are not reissued.
+	"""
+	if not docs:
+		return
+
+	cheque = frappe.qb.DocType("Cheque")
+	condition = (cheque.reference_doctype == reference_doctype) & (
+		cheque.reference_name.isin([doc.name for doc in docs])
+	)
+
+	legacy_cheques = find_legacy_cheques(docs)
+	if legacy_cheques:
+		condition = condition | cheque.name.isin(legacy_cheques)
+
+	condition = condition & (cheque.status != "Cancelled")
+
+	cheques = (
+		frappe.qb.from_(cheque)
+		.select(
+			cheque.cheque_number,
+			cheque.cheque_book,
+			cheque.bank_account,
+			cheque.cheque_type,
+			cheque.status,
+			cheque.cheque_date,
+			cheque.amount,
+		)
+		.where(condition)
+	).run(as_dict=True)
+	if not cheques:
+		return
+
+	leaves_by_book = {}
+	for row in cheques:
+		if row.cheque_type == "Issued" and row.cheque_book:
+			leaves_by_book.setdefault(row.cheque_book, []).append(row.cheque_number)
+
+	for cheque_book, cheque_numbers in leaves_by_book.items():
+		void_cheque_leaves(cheque_book, cheque_numbers)
+
+	(
+		frappe.qb.update(cheque)
+		.set(cheque.status, "Cancelled")
+		.set(cheque.modified, now())
+		.set(cheque.modified_by, frappe.session.user)
+		.where(condition)
+	).run()
+
+	update_summary_for_status_change(cheques, "Cancelled")
+	clear_received_cheques_memo()
+
+
+def get_legacy_cheque_criteria(doc, cheque_book=None):
+	"""
+	Fields a Cheque without a reference must match to belong to a voucher.
+
+	Issued cheques match on the voucher's bank account or cheque book,
+	received cheques on the drawee bank and the party; both on the amount.
+	"""
+	if doc.get("instrument_type") != "Cheque" or not doc.get("cheque_number"):
+		return None
+
+	criteria = frappe._dict(cheque_number=str(doc.cheque_number).strip(), amount=flt(doc.total_payment, 2))
+	if doc.doctype == "Bank Payment Voucher":
+		criteria.update(cheque_type="Issued", bank_account=doc.voucher_account, cheque_book=cheque_book)
+	elif doc.doctype == "Bank Receipt Voucher":
+		criteria.update(cheque_type="Received", bank=doc.bank, party_type=doc.party_type, party=doc.received_from)
+	else:
+		return None
+
+	return criteria
+
+
+def matches_legacy_cheque(criteria, row):
+	if (
+		str(row.cheque_number).strip() != criteria.cheque_number
+		or row.cheque_type != criteria.cheque_type
+		or flt(row.amount, 2) != criteria.amount
+	):
+		return False
+
+	if criteria.cheque_type == "Issued":
+		return bool(
+			(criteria.bank_account and row.bank_account == criteria.bank_account)
+			or (criteria.cheque_book and row.cheque_book == criteria.cheque_book)
+		)
+
+	return (row.bank or None, row.party_type or None, row.party or None) == (
+		criteria.bank or None,
+		criteria.party_type or None,
+		criteria.party or None,
+	)
+
+
+def find_legacy_cheques(docs):
+	"""Names of the unreferenced Cheques matching the given vouchers, from one query"""
+	criteria = []
+	for doc in docs:
+		cheque_book = None
+		if doc.doctype == "Bank Payment Voucher":
+			cheque_book = get_cheque_book_for_number(doc.get("voucher_account"), doc.get("cheque_number"))
+
+		doc_criteria = get_legacy_cheque_criteria(doc, cheque_book)
+		if doc_criteria:
+			criteria.append(doc_criteria)
+
+	if not criteria:
+		return []
+
+	candidates = frappe.get_all(
+		"Cheque",
+		filters={
+			"cheque_number": ["in", list({row.cheque_number for row in criteria})],
+			"reference_name": ["is", "not set"],
+			"status": ["!=", "Cancelled"],
+		},
+		fields=["name", "cheque_number", "cheque_type", "cheque_book", "bank_account", "bank", "party_type", "party", "amount"],
+	)
+
+	return [row.name for row in candidates if any(matches_legacy_cheque(doc_criteria, row) for doc_criteria in criteria)]
+
+
+@frappe.whitelist()
+def cancel_vouchers(doctype, names, enqueue=1):
+	"""
+	Cancel many vouchers of one doctype, e.g. a bad import.
+
+	:param names: List (or JSON list) of voucher names.
+	:param enqueue: Run as a background job (default).
+	"""
+	if doctype not in VOUCHER_GL_TYPES:
+		frappe.throw(f"Bulk cancellation is not available for {doctype}")
+
+	names = frappe.parse_json(names) if isinstance(names, str) else names
+	frappe.has_permission(doctype, "cancel", throw=True)
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.voucher_cancellation.process_voucher_cancellation",
+			queue="long",
+			timeout=6000,
+			doctype=doctype,
+			names=names,
+			user=frappe.session.user,
+		)
+		return {"job_id": job.id if job else None}
+
+	return process_voucher_cancellation(doctype, names)
+
+
+def process_voucher_cancellation(doctype, names, user=None):
+	"""
+	Cancel vouchers in chunks.
+
+	Each voucher is cancelled under a savepoint without its own GL reversal;
+	the GL Entries and Cheques of the whole chunk are then reversed and
+	cancelled in bulk before the chunk commits.
+	"""
+	summary = frappe._dict(cancelled=[], failed=[])
+
+	for start in range(0, len(names), CANCELLATION_CHUNK_SIZE):
+		cancelled_docs = []
+		for name in names[start : start + CANCELLATION_CHUNK_SIZE]:
+			frappe.db.savepoint("voucher_cancellation")
+			try:
+				doc = frappe.get_doc(doctype, name)
+				doc.flags.skip_gl_reversal = True
+				doc.flags.skip_cheque_cancellation = True
+				doc.cancel()
+			except Exception as e:
+				frappe.db.rollback(save_point="voucher_cancellation")
+				summary.failed.append({"name": name, "error": frappe.utils.strip_html(str(e))})
+				frappe.clear_messages()
+				continue
+
+			cancelled_docs.append(doc)
+
+		make_reverse_gl_entries(doctype, [doc.name for doc in cancelled_docs])
+		cancel_linked_cheques(doctype, cancelled_docs)
+		frappe.db.commit()
+
+		summary.cancelled.extend(doc.name for doc in cancelled_docs)
+
+	if user:
+		frappe.publish_realtime("voucher_cancellation_complete", summary, user=user)
+
+	return summary
@@ -1,6 +1,9 @@
 import frappe
-from frappe.utils import nowdate,flt
-from erpnext import get_default_cost_center
+from frappe.utils import cint,nowdate,flt,today
+from erpnext_utils.erpnext_utils.controllers.gl_map import build_gl_map
+from erpnext_utils.erpnext_utils.controllers.gl_posting import get_account_details, make_gl_entries
+from erpnext_utils.erpnext_utils.controllers.settings_cache import (get_company_default_cost_center,
+    get_voucher_settings)
 
 
 def get_voucher_accounts_total(doc):
@@ -18,6 +21,15 @@ def get_against_account_str(accounts):
     against_account = ",".join(acc.account for acc in accounts)
         
     
+# Voucher doctype -> voucher_type understood by build_gl_map
+VOUCHER_GL_TYPES = {
+    "Cash Payment Voucher": "Payment",
+    "Cash Receipt Voucher": "Receipt",
+    "Bank Payment Voucher": "Bank Payment",
+    "Bank Receipt Voucher": "Bank Receipt",
+}
+
+
 def create_gl_entries(
     posting_date,
     accounts,
@@ -29,282 +41,130 @@ def create_gl_entries(
 ):
     """
     Create GL Entries in ERPNext.
+
+    The GL map for the whole voucher is built by `build_gl_map` and then
+    validated and written in one batch by `make_gl_entries`.
     """
+    gl_map = build_gl_map(posting_date, accounts, company, voucher_type,
+                          voucher_account, voucher_doctype, voucher_no)
+
+    return make_gl_entries(gl_map, company, f"{voucher_doctype or voucher_type} {voucher_no}")
+
+
+def is_post_dated_cheque(doc):
+    """Cheque vouchers dated after today are parked on the post dated cheque account"""
+    return bool(doc.get("instrument_type") == "Cheque" and doc.get("cheque_date")
+                and str(doc.cheque_date) > today())
 
-    gl_entries = []
-
-    if voucher_type == "Payment":
-        total_amount = sum(acc.get("amount", 0) for acc in accounts)
-
-        for acc in accounts:
-            if acc.get("amount", 0) > 0:
-                gl_entry = frappe.new_doc("GL Entry")
-                gl_entry.posting_date = posting_date or nowdate()
-                gl_entry.account = acc.account
-                gl_entry.debit = acc.get("amount", 0)  # For payment: amount = debit
-                gl_entry.debit_in_account_currency = acc.get("amount", 0) 
-                gl_entry.credit = 0
-                gl_entry.cost_center = acc.get("cost_center", get_default_cost_center(company))
-                gl_entry.party_type = acc.get("party_type")
-                gl_entry.party = acc.get("party")
-                gl_entry.company = company
-                gl_entry.voucher_type = voucher_doctype or acc.get("voucher_type", voucher_type)
-                gl_entry.voucher_no = voucher_no or acc.get("voucher_no")
-                gl_entry.voucher_subtype = voucher_doctype
-                gl_entry.against = voucher_account
-
-                try:
-                    gl_entry.flags.ignore_permissions = 1
-                    gl_entry.insert()
-                    gl_entries.append(gl_entry)
-                except Exception as e:
-                    frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-        
-        if voucher_account:
-            # Get against accounts for cash account GL entry
-            against_accounts = ",".join(acc.account for acc in accounts if acc.get("amount", 0) > 0)
-            
-            # Get cost center from first account row if available, otherwise use default
-            voucher_cost_center = None
-            if accounts and accounts[0].get("cost_center"):
-                voucher_cost_center = accounts[0].get("cost_center")
-            else:
-                voucher_cost_center = get_default_cost_center(company)
-            
-            gl_entry = frappe.new_doc("GL Entry")
-            gl_entry.posting_date = posting_date or nowdate()
-            gl_entry.account = voucher_account
-            gl_entry.debit = 0
-            gl_entry.credit = total_amount  # For payment: cash account is credited
-            gl_entry.credit_in_account_currency = total_amount
-            gl_entry.cost_center = voucher_cost_center
-            gl_entry.party_type = None
-            gl_entry.party = None
-            gl_entry.company = company
-            gl_entry.voucher_type = voucher_doctype or voucher_type
-            gl_entry.voucher_no = voucher_no
-            gl_entry.voucher_subtype = voucher_doctype
-            gl_entry.against = against_accounts
-
-            try:
-                gl_entry.flags.ignore_permissions = 1
-                gl_entry.insert()
-                gl_entries.append(gl_entry)
-            except Exception as e:
-                frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-
-    elif voucher_type == "Receipt":
-        total_amount = sum(acc.get("amount", 0) for acc in accounts)
-
-        for acc in accounts:
-            if acc.get("amount", 0) > 0:
-                gl_entry = frappe.new_doc("GL Entry")
-                gl_entry.posting_date = posting_date or nowdate()
-                gl_entry.account = acc.account
-                gl_entry.debit = 0
-                gl_entry.credit = acc.get("amount", 0)  # For receipt: amount = credit
-                gl_entry.credit_in_account_currency = acc.get("amount", 0)
-                gl_entry.cost_center = acc.get("cost_center", get_default_cost_center(company))
-                gl_entry.party_type = acc.get("party_type")
-                gl_entry.party = acc.get("party")
-                gl_entry.company = company
-                gl_entry.voucher_type = voucher_doctype or acc.get("voucher_type", voucher_type)
-                gl_entry.voucher_no = voucher_no or acc.get("voucher_no")
-                gl_entry.voucher_subtype = voucher_doctype
-                gl_entry.against = voucher_account
-
-                try:
-                    gl_entry.flags.ignore_permissions = 1
-                    gl_entry.insert()
-                    gl_entries.append(gl_entry)
-                except Exception as e:
-                    frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-
-        if voucher_account:
-            # Get against accounts for cash account GL entry
-            against_accounts = ",".join(acc.account for acc in accounts if acc.get("amount", 0) > 0)
-            
-            # Get cost center from first account row if available, otherwise use default
-            voucher_cost_center = None
-            if accounts and accounts[0].get("cost_center"):
-                voucher_cost_center = accounts[0].get("cost_center")
-            else:
-                voucher_cost_center = get_default_cost_center(company)
-            
-            gl_entry = frappe.new_doc("GL Entry")
-            gl_entry.posting_date = posting_date or nowdate()
-            gl_entry.account = voucher_account
-            gl_entry.debit = total_amount  # For receipt: cash account is debited
-            gl_entry.debit_in_account_currency = total_amount
-            gl_entry.credit = 0
-            gl_entry.cost_center = voucher_cost_center
-            gl_entry.party_type = None
-            gl_entry.party = None
-            gl_entry.company = company
-            gl_entry.voucher_type = voucher_doctype or voucher_type
-            gl_entry.voucher_no = voucher_no
-            gl_entry.voucher_subtype = voucher_doctype
-            gl_entry.against = against_accounts
-
-            try:
-                gl_entry.flags.ignore_permissions = 1
-                gl_entry.insert()
-                gl_entries.append(gl_entry)
-            except Exception as e:
-                frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-
-    elif voucher_type == "Bank Payment":
-        total_amount = sum(acc.get("amount", 0) for acc in accounts)
-
-        for acc in accounts:
-            if acc.get("amount", 0) > 0:
-                gl_entry = frappe.new_doc("GL Entry")
-                gl_entry.posting_date = posting_date or nowdate()
-                gl_entry.account = acc.account
-                gl_entry.debit = acc.get("amount", 0)  # For bank payment: amount = debit
-                gl_entry.debit_in_account_currency = acc.get("amount", 0)
-                gl_entry.credit = 0
-                gl_entry.cost_center = acc.get("cost_center", get_default_cost_center(company))
-                gl_entry.party_type = acc.get("party_type")
-                gl_entry.party = acc.get("party")
-                gl_entry.company = company
-                gl_entry.voucher_type = voucher_doctype or acc.get("voucher_type", voucher_type)
-                gl_entry.voucher_no = voucher_no or acc.get("voucher_no")
-                gl_entry.voucher_subtype = voucher_doctype
-                gl_entry.against = voucher_account
-
-                try:
-                    gl_entry.flags.ignore_permissions = 1
-                    gl_entry.insert()
-                    gl_entries.append(gl_entry)
-                except Exception as e:
-                    frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-        
-        if voucher_account:
-            # Get against accounts for bank account GL entry
-            against_accounts = ",".join(acc.account for acc in accounts if acc.get("amount", 0) > 0)
-            
-            # Get cost center from first account row if available, otherwise use default
-            voucher_cost_center = None
-            if accounts and accounts[0].get("cost_center"):
-                voucher_cost_center = accounts[0].get("cost_center")
-            else:
-                voucher_cost_center = get_default_cost_center(company)
-            
-            gl_entry = frappe.new_doc("GL Entry")
-            gl_entry.posting_date = posting_date or nowdate()
-            gl_entry.account = voucher_account
-            gl_entry.debit = 0
-            gl_entry.debit_in_account_currency = 0
-            gl_entry.credit = total_amount  # For bank payment: bank account is credited
-            gl_entry.credit_in_account_currency = total_amount
-            gl_entry.cost_center = voucher_cost_center
-            gl_entry.party_type = None
-            gl_entry.party = None
-            gl_entry.company = company
-            gl_entry.voucher_type = voucher_doctype or voucher_type
-            gl_entry.voucher_no = voucher_no
-            gl_entry.voucher_subtype = voucher_doctype
-            gl_entry.against = against_accounts
-
-            try:
-                gl_entry.flags.ignore_permissions = 1
-                gl_entry.insert()
-                gl_entries.append(gl_entry)
-            except Exception as e:
-                frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-
-    elif voucher_type == "Bank Receipt":
-        total_amount = sum(acc.get("amount", 0) for acc in accounts)
-
-        for acc in accounts:
-            if acc.get("amount", 0) > 0:
-                gl_entry = frappe.new_doc("GL Entry")
-                gl_entry.posting_date = posting_date or nowdate()
-                gl_entry.account = acc.account
-                gl_entry.debit = 0
-                gl_entry.debit_in_account_currency = 0
-                gl_entry.credit = acc.get("amount", 0)  # For bank receipt: amount = credit
-                gl_entry.credit_in_account_currency = acc.get("amount", 0)
-                gl_entry.cost_center = acc.get("cost_center", get_default_cost_center(company))
-                gl_entry.party_type = acc.get("party_type")
-                gl_entry.party = acc.get("party")
-                gl_entry.company = company
-                gl_entry.voucher_type = voucher_doctype or acc.get("voucher_type", voucher_type)
-                gl_entry.voucher_no = voucher_no or acc.get("voucher_no")
-                gl_entry.voucher_subtype = voucher_doctype
-                gl_entry.against = voucher_account
-
-                try:
-                    gl_entry.flags.ignore_permissions = 1
-                    gl_entry.insert()
-                    gl_entries.append(gl_entry)
-                except Exception as e:
-                    frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-
-        if voucher_account:
-            # Get against accounts for bank account GL entry
-            against_accounts = ",".join(acc.account for acc in accounts if acc.get("amount", 0) > 0)
-            
-            # Get cost center from first account row if available, otherwise use default
-            voucher_cost_center = None
-            if accounts and accounts[0].get("cost_center"):
-                voucher_cost_center = accounts[0].get("cost_center")
-            else:
-                frappe.throw("Cost Center (Official or Out Of Books) is mandatory for all vouchers")
-            
-            gl_entry = frappe.new_doc("GL Entry")
-            gl_entry.posting_date = posting_date or nowdate()
-            gl_entry.account = voucher_account
-            gl_entry.debit = total_amount  # For bank receipt: bank account is debited
-            gl_entry.debit_in_account_currency = total_amount
-            gl_entry.credit = 0
-            gl_entry.cost_center = voucher_cost_center
-            gl_entry.party_type = None
-            gl_entry.party = None
-            gl_entry.company = company
-            gl_entry.voucher_type = voucher_doctype or voucher_type
-            gl_entry.voucher_no = voucher_no
-            gl_entry.voucher_subtype = voucher_doctype
-            gl_entry.against = against_accounts
-
-            try:
-                gl_entry.flags.ignore_permissions = 1
-                gl_entry.insert()
-                gl_entries.append(gl_entry)
-            except Exception as e:
-                frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
 
+def get_voucher_gl_map(doc):
+    """
+    Build the GL map a voucher document posts on submit.
+
+    Shared by posting and the GL preview so both see the same numbers.
+    """
+    voucher_type = VOUCHER_GL_TYPES.get(doc.doctype)
+
+    if is_post_dated_cheque(doc):
+        return build_gl_map(doc.posting_date, doc.accounts, doc.company, voucher_type,
+                            get_post_dated_cheque_account(), doc.doctype, doc.name,
+                            remarks=f"Post Dated Cheque #{doc.cheque_number} dated {doc.cheque_date}")
+
+    # Bank vouchers post against the GL account of the bank, cash vouchers against voucher_account
+    if doc.meta.has_field("gl_bank_account"):
+        voucher_account = doc.gl_bank_account
     else:
-        for acc in accounts:
-            gl_entry = frappe.new_doc("GL Entry")
-            gl_entry.posting_date = posting_date or nowdate()
-            gl_entry.account = acc.account
-            gl_entry.debit = acc.get("debit", 0)
-            gl_entry.debit_in_account_currency = acc.get("debit", 0)
-            gl_entry.credit = acc.get("credit", 0)
-            gl_entry.credit_in_account_currency = acc.get("credit", 0)
-            gl_entry.cost_center = acc.get("cost_center", get_default_cost_center(company))
-            gl_entry.party_type = acc.get("party_type")
-            gl_entry.party = acc.get("party")
-            gl_entry.company = company
-            gl_entry.voucher_type = voucher_doctype or acc.get("voucher_type", voucher_type)
-            gl_entry.voucher_no = voucher_no or acc.get("voucher_no")
-            gl_entry.voucher_subtype = acc.get("voucher_subtype")
-            gl_entry.against = acc.get("against")
+        voucher_account = doc.voucher_account
+
+    return build_gl_map(doc.posting_date, doc.accounts, doc.company, voucher_type,
+                        voucher_account, doc.doctype, doc.name)
+
+
+def post_voucher_gl_entries(doc):
+    """Post the GL Entries of a voucher document"""
+    progress_doc = doc if doc.flags.in_queued_submission else None
+    gl_entries = make_gl_entries(get_voucher_gl_map(doc), doc.company, f"{doc.doctype} {doc.name}",
+                                 progress_doc)
+
+    if doc.get("gl_posting_status") == "Queued":
+        doc.db_set("gl_posting_status", "Posted", update_modified=False)
+
+    return gl_entries
+
+
+def should_queue_submission(doc):
+    """Vouchers with more rows than Voucher Settings allows are submitted in the background"""
+    threshold = cint(get_voucher_settings().queue_submission_above_rows)
+    return bool(threshold and len(doc.accounts or []) > threshold)
+
+
+def submit_voucher(doc):
+    """
+    Submit a voucher, or queue it when it is above the row threshold.
+
+    Called from the voucher classes' `submit`.
+    """
+    if should_queue_submission(doc):
+        queue_voucher_submission(doc)
+    else:
+        doc._submit()
+
+
+def queue_voucher_submission(doc):
+    """
+    Lock the voucher in "Queued" state and submit it from a background job.
+
+    The whole submission (cheque record and GL posting) runs in the job's
+    transaction, so it commits or rolls back as one.
+    """
+    doc.check_permission("submit")
+    if doc.is_new():
+        frappe.throw("Please save the voucher before submitting it")
 
-            try:
-                gl_entry.flags.ignore_permissions = 1
-                gl_entry.insert()
-                gl_entries.append(gl_entry)
-            except Exception as e:
-                frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
+    doc.db_set("gl_posting_status", "Queued", update_modified=False)
+    doc.lock()
 
-    return [entry.name for entry in gl_entries]
+    frappe.enqueue(
+        "erpnext_utils.erpnext_utils.controllers.voucher_controller.process_queued_voucher_submission",
+        queue="long",
+        timeout=3600,
+        enqueue_after_commit=True,
+        doctype=doc.doctype,
+        name=doc.name,
+    )
 
+    frappe.msgprint(f"{doc.doctype} {doc.name} has {len(doc.accounts)} rows and has been queued for submission. "
+                    "It stays locked until GL posting is complete.", alert=True)
 
 
+def process_queued_voucher_submission(doctype, name):
+    """Background job: submit a queued voucher"""
+    doc = frappe.get_doc(doctype, name)
+    doc.unlock()
+    doc.flags.in_queued_submission = True
 
+    try:
+        doc._submit()
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        doc.log_error("Queued voucher submission failed")
+        frappe.db.set_value(doctype, name, "gl_posting_status", "Failed", update_modified=False)
+        frappe.db.commit()
+    finally:
+        doc.notify_update()
+
+
+@frappe.whitelist()
+def get_voucher_gl_preview(doctype, docname):
+    """Return the GL Entries a voucher would post, without writing anything"""
+    if doctype not in VOUCHER_GL_TYPES:
+        frappe.throw(f"GL preview is not available for {doctype}")
+
+    doc = frappe.get_doc(doctype, docname)
+    doc.check_permission("read")
+
+    return [entry.as_dict() for entry in get_voucher_gl_map(doc)]
 
 
 def populate_cost_center_in_accounts(doc):
@@ -321,19 +181,33 @@ def populate_cost_center_in_accounts(doc):
                 account_row.cost_center = doc.cost_center
 
 
-def validate_account_row(row, row_idx):
+def validate_account_row(row, row_idx, existing_parties=None, account_details=None, company=None):
     """Validate individual account row 
     
     :param row: The row of the child table.
     :param row_idx: The index of the row.
+    :param existing_parties: {party_type: set of existing parties} from get_existing_parties.
+        When not given, the party is checked with its own query.
+    :param account_details: Account details from get_account_details. When given, disabled,
+        group and other-company accounts are rejected here instead of at GL posting.
+    :param company: Company of the voucher, for the account company check.
     :return: None
-    Note: Some validations are skipped because they are done by GL Entry validation.
     """
     
     # Account must exist and be valid
     if not row.account:
         frappe.throw(f"Row {row_idx}: Account is mandatory")
 
+    if account_details is not None:
+        account = account_details.get(row.account)
+        if not account:
+            frappe.throw(f"Row {row_idx}: Account '{row.account}' does not exist")
+        if account.is_group:
+            frappe.throw(f"Row {row_idx}: Account '{row.account}' is a group account and cannot be used in transactions")
+        if account.disabled:
+            frappe.throw(f"Row {row_idx}: Account '{row.account}' is disabled")
+        if company and account.company != company:
+            frappe.throw(f"Row {row_idx}: Account '{row.account}' does not belong to Company '{company}'")
     
     # Validate amount
     amount = flt(row.amount or 0)
@@ -352,10 +226,34 @@ def validate_account_row(row, row_idx):
     
     # Validate party exists
     if row.party_type and row.party:
-        if not frappe.db.exists(row.party_type, row.party):
+        if existing_parties is not None:
+            party_exists = row.party in existing_parties.get(row.party_type, ())
+        else:
+            party_exists = frappe.db.exists(row.party_type, row.party)
+
+        if not party_exists:
             frappe.throw(f"Row {row_idx}: {row.party_type} '{row.party}' does not exist")
-    
-   
+
+
+def get_existing_parties(rows):
+    """
+    Check every party referenced by `rows` with one IN query per party type.
+
+    :return: {party_type: set of party names that exist}
+    """
+    parties_by_type = {}
+    for row in rows:
+        if row.party_type and row.party:
+            parties_by_type.setdefault(row.party_type, set()).add(row.party)
+
+    existing_parties = {}
+    for party_type, parties in parties_by_type.items():
+        existing_parties[party_type] = set(
+            frappe.get_all(party_type, filters={"name": ["in", list(parties)]}, pluck="name")
+        )
+
+    return existing_parties
+
 
 def validate_accounts_child_table(doc):
     """Validate accounts child table rows"""
@@ -364,9 +262,19 @@ def validate_accounts_child_table(doc):
     
     if not doc.accounts:
         frappe.throw("At least one account entry is required")
+
+    # Parties and accounts of all rows are fetched up front, not per row.
+    # Bulk import prefetches them for a whole chunk and passes them in flags.
+    existing_parties = doc.flags.existing_parties
+    if existing_parties is None:
+        existing_parties = get_existing_parties(doc.accounts)
+
+    account_details = doc.flags.account_details
+    if account_details is None:
+        account_details = get_account_details({row.account for row in doc.accounts})
     
     for idx, row in enumerate(doc.accounts, 1):
-        validate_account_row(row, idx)
+        validate_account_row(row, idx, existing_parties, account_details, doc.company)
 
 def validate_accounting_equation(doc):
     """
@@ -414,7 +322,7 @@ def create_single_gl_entry(doc, account, debit=0, credit=0, party_type=None,
     
     # Set cost center from document or get default
     gl_entry.cost_center = (doc.get('cost_center') or 
-                           get_default_cost_center(doc.company))
+                           get_company_default_cost_center(doc.company))
     
     try:
         gl_entry.flags.ignore_permissions = 1
@@ -427,12 +335,12 @@ def create_single_gl_entry(doc, account, debit=0, credit=0, party_type=None,
 
 def get_post_dated_cheque_account():
     """Get the default post dated cheque account from Voucher Settings"""
-    try:
-        voucher_settings = frappe.get_single("Voucher Settings")
-        return voucher_settings.default_post_dated_cheque
-    except:
+    post_dated_account = get_voucher_settings().default_post_dated_cheque
+    if not post_dated_account:
         frappe.throw("Please set Default Post Dated Cheque Account in Voucher Settings")
 
+    return post_dated_account
+
 
 def create_post_dated_cheque_gl_entries(posting_date, accounts, company, voucher_type, 
                                        voucher_account, voucher_doctype, voucher_no, 
@@ -441,92 +349,8 @@ def create_post_dated_cheque_gl_entries(posting_date, accounts, company, voucher
     Create GL entries for post dated cheques
     For post dated cheques, the transaction hits the post dated cheque account instead of bank account
     """
-    from frappe.utils import nowdate
-    
-    gl_entries = []
-    total_amount = sum(acc.get("amount", 0) for acc in accounts)
-    
-    # Get post dated cheque account
-    post_dated_account = get_post_dated_cheque_account()
-    
-    # Create entries for accounts (same as normal voucher)
-    for acc in accounts:
-        if acc.get("amount", 0) > 0:
-            gl_entry = frappe.new_doc("GL Entry")
-            gl_entry.posting_date = posting_date or nowdate()
-            gl_entry.account = acc.account
-            
-            if voucher_type in ["Bank Payment", "Payment"]:
-                gl_entry.debit = acc.get("amount", 0)
-                gl_entry.debit_in_account_currency = acc.get("amount", 0)
-                gl_entry.credit = 0
-                gl_entry.credit_in_account_currency = 0
-            else:  # Bank Receipt, Receipt
-                gl_entry.debit = 0
-                gl_entry.debit_in_account_currency = 0
-                gl_entry.credit = acc.get("amount", 0)
-                gl_entry.credit_in_account_currency = acc.get("amount", 0)
-            
-            gl_entry.cost_center = acc.get("cost_center", get_default_cost_center(company))
-            gl_entry.party_type = acc.get("party_type")
-            gl_entry.party = acc.get("party")
-            gl_entry.company = company
-            gl_entry.voucher_type = voucher_doctype or acc.get("voucher_type", voucher_type)
-            gl_entry.voucher_no = voucher_no or acc.get("voucher_no")
-            gl_entry.voucher_subtype = acc.get("voucher_subtype")
-            gl_entry.against = post_dated_account
-            gl_entry.remarks = f"Post Dated Cheque #{cheque_number} dated {cheque_date}"
-
-            try:
-                gl_entry.flags.ignore_permissions = 1
-                gl_entry.insert()
-                gl_entries.append(gl_entry)
-            except Exception as e:
-                frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-    
-    # Create entry for post dated cheque account
-    if post_dated_account:
-        against_accounts = ",".join(acc.account for acc in accounts if acc.get("amount", 0) > 0)
-        
-        # Get cost center from first account row if available, otherwise use default
-        voucher_cost_center = None
-        if accounts and accounts[0].get("cost_center"):
-            voucher_cost_center = accounts[0].get("cost_center")
-        else:
-            voucher_cost_center = get_default_cost_center(company)
-        
-        gl_entry = frappe.new_doc("GL Entry")
-        gl_entry.posting_date = posting_date or nowdate()
-        gl_entry.account = post_dated_account
-        
-        if voucher_type in ["Bank Payment", "Payment"]:
-            gl_entry.debit = 0
-            gl_entry.debit_in_account_currency = 0
-            gl_entry.credit = total_amount
-            gl_entry.credit_in_account_currency = total_amount
-        else:  # Bank Receipt, Receipt
-            gl_entry.debit = total_amount
-            gl_entry.debit_in_account_currency = total_amount
-            gl_entry.credit = 0
-            gl_entry.credit_in_account_currency = 0
-        
-        gl_entry.cost_center = voucher_cost_center
-        gl_entry.party_type = None
-        gl_entry.party = None
-        gl_entry.company = company
-        gl_entry.voucher_type = voucher_doctype or voucher_type
-        gl_entry.voucher_no = voucher_no
-        gl_entry.voucher_subtype = voucher_doctype
-        gl_entry.against = against_accounts
-        gl_entry.remarks = f"Post Dated Cheque #{cheque_number} dated {cheque_date}"
-
-        try:
-            gl_entry.flags.ignore_permissions = 1
-            gl_entry.insert()
-            gl_entries.append(gl_entry)
-        except Exception as e:
-            frappe.log_error(f"Error inserting GL Entry: {str(e)}", "GL Entry Insertion Error")
-    
-    return [entry.name for entry in gl_entries]
-
+    gl_map = build_gl_map(posting_date, accounts, company, voucher_type,
+                          get_post_dated_cheque_account(), voucher_doctype, voucher_no,
+                          remarks=f"Post Dated Cheque #{cheque_number} dated {cheque_date}")
 
+    return make_gl_entries(gl_map, company, f"{voucher_doctype or voucher_type} {voucher_no}")
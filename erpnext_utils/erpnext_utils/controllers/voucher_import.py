@@ -0,0 +1,304 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Bulk import of Cash/Bank Payment and Receipt Vouchers.
+
+Input is a CSV or JSON lines stream with one line per voucher account row;
+uploaded files are read line by line from disk. Rows of the same voucher
+share a `voucher_ref` and must be consecutive. Header values (company,
+posting_date, voucher_account, ...) are read from the first row of each
+voucher; account row values use the column names in ACCOUNT_ROW_COLUMNS.
+
+Vouchers are validated in chunks with the same rules as the voucher forms,
+but parties and accounts of the whole chunk are fetched with one query each.
+Valid vouchers are then inserted (and optionally submitted) with one
+transaction per chunk and a savepoint per voucher, so a bad voucher is
+reported without aborting the run.
+"""
+
+import csv
+import io
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint
+
+from erpnext_utils.erpnext_utils.controllers.gl_posting import get_account_details
+from erpnext_utils.erpnext_utils.controllers.received_cheques import find_received_cheques, get_received_cheque_key
+from erpnext_utils.erpnext_utils.controllers.settings_cache import get_company_abbr
+from erpnext_utils.erpnext_utils.controllers.voucher_controller import (
+	VOUCHER_GL_TYPES,
+	get_existing_parties,
+	populate_cost_center_in_accounts,
+	validate_account_row,
+	validate_accounting_equation,
+)
+
+HEADER_COLUMNS = (
+	"company",
+	"posting_date",
+	"voucher_account",
+	"cost_center",
+	"remarks",
+	"paid_to",
+	"instrument_type",
+	"cheque_number",
+	"cheque_date",
+	"bank",
+	"party_type",
+	"party",
+	"received_from",
+)
+
+# import column -> Voucher Account field
+ACCOUNT_ROW_COLUMNS = {
+	"account": "account",
+	"amount": "amount",
+	"narration": "narration",
+	"line_party_type": "party_type",
+	"line_party": "party",
+	"line_cost_center": "cost_center",
+}
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+@frappe.whitelist()
+def import_vouchers(data=None, file_url=None, file_format="csv", submit=0, chunk_size=DEFAULT_CHUNK_SIZE, enqueue=0):
+	"""
+	Import vouchers from CSV/JSON text or an uploaded File.
+
+	:param data: CSV text, JSON lines or a JSON array.
+	:param file_url: URL of an uploaded CSV or JSON lines File, used when `data`
+		is not given.
+	:param file_format: "csv" or "json".
+	:param submit: Submit the vouchers after inserting them.
+	:param chunk_size: Vouchers validated and committed together.
+	:param enqueue: Run as a background job; the summary is published on
+		the `voucher_import_complete` realtime event.
+	:return: Import summary, or the job id when enqueued.
+	"""
+	if not data and not file_url:
+		frappe.throw("Please provide data or a file to import")
+
+	if cint(enqueue):
+		job = frappe.enqueue(
+			"erpnext_utils.erpnext_utils.controllers.voucher_import.run_voucher_import",
+			queue="long",
+			timeout=6000,
+			data=data,
+			file_url=file_url,
+			file_format=file_format,
+			submit=submit,
+			chunk_size=chunk_size,
+			user=frappe.session.user,
+		)
+		return {"job_id": job.id if job else None}
+
+	return run_voucher_import(data, file_url, file_format, submit, chunk_size)
+
+
+def run_voucher_import(data=None, file_url=None, file_format="csv", submit=0, chunk_size=DEFAULT_CHUNK_SIZE, user=None):
+	start = time.perf_counter()
+	chunk_size = cint(chunk_size) or DEFAULT_CHUNK_SIZE
+
+	summary = frappe._dict(total=0, imported=0, submitted=0, failed=0, failures=[], vouchers=[])
+	checked_doctypes = set()
+
+	chunk = []
+	for voucher in iter_vouchers(iter_import_rows(data, file_url, file_format)):
+		chunk.append(voucher)
+		if len(chunk) >= chunk_size:
+			import_voucher_chunk(chunk, cint(submit), summary, checked_doctypes)
+			chunk = []
+
+	if chunk:
+		import_voucher_chunk(chunk, cint(submit), summary, checked_doctypes)
+
+	summary.elapsed_seconds = round(time.perf_counter() - start, 3)
+	summary.vouchers_per_second = (
+		round(summary.imported / summary.elapsed_seconds, 2) if summary.elapsed_seconds else 0
+	)
+
+	frappe.logger("erpnext_utils").info(
+		f"[Voucher Import] {summary.imported}/{summary.total} vouchers imported, {summary.failed} failed "
+		f"in {summary.elapsed_seconds}s ({summary.vouchers_per_second} vouchers/sec)"
+	)
+
+	if user:
+		frappe.publish_realtime("voucher_import_complete", summary, user=user)
+
+	return summary
+
+
+@contextmanager
+def open_import_file(data=None, file_url=None):
+	"""Yield an iterator over the import's text lines; files are read lazily from disk"""
+	if data:
+		yield io.StringIO(data.decode("utf-8-sig") if isinstance(data, bytes) else data)
+		return
+
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+	file_doc.check_permission("read")
+	with open(file_doc.get_full_path(), encoding="utf-8-sig", newline="") as handle:
+		yield handle
+
+
+def iter_import_rows(data=None, file_url=None, file_format="csv"):
+	"""
+	Yield (line_no, row dict) from CSV or JSON lines, one line at a time.
+
+	A JSON array is not streamed: it is only accepted as inline `data`, which
+	is already in memory. Uploaded JSON files must be JSON lines.
+	"""
+	with open_import_file(data, file_url) as lines:
+		if file_format == "json":
+			yield from iter_json_rows(lines, allow_array=bool(data))
+			return
+
+		# line 1 is the CSV header
+		for line_no, row in enumerate(csv.DictReader(lines), 2):
+			yield line_no, row
+
+
+def iter_json_rows(lines, allow_array=False):
+	line_no = 0
+	for line in lines:
+		line_no += 1
+		if not line.strip():
+			continue
+
+		if line.lstrip().startswith("["):
+			if not allow_array:
+				frappe.throw("JSON array files are not streamed; upload the vouchers as JSON lines (one object per line)")
+			rows = json.loads(line + "".join(lines))
+			yield from enumerate(rows, 1)
+			return
+
+		yield line_no, json.loads(line)
+
+
+def iter_vouchers(rows):
+	"""Group consecutive rows sharing a voucher_ref into one voucher"""
+	voucher = None
+	for line_no, row in rows:
+		voucher_ref = (row.get("voucher_ref") or "").strip() or f"line-{line_no}"
+		if voucher and voucher.voucher_ref == voucher_ref:
+			voucher.rows.append(row)
+			voucher.line_numbers.append(line_no)
+			continue
+
+		if voucher:
+			yield voucher
+
+		voucher = frappe._dict(
+			voucher_ref=voucher_ref,
+			voucher_doctype=(row.get("voucher_doctype") or "").strip(),
+			header=row,
+			rows=[row],
+			line_numbers=[line_no],
+		)
+
+	if voucher:
+		yield voucher
+
+
+def make_voucher_doc(voucher):
+	if voucher.voucher_doctype not in VOUCHER_GL_TYPES:
+		frappe.throw(f"Unsupported voucher doctype '{voucher.voucher_doctype}'")
+
+	doc = frappe.new_doc(voucher.voucher_doctype)
+	for column in HEADER_COLUMNS:
+		value = voucher.header.get(column)
+		if value not in (None, "") and doc.meta.has_field(column):
+			doc.set(column, value)
+
+	if doc.meta.has_field("abbr") and not doc.abbr:
+		doc.abbr = get_company_abbr(doc.company)
+
+	for row in voucher.rows:
+		doc.append(
+			"accounts",
+			{field: row.get(column) for column, field in ACCOUNT_ROW_COLUMNS.items() if row.get(column) not in (None, "")},
+		)
+
+	return doc
+
+
+def import_voucher_chunk(chunk, submit, summary, checked_doctypes):
+	"""Validate a chunk of vouchers together, then insert the valid ones in one transaction"""
+	docs = []
+	for voucher in chunk:
+		summary.total += 1
+		try:
+			if voucher.voucher_doctype not in checked_doctypes:
+				frappe.has_permission(voucher.voucher_doctype, "submit" if submit else "create", throw=True)
+				checked_doctypes.add(voucher.voucher_doctype)
+
+			doc = make_voucher_doc(voucher)
+			populate_cost_center_in_accounts(doc)
+			docs.append((voucher, doc))
+		except Exception as e:
+			add_failure(summary, voucher, e)
+
+	all_rows = [row for _voucher, doc in docs for row in doc.accounts]
+	existing_parties = get_existing_parties(all_rows)
+	account_details = get_account_details({row.account for row in all_rows})
+
+	# Duplicate checks of received cheques in the chunk are answered from one query
+	find_received_cheques(
+		[
+			get_received_cheque_key(doc.cheque_number, doc.bank, doc.party_type, doc.received_from)
+			for _voucher, doc in docs
+			if doc.doctype == "Bank Receipt Voucher" and doc.instrument_type == "Cheque" and doc.cheque_number
+		]
+	)
+
+	valid_docs = []
+	for voucher, doc in docs:
+		try:
+			if not doc.accounts:
+				frappe.throw("At least one account entry is required")
+			for idx, row in enumerate(doc.accounts, 1):
+				validate_account_row(row, idx, existing_parties, account_details, doc.company)
+			validate_accounting_equation(doc)
+		except Exception as e:
+			add_failure(summary, voucher, e)
+			continue
+
+		# Reused by validate_accounts_child_table when the document validates on insert
+		doc.flags.existing_parties = existing_parties
+		doc.flags.account_details = account_details
+		valid_docs.append((voucher, doc))
+
+	for voucher, doc in valid_docs:
+		frappe.db.savepoint("voucher_import")
+		try:
+			if submit:
+				doc.docstatus = 1
+			doc.insert()
+		except Exception as e:
+			frappe.db.rollback(save_point="voucher_import")
+			add_failure(summary, voucher, e)
+			continue
+
+		summary.imported += 1
+		summary.submitted += 1 if submit else 0
+		summary.vouchers.append({"voucher_ref": voucher.voucher_ref, "name": doc.name})
+
+	frappe.db.commit()
+
+
+def add_failure(summary, voucher, error):
+	summary.failed += 1
+	summary.failures.append(
+		{
+			"voucher_ref": voucher.voucher_ref,
+			"lines": voucher.line_numbers,
+			"error": frappe.utils.strip_html(str(error)) or error.__class__.__name__,
+		}
+	)
+	frappe.clear_messages()
@@ -5,7 +5,10 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt, today
 from erpnext_utils.erpnext_utils.controllers.voucher_controller import (validate_accounts_child_table, validate_accounting_equation, 
-create_gl_entries)
+post_voucher_gl_entries, submit_voucher, is_post_dated_cheque)
+from erpnext_utils.erpnext_utils.controllers.voucher_cancellation import cancel_voucher
+from erpnext_utils.erpnext_utils.controllers.cheque_books import (get_cheque_book_for_number, is_leaf_used,
+	mark_cheque_leaf_used)
 
 
 class BankPaymentVoucher(Document):
@@ -34,27 +37,24 @@ class BankPaymentVoucher(Document):
 			# Validate and fetch correct cheque book
 			self.validate_and_fetch_cheque_book()
 
+	@frappe.whitelist()
+	def submit(self):
+		# Large vouchers are queued to a background job when enabled in Voucher Settings
+		submit_voucher(self)
+
 	def on_submit(self):
 		# Create cheque record if instrument type is Cheque
 		if self.instrument_type == "Cheque":
 			self.create_cheque_record()
-			
-			# Check if it's a post dated cheque
-			if self.cheque_date > today():
-				# Create post dated cheque GL entries using gl_bank_account
-				from erpnext_utils.erpnext_utils.controllers.voucher_controller import create_post_dated_cheque_gl_entries,get_post_dated_cheque_account
-				
-				create_post_dated_cheque_gl_entries(self.posting_date, self.accounts, self.company, 
-					"Bank Payment", get_post_dated_cheque_account(), "Bank Payment Voucher", self.name,
-					self.cheque_date, self.cheque_number)
-			else:
-				# Create normal GL entries for current date cheques using gl_bank_account
-				create_gl_entries(self.posting_date, self.accounts, self.company, "Bank Payment",
-						self.gl_bank_account, "Bank Payment Voucher", self.name)
-		else:
-			# Create normal GL entries for non-cheque instruments using gl_bank_account
-			create_gl_entries(self.posting_date, self.accounts, self.company, "Bank Payment",
-					self.gl_bank_account, "Bank Payment Voucher", self.name)
+
+		# Post dated cheques are parked on the post dated cheque account,
+		# everything else posts against gl_bank_account
+		post_voucher_gl_entries(self)
+
+	def on_cancel(self):
+		# Reverses all GL Entries of the voucher, including post dated cheque entries,
+		# and cancels the linked Cheque
+		cancel_voucher(self)
 
 	def create_cheque_record(self):
 		"""Create cheque record for cheque payments"""
@@ -63,13 +63,19 @@ class BankPaymentVoucher(Document):
 		cheque_doc.cheque_date = self.cheque_date
 		cheque_doc.party_type = self.party_type
 		cheque_doc.party = self.party
-		cheque_doc.status = "Unpresented"
+		# Post dated cheques are moved to Unpresented by the PDC maturity job
+		cheque_doc.status = "Post Dated" if is_post_dated_cheque(self) else "Unpresented"
 		cheque_doc.cheque_type = "Issued"
 		cheque_doc.amount = self.total_payment
+		cheque_doc.reference_doctype = self.doctype
+		cheque_doc.reference_name = self.name
 		
 		# Use the validated cheque book
 		if hasattr(self, 'cheque_book_name') and self.cheque_book_name:
 			cheque_doc.cheque_book = self.cheque_book_name
+			# Reserve the leaf under a row lock on the Cheque Book; a concurrent
+			# submission with the same cheque number fails here
+			mark_cheque_leaf_used(self.cheque_book_name, self.cheque_number)
 		else:
 			# Fallback: Try to find and link the cheque book using the Bank Account directly
 			if self.voucher_account:
@@ -100,27 +106,15 @@ class BankPaymentVoucher(Document):
 			frappe.throw(f"Bank Account '{bank_account}' not found or not a company account")
 
 		# Find cheque book that matches the Bank Account and contains the cheque number
-		cheque_book = frappe.db.get_value("Cheque Book",
-			{
-				"bank_account": bank_account,
-				"is_active": 1,
-				"start_series": ["<=", self.cheque_number],
-				"end_series": [">=", self.cheque_number]
-			},
-			["name", "start_series", "end_series", "current_series"],
-			as_dict=True
-		)
-		
-		if not cheque_book:
+		cheque_book_name = get_cheque_book_for_number(bank_account, self.cheque_number)
+		if not cheque_book_name:
 			frappe.throw(f"No active cheque book found for Bank Account '{bank_account}' containing cheque number '{self.cheque_number}'")
 		
-		# Check if cheque number is already used
-		existing_cheque = frappe.db.exists("Cheque", {
-			"cheque_number": self.cheque_number,
-			"cheque_book": cheque_book.name
-		})
+		cheque_book = frappe.db.get_value("Cheque Book", cheque_book_name,
+			["name", "used_leaves", "voided_leaves"], as_dict=True)
 		
-		if existing_cheque:
+		# Check if cheque number is already used (or voided) in the book's leaf sets
+		if is_leaf_used(cheque_book, self.cheque_number):
 			frappe.throw(f"Cheque number '{self.cheque_number}' is already used in cheque book '{cheque_book.name}'")
 		
 		# Store the cheque book name for later use
@@ -1,9 +1,69 @@
 # Copyright (c) 2025, SpotLedger and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from erpnext_utils.erpnext_utils.controllers.voucher_cancellation import (
+	get_legacy_cheque_criteria,
+	matches_legacy_cheque,
+)
+
+
+def make_cheque_row(**values):
+	return frappe._dict(
+		{
+			"cheque_number": "100005",
+			"cheque_type": "Issued",
+			"cheque_book": None,
+			"bank_account": None,
+			"bank": None,
+			"party_type": None,
+			"party": None,
+			"amount": 5000,
+			**values,
+		}
+	)
+
 
 class TestBankPaymentVoucher(FrappeTestCase):
-	pass
+	def test_legacy_cheque_match_is_scoped_to_the_bank_account(self):
+		"""Two books of different bank accounts share leaf 100005; only the voucher's own cheque matches"""
+		voucher = frappe._dict(
+			doctype="Bank Payment Voucher",
+			instrument_type="Cheque",
+			cheque_number="100005",
+			voucher_account="HBL - Current",
+			total_payment=5000,
+		)
+		criteria = get_legacy_cheque_criteria(voucher, cheque_book="CB-HBL-0001")
+
+		own = make_cheque_row(cheque_book="CB-HBL-0001", bank_account="HBL - Current")
+		other_book = make_cheque_row(cheque_book="CB-MCB-0001", bank_account="MCB - Current")
+		received = make_cheque_row(cheque_type="Received", bank="HBL")
+		other_amount = make_cheque_row(cheque_book="CB-HBL-0001", bank_account="HBL - Current", amount=4000)
+
+		self.assertTrue(matches_legacy_cheque(criteria, own))
+		self.assertFalse(matches_legacy_cheque(criteria, other_book))
+		self.assertFalse(matches_legacy_cheque(criteria, received))
+		self.assertFalse(matches_legacy_cheque(criteria, other_amount))
+
+	def test_legacy_received_cheque_match_is_scoped_to_bank_and_party(self):
+		voucher = frappe._dict(
+			doctype="Bank Receipt Voucher",
+			instrument_type="Cheque",
+			cheque_number="100005",
+			bank="HBL",
+			party_type="Customer",
+			received_from="Customer A",
+			total_payment=5000,
+		)
+		criteria = get_legacy_cheque_criteria(voucher)
+		received = {"cheque_type": "Received", "party_type": "Customer"}
+
+		self.assertTrue(matches_legacy_cheque(criteria, make_cheque_row(**received, bank="HBL", party="Customer A")))
+		self.assertFalse(matches_legacy_cheque(criteria, make_cheque_row(**received, bank="MCB", party="Customer A")))
+		self.assertFalse(matches_legacy_cheque(criteria, make_cheque_row(**received, bank="HBL", party="Customer B")))
+		self.assertFalse(
+			matches_legacy_cheque(criteria, make_cheque_row(bank_account="HBL - Current", cheque_book="CB-HBL-0001"))
+		)
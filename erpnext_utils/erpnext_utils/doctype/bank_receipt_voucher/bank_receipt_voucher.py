@@ -5,7 +5,10 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt, today
 from erpnext_utils.erpnext_utils.controllers.voucher_controller import (validate_accounts_child_table, validate_accounting_equation, 
-create_gl_entries)
+post_voucher_gl_entries, submit_voucher, is_post_dated_cheque)
+from erpnext_utils.erpnext_utils.controllers.voucher_cancellation import cancel_voucher
+from erpnext_utils.erpnext_utils.controllers.received_cheques import (find_received_cheques, get_received_cheque_key,
+	remember_received_cheque)
 
 
 class BankReceiptVoucher(Document):
@@ -36,26 +39,24 @@ class BankReceiptVoucher(Document):
 			# Just validate that the cheque number is not already received
 			self.validate_received_cheque()
 
+	@frappe.whitelist()
+	def submit(self):
+		# Large vouchers are queued to a background job when enabled in Voucher Settings
+		submit_voucher(self)
+
 	def on_submit(self):
 		# Create cheque record if instrument type is Cheque
 		if self.instrument_type == "Cheque":
 			self.create_cheque_record()
-			
-			# Check if it's a post dated cheque
-			if self.cheque_date > today():
-				# Create post dated cheque GL entries using gl_bank_account
-				from erpnext_utils.erpnext_utils.controllers.voucher_controller import create_post_dated_cheque_gl_entries
-				create_post_dated_cheque_gl_entries(self.posting_date, self.accounts, self.company, 
-					"Bank Receipt", self.gl_bank_account, "Bank Receipt Voucher", self.name,
-					self.cheque_date, self.cheque_number)
-			else:
-				# Create normal GL entries for current date cheques using gl_bank_account
-				create_gl_entries(self.posting_date, self.accounts, self.company, "Bank Receipt",
-						self.gl_bank_account, "Bank Receipt Voucher", self.name)
-		else:
-			# Create normal GL entries for non-cheque instruments using gl_bank_account
-			create_gl_entries(self.posting_date, self.accounts, self.company, "Bank Receipt",
-					self.gl_bank_account, "Bank Receipt Voucher", self.name)
+
+		# Post dated cheques are parked on the post dated cheque account,
+		# everything else posts against gl_bank_account
+		post_voucher_gl_entries(self)
+
+	def on_cancel(self):
+		# Reverses all GL Entries of the voucher, including post dated cheque entries,
+		# and cancels the linked Cheque
+		cancel_voucher(self)
 
 	def create_cheque_record(self):
 		"""Create cheque record for cheque receipts"""
@@ -65,15 +66,21 @@ class BankReceiptVoucher(Document):
 		cheque_doc.party_type = self.party_type
 
 		cheque_doc.party = self.received_from
-		cheque_doc.status = "Unpresented"
+		# Post dated cheques are moved to Unpresented by the PDC maturity job
+		cheque_doc.status = "Post Dated" if is_post_dated_cheque(self) else "Unpresented"
 		cheque_doc.cheque_type = "Received"
 		cheque_doc.amount = self.total_payment
+		cheque_doc.reference_doctype = self.doctype
+		cheque_doc.reference_name = self.name
 		cheque_doc.bank = self.bank  # Bank from which cheque is received
-		
-		# For receipts, we don't set bank_account field - only bank field is used
-		# This distinguishes received cheques from issued cheques
-		
+		# Company Bank Account the cheque is deposited into
+		cheque_doc.bank_account = self.voucher_account
+
 		cheque_doc.insert()
+		remember_received_cheque(
+			get_received_cheque_key(self.cheque_number, self.bank, self.party_type, self.received_from),
+			cheque_doc.name
+		)
 
 	def validate_received_cheque(self):
 		"""Validate received cheque number"""
@@ -81,13 +88,9 @@ class BankReceiptVoucher(Document):
 			return
 		
 		# Check if this cheque number is already received from the same party and bank
-		existing_cheque = frappe.db.exists("Cheque", {
-			"cheque_number": self.cheque_number,
-			"party_type": self.party_type,
-			"party": self.received_from,
-			"bank": self.bank,
-			"status": ["!=", "Cancelled"]
-		})
+		# (composite Cheque index; memoised for the request)
+		key = get_received_cheque_key(self.cheque_number, self.bank, self.party_type, self.received_from)
+		existing_cheque = find_received_cheques([key]).get(key)
 		
 		if existing_cheque:
 			frappe.throw(f"Cheque number '{self.cheque_number}' from {self.party_type} '{self.received_from}' drawn on {self.bank} has already been received")
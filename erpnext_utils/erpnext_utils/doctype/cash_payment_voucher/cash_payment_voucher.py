@@ -5,7 +5,8 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt
 from erpnext_utils.erpnext_utils.controllers.voucher_controller import (validate_accounts_child_table, validate_accounting_equation, 
-create_gl_entries)
+post_voucher_gl_entries, submit_voucher)
+from erpnext_utils.erpnext_utils.controllers.voucher_cancellation import cancel_voucher
 
 
 class CashPaymentVoucher(Document):
@@ -18,9 +19,16 @@ class CashPaymentVoucher(Document):
 
 	
 
+	@frappe.whitelist()
+	def submit(self):
+		# Large vouchers are queued to a background job when enabled in Voucher Settings
+		submit_voucher(self)
+
 	def on_submit(self):
-		create_gl_entries(self.posting_date,self.accounts,self.company,"Payment",
-					self.voucher_account,"Cash Payment Voucher",self.name)
+		post_voucher_gl_entries(self)
+
+	def on_cancel(self):
+		cancel_voucher(self)
 
 		
 		
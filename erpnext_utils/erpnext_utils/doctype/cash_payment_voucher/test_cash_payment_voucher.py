@@ -1,9 +1,25 @@
 # Copyright (c) 2025, SpotLedger and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from erpnext_utils.erpnext_utils.controllers.gl_map import build_gl_map
+
 
 class TestCashPaymentVoucher(FrappeTestCase):
-	pass
+	def test_gl_map_is_balanced(self):
+		"""Payment rows are debited and the cash account is credited for the total"""
+		accounts = [
+			frappe._dict(account="Rent - TC", amount=100, cost_center="Main - TC"),
+			frappe._dict(account="Electricity - TC", amount=50, cost_center="Main - TC"),
+		]
+
+		gl_map = build_gl_map("2025-01-01", accounts, "Test Company", "Payment",
+			"Cash - TC", "Cash Payment Voucher", "CP-0001")
+
+		self.assertEqual(len(gl_map), 3)
+		self.assertEqual([entry.debit for entry in gl_map], [100, 50, 0])
+		self.assertEqual(gl_map[-1].account, "Cash - TC")
+		self.assertEqual(gl_map[-1].credit, 150)
+		self.assertEqual(gl_map[-1].against, "Rent - TC,Electricity - TC")
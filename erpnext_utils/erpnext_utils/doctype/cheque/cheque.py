@@ -5,6 +5,8 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import today
 
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import on_cheque_trash, on_cheque_update
+
 
 class Cheque(Document):
 	def validate(self):
@@ -27,3 +29,18 @@ class Cheque(Document):
 		elif self.cheque_date > today() and self.status == "Unpresented":
 			# This is a post dated cheque
 			pass
+		
+		# Keep the Cheque Register summary in step with this cheque
+		on_cheque_update(self)
+	
+	def on_trash(self):
+		on_cheque_trash(self)
+
+
+def on_doctype_update():
+	frappe.db.add_index("Cheque", ["reference_doctype", "reference_name"])
+	frappe.db.add_index("Cheque", ["status", "cheque_date"])
+	frappe.db.add_index("Cheque", ["cheque_type", "creation"])
+	frappe.db.add_index("Cheque", ["bank_account", "status"])
+	# Received cheque duplicate check (see controllers/received_cheques.py)
+	frappe.db.add_index("Cheque", ["cheque_number", "bank", "party_type", "party"])
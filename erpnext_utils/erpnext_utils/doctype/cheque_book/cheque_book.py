@@ -5,6 +5,9 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import today
 
+from erpnext_utils.erpnext_utils.controllers.cheque_books import (MAX_CHEQUE_NUMBER, allocate_next_cheque_number,
+	clear_cheque_book_ranges_cache)
+
 
 class ChequeBook(Document):
 	def validate(self):
@@ -25,6 +28,43 @@ class ChequeBook(Document):
 		
 		if current_series < start_series or current_series > end_series:
 			frappe.throw("Current Series must be between Start Series and End Series")
+		
+		# Integer bounds used for range lookups; string comparison breaks on differing lengths
+		self.start_number = start_series
+		self.end_number = end_series
+		
+		self.validate_overlapping_series()
+	
+	def validate_overlapping_series(self):
+		"""A cheque number must resolve to exactly one book of the bank account"""
+		overlapping = frappe.db.get_value("Cheque Book",
+			{
+				"bank_account": self.bank_account,
+				"name": ["!=", self.name],
+				"start_number": ["<=", self.end_number],
+				"end_number": [">=", self.start_number]
+			},
+			["name", "start_series", "end_series"],
+			as_dict=True
+		)
+		
+		if overlapping:
+			frappe.throw(f"Series {self.start_series} - {self.end_series} overlaps with Cheque Book "
+				f"'{overlapping.name}' ({overlapping.start_series} - {overlapping.end_series}) of Bank Account '{self.bank_account}'")
+	
+	def on_update(self):
+		self.clear_ranges_cache()
+	
+	def on_trash(self):
+		self.clear_ranges_cache()
+	
+	def clear_ranges_cache(self):
+		clear_cheque_book_ranges_cache(self.bank_account)
+		
+		# The book may have moved to another bank account
+		doc_before_save = self.get_doc_before_save()
+		if doc_before_save and doc_before_save.bank_account != self.bank_account:
+			clear_cheque_book_ranges_cache(doc_before_save.bank_account)
 	
 	def validate_numeric_fields(self):
 		"""Validate that series fields contain only numeric values"""
@@ -35,32 +75,19 @@ class ChequeBook(Document):
 				int(self.current_series)
 		except (ValueError, TypeError):
 			frappe.throw("Series fields must contain only numeric values")
+		
+		if int(self.end_series) > MAX_CHEQUE_NUMBER:
+			frappe.throw(f"End Series must not be greater than {MAX_CHEQUE_NUMBER}")
 	
 	def get_next_cheque_number(self):
-		"""Get the next cheque number and increment current series"""
-		if not self.current_series:
-			frappe.throw("Current series is not set")
-		
-		# Store the current cheque number to return
-		current_cheque_number = str(self.current_series)
-		
-		# Convert to integers for calculation
-		current_int = int(self.current_series)
-		end_int = int(self.end_series)
-		
-		# Check if we've reached the end of the series
-		if current_int >= end_int:
-			frappe.throw(f"Cheque series has reached the end. Current: {current_int}, End: {end_int}")
-		
-		# Increment current series for next call
-		next_int = current_int + 1
+		"""Reserve the next free leaf of this book and return its cheque number"""
+		# Allocated under a row lock on the Cheque Book; the leaf sets and
+		# current_series are written directly instead of saving the document
+		cheque_number = allocate_next_cheque_number(self.name)
+		self.current_series = frappe.db.get_value("Cheque Book", self.name, "current_series")
 		
-		# Preserve original formatting by padding with zeros if needed
-		original_length = len(str(self.start_series))
-		self.current_series = str(next_int).zfill(original_length)
-		
-		# Save the document to persist the updated current_series
-		self.save()
-		
-		return current_cheque_number
-	
+		return cheque_number
+
+
+def on_doctype_update():
+	frappe.db.add_index("Cheque Book", ["bank_account", "start_number"])
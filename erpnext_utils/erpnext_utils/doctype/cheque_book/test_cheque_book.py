@@ -0,0 +1,30 @@
+# Copyright (c) 2025, SpotLedger and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from erpnext_utils.erpnext_utils.controllers.cheque_books import LeafSet, first_free_leaf
+
+
+class TestChequeBook(FrappeTestCase):
+	def test_leaf_set_merges_and_splits(self):
+		"""Adjacent leaves merge into one interval and removing a leaf splits it"""
+		leaves = LeafSet.parse("100001-100003,100007")
+		leaves.add(100004)
+		leaves.add(100006)
+		self.assertEqual(leaves.serialize(), "100001-100004,100006-100007")
+
+		leaves.add(100005)
+		self.assertEqual(leaves.serialize(), "100001-100007")
+		self.assertIn(100005, leaves)
+		self.assertNotIn(100008, leaves)
+
+		leaves.remove(100003)
+		self.assertEqual(leaves.serialize(), "100001-100002,100004-100007")
+		self.assertEqual(len(leaves), 6)
+
+	def test_first_free_leaf_skips_used_and_voided(self):
+		used = LeafSet.parse("1-3,6")
+		voided = LeafSet.parse("4-5")
+		self.assertEqual(first_free_leaf(1, used, voided), 7)
+		self.assertEqual(first_free_leaf(8, used, voided), 8)
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ChequeSummary(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Cheque Summary", ["bank_account", "cheque_date"])
+	frappe.db.add_index("Cheque Summary", ["status", "cheque_date"])
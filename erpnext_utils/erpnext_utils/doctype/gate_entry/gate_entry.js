@@ -53,6 +53,10 @@ frappe.ui.form.on('Gate Entry', {
 									[item.parent_doc, item.item_code, item.gate_entry_item || 'MISSING']);
 							});
 						}
+						if (result.purchase_orders.details.length < result.purchase_orders.total_items) {
+							msg += __('&nbsp;&nbsp;Showing first {0} of {1} items<br>',
+								[result.purchase_orders.details.length, result.purchase_orders.total_items]);
+						}
 						
 						// Purchase Receipts
 						msg += __('<h5>Purchase Receipts</h5>');
@@ -65,6 +69,10 @@ frappe.ui.form.on('Gate Entry', {
 									[item.parent_doc, item.item_code, item.gate_entry_item || 'MISSING']);
 							});
 						}
+						if (result.purchase_receipts.details.length < result.purchase_receipts.total_items) {
+							msg += __('&nbsp;&nbsp;Showing first {0} of {1} items<br>',
+								[result.purchase_receipts.details.length, result.purchase_receipts.total_items]);
+						}
 						
 						// Purchase Invoices
 						msg += __('<h5>Purchase Invoices</h5>');
@@ -77,6 +85,10 @@ frappe.ui.form.on('Gate Entry', {
 									[item.parent_doc, item.item_code, item.gate_entry_item || 'MISSING']);
 							});
 						}
+						if (result.purchase_invoices.details.length < result.purchase_invoices.total_items) {
+							msg += __('&nbsp;&nbsp;Showing first {0} of {1} items<br>',
+								[result.purchase_invoices.details.length, result.purchase_invoices.total_items]);
+						}
 						
 						frappe.msgprint({
 							title: __('Gate Entry Item References Verification'),
@@ -198,6 +210,10 @@ function show_material_request_dialog(frm) {
 	// Get Material Requests
 	frappe.call({
 		method: 'erpnext_utils.erpnext_utils.doctype.gate_entry.gate_entry.get_material_requests_for_gate_entry',
+		args: {
+			company: frm.doc.company,
+			limit: 1
+		},
 		callback: function(r) {
 			if (r.exc) return;
 			
@@ -207,26 +223,26 @@ function show_material_request_dialog(frm) {
 					title: __('Select Material Request'),
 					fields: [
 						{
-							label: __('Material Request'),
-							fieldname: 'material_request',
-							fieldtype: 'Link',
-							options: 'Material Request',
+							label: __('Material Requests'),
+							fieldname: 'material_requests',
+							fieldtype: 'MultiSelectList',
 							reqd: 1,
-							get_query: function() {
-								return {
-									filters: {
-										'material_request_type': 'Purchase',
-										'status': ['in', ['Pending', 'Partially Ordered']],
-										'docstatus': 1
-									}
-								};
+							get_data: function(txt) {
+								return frappe.xcall('erpnext_utils.erpnext_utils.doctype.gate_entry.gate_entry.get_material_requests_for_gate_entry', {
+									txt: txt,
+									company: frm.doc.company
+								}).then(function(material_requests) {
+									return material_requests.map(function(mr) {
+										return {value: mr.name, description: mr.title};
+									});
+								});
 							}
 						}
 					],
 					primary_action_label: __('Get Items'),
 					primary_action: function(values) {
-						if (values.material_request) {
-							get_items_from_material_request(frm, values.material_request);
+						if (values.material_requests && values.material_requests.length) {
+							get_items_from_material_requests(frm, values.material_requests);
 							dialog.hide();
 						}
 					}
@@ -240,26 +256,36 @@ function show_material_request_dialog(frm) {
 	});
 }
 
-function get_items_from_material_request(frm, material_request) {
+function get_items_from_material_requests(frm, material_requests) {
 	frappe.call({
 		method: 'erpnext_utils.erpnext_utils.doctype.gate_entry.gate_entry.get_material_request_items',
 		args: {
-			material_request: material_request
+			material_requests: material_requests
 		},
 		callback: function(r) {
 			if (r.exc) return;
 			
-			if (r.message && r.message.length > 0) {
-				// Clear existing items
-				frm.clear_table('items');
-				
-				// Add items from Material Request
-				r.message.forEach(function(item) {
+			var items_by_mr = r.message || {};
+			var added = material_requests.filter(function(material_request) {
+				return (items_by_mr[material_request] || []).length > 0;
+			});
+			
+			if (!added.length) {
+				frappe.msgprint(__('No items found in Material Request {0} or all items are already ordered', [material_requests.join(', ')]));
+				return;
+			}
+			
+			// Clear existing items
+			frm.clear_table('items');
+			
+			// Add items from the Material Requests, in the order they were picked
+			material_requests.forEach(function(material_request) {
+				(items_by_mr[material_request] || []).forEach(function(item) {
 					var row = frm.add_child('items');
 					row.item_code = item.item_code;
 					row.item_name = item.item_name;
 					row.description = item.description;
-					row.qty = item.stock_qty; // Use stock_qty as it's the actual requested quantity
+					row.qty = flt(item.stock_qty) - flt(item.ordered_qty); // Qty still to be ordered
 					row.uom = item.uom;
 					row.material_request = material_request;
 					row.material_request_item = item.name;
@@ -267,13 +293,11 @@ function get_items_from_material_request(frm, material_request) {
 					row.rate = item.rate || 0;
 					row.amount = flt(row.qty) * flt(row.rate);
 				});
-				
-				frm.refresh_field('items');
-				frm.calculate_totals();
-				frappe.msgprint(__('Items added from Material Request {0}', [material_request]));
-			} else {
-				frappe.msgprint(__('No items found in Material Request {0} or all items are already ordered', [material_request]));
-			}
+			});
+			
+			frm.refresh_field('items');
+			frm.calculate_totals();
+			frappe.msgprint(__('Items added from Material Request {0}', [added.join(', ')]));
 		}
 	});
 }
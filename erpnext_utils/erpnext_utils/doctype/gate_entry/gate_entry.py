@@ -5,7 +5,22 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 from frappe.model.mapper import get_mapped_doc
-from frappe.utils import flt, getdate
+from frappe.utils import cint, flt, getdate
+
+from erpnext_utils.erpnext_utils.controllers.gate_entry_audit import (
+	DEFAULT_PAGE_LENGTH,
+	UPSTREAM_REFERENCE_FIELDS,
+	get_reference_counts,
+	get_reference_details,
+)
+from erpnext_utils.erpnext_utils.controllers.gate_entry_links import LINKED_ITEM_TABLES, get_gate_entry_links
+from erpnext_utils.erpnext_utils.controllers.material_requests import (
+	DEFAULT_LIMIT,
+	get_material_request_item_coverage,
+	get_pending_material_request_items,
+	search_open_material_requests,
+	update_material_request_statuses,
+)
 
 
 class GateEntry(Document):
@@ -58,6 +73,36 @@ class GateEntry(Document):
 			if not item.qty or item.qty <= 0:
 				frappe.throw(_("Quantity must be greater than 0 for item {0}").format(item.item_code))
 
+		self.validate_material_request_items()
+
+	def validate_material_request_items(self):
+		"""
+		Check every Material Request link with one query, including the qty still to be ordered.
+
+		As in the Material Request status, an item is covered up to the larger
+		of its ordered qty and the qty on other submitted Gate Entries.
+		"""
+		linked = [item for item in self.items if item.material_request and item.material_request_item]
+		if not linked:
+			return
+
+		mr_items = get_material_request_item_coverage(
+			{item.material_request_item for item in linked}, gate_entry=self.name
+		)
+
+		qty_by_mr_item = {}
+		for item in linked:
+			item.validate_material_request(mr_items.get(item.material_request_item))
+			qty_by_mr_item[item.material_request_item] = qty_by_mr_item.get(item.material_request_item, 0) + flt(item.qty)
+
+		for name, qty in qty_by_mr_item.items():
+			mr_item = mr_items[name]
+			remaining_qty = flt(mr_item.stock_qty) - flt(mr_item.covered_qty)
+			if flt(qty, 6) > flt(remaining_qty, 6):
+				frappe.throw(_("Qty {0} of item {1} exceeds the {2} still to be ordered or gated on Material Request {3}").format(
+					qty, mr_item.item_code, remaining_qty, mr_item.parent
+				))
+
 	def calculate_totals(self):
 		total_qty = 0
 		total_amount = 0
@@ -84,18 +129,8 @@ class GateEntry(Document):
 		self.update_material_request_status()
 
 	def update_material_request_status(self):
-		"""Update status of linked Material Requests"""
-		material_requests = set()
-		for item in self.items:
-			if item.material_request:
-				material_requests.add(item.material_request)
-
-		for mr in material_requests:
-			# Update Material Request status based on Gate Entry status
-			if self.status == "Submitted":
-				frappe.db.set_value("Material Request", mr, "status", "Partially Ordered")
-			elif self.status == "Cancelled":
-				frappe.db.set_value("Material Request", mr, "status", "Pending")
+		"""Recompute the status of linked Material Requests from their quantities"""
+		update_material_request_statuses([item.material_request for item in self.items if item.material_request])
 
 
 @frappe.whitelist()
@@ -133,114 +168,84 @@ def make_purchase_order_from_gate_entry(source_name, target_doc=None):
 		postprocess,
 	)
 
-	# Debug: Print the mapped items to verify gate_entry_item is set
-	if doclist and hasattr(doclist, 'items'):
-		for item in doclist.items:
-			frappe.logger().info(f"PO Item {item.item_code}: gate_entry={item.gate_entry}, gate_entry_item={item.gate_entry_item}")
-
 	return doclist
 
 
 @frappe.whitelist()
 def get_gate_entry_dashboard_data(name):
 	"""Get dashboard data for Gate Entry"""
-	doc = frappe.get_doc("Gate Entry", name)
-	
-	# Get linked Purchase Orders
-	purchase_orders = frappe.get_all(
-		"Purchase Order Item",
-		filters={"gate_entry": name},
-		fields=["parent"],
-		distinct=True
-	)
-	
-	# Get linked Purchase Receipts
-	purchase_receipts = frappe.get_all(
-		"Purchase Receipt Item",
-		filters={"gate_entry": name},
-		fields=["parent"],
-		distinct=True
-	)
-	
-	# Get linked Purchase Invoices
-	purchase_invoices = frappe.get_all(
-		"Purchase Invoice Item",
-		filters={"gate_entry": name},
-		fields=["parent"],
-		distinct=True
-	)
+	frappe.has_permission("Gate Entry", "read", name, throw=True)
 
-	return {
-		"purchase_orders": [po.parent for po in purchase_orders],
-		"purchase_receipts": [pr.parent for pr in purchase_receipts],
-		"purchase_invoices": [pi.parent for pi in purchase_invoices],
-	}
+	return get_gate_entry_links([name])[name]
 
 
 @frappe.whitelist()
-def get_material_requests_for_gate_entry():
-	"""Get Material Requests that can be used for Gate Entry"""
-	# Get Material Requests with Purchase type and pending/partially ordered status
-	material_requests = frappe.get_all(
-		"Material Request",
-		filters={
-			"material_request_type": "Purchase",
-			"status": ["in", ["Pending", "Partially Ordered"]],
-			"docstatus": 1
-		},
-		fields=["name", "title", "transaction_date", "schedule_date", "status"],
-		order_by="transaction_date desc"
-	)
-	
-	return material_requests
+def get_gate_entry_dashboard_data_for_list(names):
+	"""Dashboard data for a page of Gate Entries, keyed by Gate Entry name"""
+	names = frappe.parse_json(names) if isinstance(names, str) else names
+	frappe.has_permission("Gate Entry", "read", throw=True)
+
+	return get_gate_entry_links(names)
+
+
+@frappe.whitelist()
+def get_material_requests_for_gate_entry(txt=None, company=None, warehouse=None, limit=DEFAULT_LIMIT, cursor=None):
+	"""
+	Get Material Requests that can be used for Gate Entry.
+
+	Submitted Purchase Material Requests in Pending/Partially Ordered status,
+	newest first. Pass the transaction_date and name of the last row as
+	`cursor` to get the next page.
+	"""
+	frappe.has_permission("Material Request", "read", throw=True)
+
+	return search_open_material_requests(txt, company, warehouse, limit, cursor)
 
 
 @frappe.whitelist()
-def get_material_request_items(material_request):
-	"""Get items from a specific Material Request"""
-	if not material_request:
+def get_material_request_items(material_request=None, material_requests=None, fields=None):
+	"""
+	Get the items still to be ordered from Material Requests.
+
+	:param material_request: One Material Request; returns a list of items.
+	:param material_requests: List (or JSON list) of Material Requests;
+		returns {Material Request: [items]} from one query.
+	:param fields: Optional list of Material Request Item fields to return.
+	"""
+	if not material_request and not material_requests:
 		return []
-	
-	# Get Material Request Items - for pending MRs, ordered_qty is 0, so we check if stock_qty > 0
-	items = frappe.get_all(
-		"Material Request Item",
-		filters={
-			"parent": material_request,
-			"stock_qty": [">", 0]
-		},
-		fields=[
-			"name",
-			"item_code",
-			"item_name",
-			"description",
-			"qty",
-			"stock_qty",
-			"ordered_qty",
-			"uom",
-			"warehouse",
-			"rate"
-		]
-	)
-	
-	# Filter items where ordered_qty < stock_qty (meaning there are still items to be ordered)
-	filtered_items = []
-	for item in items:
-		if flt(item.ordered_qty) < flt(item.stock_qty):
-			filtered_items.append(item)
-	
-	return filtered_items
+
+	frappe.has_permission("Material Request", "read", throw=True)
+	fields = frappe.parse_json(fields) if isinstance(fields, str) else fields
+
+	if material_requests:
+		material_requests = frappe.parse_json(material_requests) if isinstance(material_requests, str) else material_requests
+		return get_pending_material_request_items(material_requests, fields)
+
+	return get_pending_material_request_items([material_request], fields)[material_request]
 
 
 @frappe.whitelist()
 def make_gate_entry_from_material_request(source_name, target_doc=None):
-	"""Create Gate Entry from Material Request"""
+	"""Create Gate Entry from Material Request, with the qty not yet ordered or gated"""
+	coverage = get_material_request_item_coverage(material_request=source_name)
+
 	def postprocess(source, target_doc):
 		target_doc.gate_entry_type = "Inward"
 		target_doc.gate_entry_date = frappe.utils.today()
 		target_doc.company = frappe.defaults.get_user_default("Company")
 
+	def get_remaining_qty(source):
+		row = coverage.get(source.name)
+		covered_qty = row.covered_qty if row else source.ordered_qty
+		return flt(source.stock_qty) - flt(covered_qty)
+
 	def select_item(d):
-		return d.ordered_qty < d.stock_qty
+		return get_remaining_qty(d) > 0
+
+	def update_item(source, target, source_parent):
+		target.qty = get_remaining_qty(source)
+		target.amount = target.qty * (target.rate or 0)
 
 	doclist = get_mapped_doc(
 		"Material Request",
@@ -271,111 +276,44 @@ def make_gate_entry_from_material_request(source_name, target_doc=None):
 	return doclist
 
 
-def update_item(source, target, source_parent):
-	target.amount = target.qty * (target.rate or 0)
-
-
 @frappe.whitelist()
-def verify_gate_entry_item_references(gate_entry_name):
-	"""Verify that all procurement documents have correct Gate Entry Item references"""
-	# Get all Purchase Order Items that reference this Gate Entry
-	po_items = frappe.get_all(
-		"Purchase Order Item",
-		filters={"gate_entry": gate_entry_name},
-		fields=["name", "parent", "item_code", "gate_entry", "gate_entry_item", "material_request", "material_request_item"]
-	)
-	
-	# Get all Purchase Receipt Items that reference this Gate Entry
-	pr_items = frappe.get_all(
-		"Purchase Receipt Item",
-		filters={"gate_entry": gate_entry_name},
-		fields=["name", "parent", "item_code", "gate_entry", "gate_entry_item", "purchase_order", "purchase_order_item"]
-	)
-	
-	# Get all Purchase Invoice Items that reference this Gate Entry
-	pi_items = frappe.get_all(
-		"Purchase Invoice Item",
-		filters={"gate_entry": gate_entry_name},
-		fields=["name", "parent", "item_code", "gate_entry", "gate_entry_item", "purchase_receipt", "pr_detail"]
-	)
-	
-	result = {
-		"gate_entry": gate_entry_name,
-		"purchase_orders": {
-			"total_items": len(po_items),
-			"items_with_gate_entry_item": 0,
-			"items_without_gate_entry_item": 0,
-			"details": []
-		},
-		"purchase_receipts": {
-			"total_items": len(pr_items),
-			"items_with_gate_entry_item": 0,
-			"items_without_gate_entry_item": 0,
-			"details": []
-		},
-		"purchase_invoices": {
-			"total_items": len(pi_items),
-			"items_with_gate_entry_item": 0,
-			"items_without_gate_entry_item": 0,
-			"details": []
+def verify_gate_entry_item_references(gate_entry_name, counts_only=0, start=0, page_length=DEFAULT_PAGE_LENGTH):
+	"""
+	Verify that all procurement documents have correct Gate Entry Item references.
+
+	:param counts_only: Return only the item counts, without details.
+	:param start: Offset of the details page, per document type.
+	:param page_length: Detail rows returned per document type.
+	"""
+	frappe.has_permission("Gate Entry", "read", gate_entry_name, throw=True)
+
+	counts = get_reference_counts(gate_entry_name)
+	result = {"gate_entry": gate_entry_name, "start": cint(start), "page_length": cint(page_length) or DEFAULT_PAGE_LENGTH}
+
+	for doctype, key in LINKED_ITEM_TABLES.items():
+		total_items, items_with_gate_entry_item = counts.get(key, (0, 0))
+		result[key] = {
+			"total_items": total_items,
+			"items_with_gate_entry_item": items_with_gate_entry_item,
+			"items_without_gate_entry_item": total_items - items_with_gate_entry_item,
+			"details": [],
 		}
-	}
-	
-	# Process Purchase Order Items
-	for item in po_items:
-		item_detail = {
-			"item_name": item.name,
-			"parent_doc": item.parent,
-			"item_code": item.item_code,
-			"gate_entry": item.gate_entry,
-			"gate_entry_item": item.gate_entry_item,
-			"material_request": item.material_request,
-			"material_request_item": item.material_request_item
-		}
-		
-		if item.gate_entry_item:
-			result["purchase_orders"]["items_with_gate_entry_item"] += 1
-		else:
-			result["purchase_orders"]["items_without_gate_entry_item"] += 1
-			
-		result["purchase_orders"]["details"].append(item_detail)
-	
-	# Process Purchase Receipt Items
-	for item in pr_items:
-		item_detail = {
-			"item_name": item.name,
-			"parent_doc": item.parent,
-			"item_code": item.item_code,
-			"gate_entry": item.gate_entry,
-			"gate_entry_item": item.gate_entry_item,
-			"purchase_order": item.purchase_order,
-			"purchase_order_item": item.purchase_order_item
-		}
-		
-		if item.gate_entry_item:
-			result["purchase_receipts"]["items_with_gate_entry_item"] += 1
-		else:
-			result["purchase_receipts"]["items_without_gate_entry_item"] += 1
-			
-		result["purchase_receipts"]["details"].append(item_detail)
-	
-	# Process Purchase Invoice Items
-	for item in pi_items:
-		item_detail = {
-			"item_name": item.name,
-			"parent_doc": item.parent,
-			"item_code": item.item_code,
-			"gate_entry": item.gate_entry,
-			"gate_entry_item": item.gate_entry_item,
-			"purchase_receipt": item.purchase_receipt,
-			"pr_detail": item.pr_detail
-		}
-		
-		if item.gate_entry_item:
-			result["purchase_invoices"]["items_with_gate_entry_item"] += 1
-		else:
-			result["purchase_invoices"]["items_without_gate_entry_item"] += 1
-			
-		result["purchase_invoices"]["details"].append(item_detail)
-	
+
+		if cint(counts_only) or not total_items:
+			continue
+
+		for item in get_reference_details(gate_entry_name, doctype, start, page_length):
+			upstream_doc, upstream_row = UPSTREAM_REFERENCE_FIELDS[doctype]
+			result[key]["details"].append(
+				{
+					"item_name": item.name,
+					"parent_doc": item.parent,
+					"item_code": item.item_code,
+					"gate_entry": item.gate_entry,
+					"gate_entry_item": item.gate_entry_item,
+					upstream_doc: item.get(upstream_doc),
+					upstream_row: item.get(upstream_row),
+				}
+			)
+
 	return result
@@ -0,0 +1,41 @@
+// Copyright (c) 2025, SpotLedger and Contributors
+// License: MIT. See license.txt
+
+frappe.listview_settings['Gate Entry'] = {
+	onload: function(listview) {
+		listview.page.add_actions_menu_item(__('Create Purchase Orders'), function() {
+			var gate_entries = listview.get_checked_items(true);
+			if (!gate_entries.length) return;
+
+			frappe.call({
+				method: 'erpnext_utils.erpnext_utils.controllers.gate_entry_purchase_orders.make_purchase_orders_from_gate_entries',
+				args: {
+					gate_entries: gate_entries
+				},
+				callback: function(r) {
+					if (r.exc) return;
+					frappe.show_alert({
+						message: __('Creating Purchase Orders for {0} Gate Entries in the background', [gate_entries.length]),
+						indicator: 'blue'
+					});
+				}
+			});
+		});
+
+		frappe.realtime.on('gate_entry_purchase_orders_complete', function(summary) {
+			var msg = __('{0} Purchase Orders created', [summary.created.length]);
+			summary.created.forEach(function(row) {
+				msg += '<br>' + __('{0}: {1} ({2} items)', [row.purchase_order, row.supplier, row.items]);
+			});
+			summary.failed.forEach(function(row) {
+				msg += '<br>' + __('Failed for {0}: {1}', [row.supplier, row.error]);
+			});
+			frappe.msgprint({
+				title: __('Purchase Orders from Gate Entries'),
+				message: msg,
+				indicator: summary.failed.length ? 'orange' : 'green'
+			});
+			listview.refresh();
+		});
+	}
+};
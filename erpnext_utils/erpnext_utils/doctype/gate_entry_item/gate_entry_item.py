@@ -32,23 +32,22 @@ class GateEntryItem(Document):
 	# end: auto-generated types
 
 	def validate(self):
-		self.validate_material_request()
 		self.calculate_amount()
 
-	def validate_material_request(self):
-		"""Validate Material Request and Item linkage"""
-		if self.material_request and self.material_request_item:
-			# Check if the Material Request Item exists and matches
-			mr_item = frappe.get_doc("Material Request Item", self.material_request_item)
-			if mr_item.parent != self.material_request:
-				frappe.throw(_("Material Request Item {0} does not belong to Material Request {1}").format(
-					self.material_request_item, self.material_request
-				))
-			
-			if mr_item.item_code != self.item_code:
-				frappe.throw(_("Item Code {0} does not match Material Request Item {1}").format(
-					self.item_code, self.material_request_item
-				))
+	def validate_material_request(self, mr_item):
+		"""Validate Material Request and Item linkage against the prefetched Material Request Item"""
+		if not mr_item:
+			frappe.throw(_("Row {0}: Material Request Item {1} not found").format(self.idx, self.material_request_item))
+
+		if mr_item.parent != self.material_request:
+			frappe.throw(_("Material Request Item {0} does not belong to Material Request {1}").format(
+				self.material_request_item, self.material_request
+			))
+
+		if mr_item.item_code != self.item_code:
+			frappe.throw(_("Item Code {0} does not match Material Request Item {1}").format(
+				self.item_code, self.material_request_item
+			))
 
 	def calculate_amount(self):
 		"""Calculate amount based on qty and rate"""
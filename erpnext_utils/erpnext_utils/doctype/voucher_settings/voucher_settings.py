@@ -3,7 +3,9 @@
 
 import frappe
 from frappe.model.document import Document
+from erpnext_utils.erpnext_utils.controllers.settings_cache import clear_voucher_settings_cache
 
 
 class VoucherSettings(Document):
-	pass
\ No newline at end of file
+	def on_update(self):
+		clear_voucher_settings_cache()
@@ -1,177 +1,164 @@
 import frappe
 from frappe.utils import flt, today
 
+from erpnext_utils.erpnext_utils.controllers.cheque_books import (
+	get_cheque_book_for_number,
+	is_leaf_used,
+	mark_cheque_leaf_used,
+)
+from erpnext_utils.erpnext_utils.controllers.settings_cache import is_cheque_mode_of_payment
+
+
+def is_cheque_payment(doc):
+	"""Outgoing payment (payment type "Pay") made with a cheque Mode of Payment"""
+	return doc.payment_type == "Pay" and is_cheque_mode_of_payment(doc.mode_of_payment)
+
 
 def validate_cheque_details(doc, method=None):
 	"""Validate cheque details if mode of payment is Cheque"""
-	try:
-		# Only validate for payment type "Pay" (outgoing payments)
-		if doc.payment_type != "Pay":
-			return
-		
-		mode_of_payment = frappe.db.get_value("Mode of Payment", doc.mode_of_payment, "name") if doc.mode_of_payment else None
-		
-		if not mode_of_payment:
-			return
-		
-		# Check if this is a cheque payment by checking if the mode of payment name contains "Cheque"
-		mode_name = mode_of_payment.lower() if isinstance(mode_of_payment, str) else ""
-		is_cheque = "cheque" in mode_name or "check" in mode_name
-		
-		if not is_cheque:
-			return
-		
-		# Validate cheque-specific fields
-		if not doc.reference_no:
-			frappe.throw("Cheque Number (Reference No) is mandatory for Cheque payments")
-		
-		if not doc.reference_date:
-			frappe.throw("Cheque Date (Reference Date) is mandatory for Cheque payments")
-		
-		if not doc.party_type:
-			frappe.throw("Party Type is mandatory for Cheque payments")
-		
-		if not doc.party:
-			frappe.throw("Party is mandatory for Cheque payments")
-		
-		# Validate and fetch correct cheque book
-		validate_and_fetch_cheque_book(doc)
-		
-	except Exception as e:
-		raise
+	if not is_cheque_payment(doc):
+		return
 
+	# Validate cheque-specific fields
+	if not doc.reference_no:
+		frappe.throw("Cheque Number (Reference No) is mandatory for Cheque payments")
+
+	if not doc.reference_date:
+		frappe.throw("Cheque Date (Reference Date) is mandatory for Cheque payments")
+
+	if not doc.party_type:
+		frappe.throw("Party Type is mandatory for Cheque payments")
+
+	if not doc.party:
+		frappe.throw("Party is mandatory for Cheque payments")
+
+	# Validate and fetch correct cheque book
+	validate_and_fetch_cheque_book(doc)
+
+
+def get_cheque_context(doc):
+	"""
+	Resolve the Bank Account and Cheque Book of a cheque Payment Entry.
+
+	Cached in doc.flags so validate and on_submit of the same request share
+	one lookup; it is resolved again if paid_from or reference_no change.
+	"""
+	key = (doc.paid_from, doc.reference_no)
+	context = doc.flags.cheque_context
+	if context and context.key == key:
+		return context
 
-def validate_and_fetch_cheque_book(doc):
-	"""Validate cheque number and fetch the correct cheque book"""
-	if not doc.reference_no or not doc.paid_from:
-		return
-	
 	# Fetch Bank Account using the GL Account (paid_from)
-	bank_account_doc = frappe.db.get_value(
+	bank_account = frappe.db.get_value(
 		"Bank Account",
 		{"account": doc.paid_from, "is_company_account": 1},
-		["name"],
-		as_dict=True
+		"name"
 	)
-	if not bank_account_doc:
+	if not bank_account:
 		frappe.throw(f"Bank Account for GL Account '{doc.paid_from}' not found or not a company account")
-	
-	bank_account = bank_account_doc.name
-	
+
 	# Find cheque book that matches the Bank Account and contains the cheque number
-	cheque_book = frappe.db.get_value(
-		"Cheque Book",
-		{
-			"bank_account": bank_account,
-			"is_active": 1,
-			"start_series": ["<=", doc.reference_no],
-			"end_series": [">=", doc.reference_no]
-		},
-		["name", "start_series", "end_series", "current_series"],
-		as_dict=True
-	)
-	
+	cheque_book = get_cheque_book_for_number(bank_account, doc.reference_no)
 	if not cheque_book:
-		error_msg = f"No active cheque book found for Bank Account '{bank_account}' containing cheque number '{doc.reference_no}'"
-		frappe.throw(error_msg)
-	
-	# Check if cheque number is already used
-	existing_cheque = frappe.db.exists(
-		"Cheque",
-		{
-			"cheque_number": doc.reference_no,
-			"cheque_book": cheque_book.name
-		}
-	)
-	
-	if existing_cheque:
-		error_msg = f"Cheque number '{doc.reference_no}' is already used in cheque book '{cheque_book.name}'"
+		frappe.throw(
+			f"No active cheque book found for Bank Account '{bank_account}' "
+			f"containing cheque number '{doc.reference_no}'"
+		)
+
+	doc.flags.cheque_context = make_cheque_context(doc, bank_account, cheque_book)
+	return doc.flags.cheque_context
+
+
+def make_cheque_context(doc, bank_account, cheque_book):
+	return frappe._dict(key=(doc.paid_from, doc.reference_no), bank_account=bank_account, cheque_book=cheque_book)
+
+
+def validate_and_fetch_cheque_book(doc):
+	"""Validate cheque number and fetch the correct cheque book"""
+	if not doc.reference_no or not doc.paid_from:
+		return
+
+	context = get_cheque_context(doc)
+
+	# In a payment run the book is already locked and its leaves are in memory
+	batch = frappe.flags.cheque_batch
+	if batch and batch.has_cheque_book(context.cheque_book):
+		leaf_used = batch.is_leaf_used(context.cheque_book, doc.reference_no)
+	else:
+		cheque_book = frappe.db.get_value(
+			"Cheque Book",
+			context.cheque_book,
+			["name", "used_leaves", "voided_leaves"],
+			as_dict=True
+		)
+		leaf_used = is_leaf_used(cheque_book, doc.reference_no)
+
+	# Check if cheque number is already used (or voided) in the book's leaf sets
+	if leaf_used:
+		error_msg = f"Cheque number '{doc.reference_no}' is already used in cheque book '{context.cheque_book}'"
 		frappe.throw(error_msg)
-	
+
 	# Store the cheque book name for later use
-	doc.cheque_book_name = cheque_book.name
-	doc.bank_account_name = bank_account
+	doc.cheque_book_name = context.cheque_book
+	doc.bank_account_name = context.bank_account
 
 
 def on_submit_cheque_creation(doc, method=None):
 	"""Create cheque record on submission of Payment Entry"""
-	try:
-		# Only for payment type "Pay" (outgoing payments)
-		if doc.payment_type != "Pay":
-			return
-		
-		mode_of_payment = frappe.db.get_value("Mode of Payment", doc.mode_of_payment, "name") if doc.mode_of_payment else None
-		if not mode_of_payment:
-			return
-		
-		# Check if this is a cheque payment
-		mode_name = mode_of_payment.lower() if isinstance(mode_of_payment, str) else ""
-		is_cheque = "cheque" in mode_name or "check" in mode_name
-		
-		if not is_cheque:
-			return
-		
-		# Create cheque record
-		create_cheque_record(doc)
-		
-	except Exception as e:
-		raise
+	if not is_cheque_payment(doc):
+		return
+
+	# Create cheque record
+	create_cheque_record(doc)
 
 
 def create_cheque_record(doc):
 	"""Create cheque record for cheque payments"""
-	try:
-		cheque_doc = frappe.new_doc("Cheque")
-		
-		# Fetch Bank Account using the GL Account (paid_from)
-		bank_account_doc = frappe.db.get_value(
-			"Bank Account",
-			{"account": doc.paid_from, "is_company_account": 1},
-			["name"],
-			as_dict=True
-		)
-		if not bank_account_doc:
-			frappe.throw(f"Bank Account for GL Account '{doc.paid_from}' not found or not a company account")
-		
-		# Map fields from Payment Entry to Cheque
-		cheque_doc.cheque_number = doc.reference_no
-		cheque_doc.cheque_date = doc.reference_date
-		cheque_doc.party_type = doc.party_type
-		cheque_doc.party = doc.party
-		cheque_doc.status = "Unpresented"
-		cheque_doc.cheque_type = "Issued"
-		cheque_doc.amount = doc.paid_amount
-		cheque_doc.bank_account = bank_account_doc.name
-		
-		# Validate cheque number is provided
-		if not doc.reference_no:
-			frappe.throw("Cheque Number is required to create cheque record")
-		
-		# Fetch cheque book using bank_account GL Account and cheque_number range
-		cheque_book = frappe.db.get_value(
-			"Cheque Book",
-			{
-				"bank_account": bank_account_doc.name,
-				"is_active": 1,
-				"start_series": ["<=", doc.reference_no],
-				"end_series": [">=", doc.reference_no]
-			},
-			["name", "start_series", "end_series"],
-			as_dict=True
-		)
-		
-		if cheque_book:
-			cheque_doc.cheque_book = cheque_book.name
-		else:
-			frappe.throw(
-				f"No active cheque book found for Bank Account '{bank_account_doc.name}' "
-				f"containing cheque number '{doc.reference_no}'"
-			)
-		
-		# The bank_account field will be automatically fetched from cheque_book.bank_account
-		# due to the fetch_from configuration in the Cheque DocType
-		cheque_doc.insert()
-		
-	except Exception as e:
-		error_msg = f"Error creating cheque record for Payment Entry {doc.name}: {str(e)}"
-		raise
+	# Validate cheque number is provided
+	if not doc.reference_no:
+		frappe.throw("Cheque Number is required to create cheque record")
+
+	# Resolved during validate in the same request
+	context = get_cheque_context(doc)
+
+	# Map fields from Payment Entry to Cheque
+	values = {
+		"cheque_number": doc.reference_no,
+		"cheque_date": doc.reference_date,
+		"party_type": doc.party_type,
+		"party": doc.party,
+		"status": "Unpresented",
+		"cheque_type": "Issued",
+		"amount": doc.paid_amount,
+		"bank_account": context.bank_account,
+		"cheque_book": context.cheque_book,
+		"reference_doctype": doc.doctype,
+		"reference_name": doc.name,
+	}
+
+	# In a payment run the leaf is reserved in memory and the Cheque is
+	# written with the batch's bulk insert
+	batch = frappe.flags.cheque_batch
+	if batch and batch.has_cheque_book(context.cheque_book):
+		batch.add_cheque(doc, context.cheque_book, values)
+		return
+
+	cheque_doc = frappe.new_doc("Cheque")
+	cheque_doc.update(values)
+
+	# Reserve the leaf under a row lock on the Cheque Book
+	mark_cheque_leaf_used(context.cheque_book, doc.reference_no)
+
+	# The bank_account field will be automatically fetched from cheque_book.bank_account
+	# due to the fetch_from configuration in the Cheque DocType
+	cheque_doc.insert()
+
+
+def on_cancel_cheque_cancellation(doc, method=None):
+	"""Cancel the cheque record created for this Payment Entry"""
+	from erpnext_utils.erpnext_utils.controllers.voucher_cancellation import cancel_linked_cheques
+
+	if doc.payment_type != "Pay":
+		return
+
+	cancel_linked_cheques(doc.doctype, [doc])
@@ -3,20 +3,44 @@
 
 import frappe
 from frappe import _
-from frappe.model.mapper import get_mapped_doc
+from frappe.model.mapper import get_mapped_doc, map_child_doc, map_doc
+
+PURCHASE_ORDER_TO_RECEIPT_ITEM_MAP = {
+	"doctype": "Purchase Receipt Item",
+	"field_map": {
+		"name": "purchase_order_item",
+		"parent": "purchase_order",
+		"bom": "bom",
+		"material_request": "material_request",
+		"material_request_item": "material_request_item",
+		"sales_order": "sales_order",
+		"sales_order_item": "sales_order_item",
+		"wip_composite_asset": "wip_composite_asset",
+		# Gate Entry references
+		"gate_entry": "gate_entry",
+		"gate_entry_item": "gate_entry_item",
+	},
+}
+
+# Purchase Order fields that must match to receive several orders on one Purchase Receipt
+CONSOLIDATION_FIELDS = ("supplier", "company", "currency", "conversion_rate", "buying_price_list")
+
+
+def update_receipt_item(obj, target, source_parent):
+	pending_qty = frappe.utils.flt(obj.qty) - frappe.utils.flt(obj.received_qty)
+	target.qty = pending_qty
+	target.stock_qty = pending_qty * frappe.utils.flt(obj.conversion_factor)
+	target.amount = pending_qty * frappe.utils.flt(obj.rate)
+	target.base_amount = pending_qty * frappe.utils.flt(obj.rate) * frappe.utils.flt(source_parent.conversion_rate)
+
+
+def is_receivable(item):
+	return abs(item.received_qty) < abs(item.qty) and item.delivered_by_supplier != 1
 
 
 @frappe.whitelist()
 def make_purchase_receipt(source_name, target_doc=None):
 	"""Override ERPNext's make_purchase_receipt to include Gate Entry references"""
-	def update_item(obj, target, source_parent):
-		target.qty = frappe.utils.flt(obj.qty) - frappe.utils.flt(obj.received_qty)
-		target.stock_qty = (frappe.utils.flt(obj.qty) - frappe.utils.flt(obj.received_qty)) * frappe.utils.flt(obj.conversion_factor)
-		target.amount = (frappe.utils.flt(obj.qty) - frappe.utils.flt(obj.received_qty)) * frappe.utils.flt(obj.rate)
-		target.base_amount = (
-			(frappe.utils.flt(obj.qty) - frappe.utils.flt(obj.received_qty)) * frappe.utils.flt(obj.rate) * frappe.utils.flt(source_parent.conversion_rate)
-		)
-
 	def set_missing_values(source, target):
 		target.run_method("calculate_taxes_and_totals")
 
@@ -32,23 +56,9 @@ def make_purchase_receipt(source_name, target_doc=None):
 				},
 			},
 			"Purchase Order Item": {
-				"doctype": "Purchase Receipt Item",
-				"field_map": {
-					"name": "purchase_order_item",
-					"parent": "purchase_order",
-					"bom": "bom",
-					"material_request": "material_request",
-					"material_request_item": "material_request_item",
-					"sales_order": "sales_order",
-					"sales_order_item": "sales_order_item",
-					"wip_composite_asset": "wip_composite_asset",
-					# Gate Entry references
-					"gate_entry": "gate_entry",
-					"gate_entry_item": "gate_entry_item",
-				},
-				"postprocess": update_item,
-				"condition": lambda doc: abs(doc.received_qty) < abs(doc.qty)
-				and doc.delivered_by_supplier != 1,
+				**PURCHASE_ORDER_TO_RECEIPT_ITEM_MAP,
+				"postprocess": update_receipt_item,
+				"condition": is_receivable,
 			},
 			"Purchase Taxes and Charges": {"doctype": "Purchase Taxes and Charges", "reset_value": True},
 		},
@@ -57,3 +67,120 @@ def make_purchase_receipt(source_name, target_doc=None):
 	)
 
 	return doc
+
+
+@frappe.whitelist()
+def make_purchase_receipt_from_orders(source_names):
+	"""
+	One Purchase Receipt for several Purchase Orders of the same supplier.
+
+	Orders, items and taxes are each read with one query. Taxes and totals
+	are calculated once on the merged receipt.
+
+	:param source_names: List (or JSON list) of submitted Purchase Orders.
+	"""
+	source_names = frappe.parse_json(source_names) if isinstance(source_names, str) else source_names
+	source_names = list(dict.fromkeys(source_names))
+	if not source_names:
+		frappe.throw(_("Please select at least one Purchase Order"))
+
+	orders = {
+		row.name: frappe.get_doc({**row, "doctype": "Purchase Order"})
+		for row in frappe.get_list("Purchase Order", filters={"name": ["in", source_names]}, fields=["*"])
+	}
+	missing = [name for name in source_names if name not in orders]
+	if missing:
+		frappe.throw(_("Purchase Order {0} not found").format(", ".join(missing)))
+
+	validate_orders_for_consolidation([orders[name] for name in source_names])
+	position = {name: idx for idx, name in enumerate(source_names)}
+
+	target = frappe.new_doc("Purchase Receipt")
+	map_doc(
+		orders[source_names[0]],
+		target,
+		{"doctype": "Purchase Receipt", "field_map": {"supplier_warehouse": "supplier_warehouse"}},
+	)
+
+	item_map = {**PURCHASE_ORDER_TO_RECEIPT_ITEM_MAP, "postprocess": update_receipt_item}
+	items = frappe.get_all("Purchase Order Item", filters={"parent": ["in", source_names]}, fields=["*"])
+	for row in sorted(items, key=lambda item: (position[item.parent], item.idx)):
+		item = frappe.get_doc({**row, "doctype": "Purchase Order Item"})
+		if is_receivable(item):
+			map_child_doc(item, target, item_map, orders[item.parent])
+
+	if not target.get("items"):
+		frappe.throw(_("All items have already been received"))
+
+	taxes = frappe.get_all(
+		"Purchase Taxes and Charges",
+		filters={"parent": ["in", source_names], "parenttype": "Purchase Order"},
+		fields=["*"],
+	)
+	merge_source_taxes(sorted(taxes, key=lambda tax: (position[tax.parent], tax.idx)), target, orders)
+
+	target.run_method("calculate_taxes_and_totals")
+	target.set_onload("load_after_mapping", True)
+
+	return target
+
+
+def merge_source_taxes(taxes, target, sources):
+	"""
+	Map the tax rows of several source documents onto one target, in source order.
+
+	Rate based charges that repeat across sources are added once. Actual
+	charges (freight etc.) of the same account add up their amounts.
+	"On Previous Row" charges get their row_id remapped to the target row.
+	"""
+	# (source document, source idx) -> target tax row
+	target_rows = {}
+	# merge key -> target tax row
+	merged = {}
+
+	for row in taxes:
+		row_id = None
+		if row.charge_type in ("On Previous Row Amount", "On Previous Row Total"):
+			referenced = target_rows.get((row.parent, frappe.utils.cint(row.row_id)))
+			if not referenced:
+				frappe.throw(
+					_("Row {0} of the taxes of {1} refers to a missing row {2}").format(row.idx, row.parent, row.row_id)
+				)
+			row_id = str(referenced.idx)
+
+		if row.charge_type == "Actual":
+			key = (row.category, row.charge_type, row.account_head, row.cost_center, row.add_deduct_tax)
+		else:
+			key = (row.category, row.charge_type, row.account_head, row.rate, row.add_deduct_tax, row_id)
+
+		if key in merged:
+			target_row = merged[key]
+			if row.charge_type == "Actual":
+				target_row.tax_amount = frappe.utils.flt(target_row.tax_amount) + frappe.utils.flt(row.tax_amount)
+		else:
+			target_row = map_child_doc(
+				frappe.get_doc({**row, "doctype": "Purchase Taxes and Charges"}),
+				target,
+				{"doctype": "Purchase Taxes and Charges"},
+				sources[row.parent],
+			)
+			if row_id:
+				target_row.row_id = row_id
+			merged[key] = target_row
+
+		target_rows[(row.parent, row.idx)] = target_row
+
+
+def validate_orders_for_consolidation(orders):
+	first = orders[0]
+	for order in orders:
+		if order.docstatus != 1:
+			frappe.throw(_("Purchase Order {0} must be submitted").format(order.name))
+
+		for fieldname in CONSOLIDATION_FIELDS:
+			if order.get(fieldname) != first.get(fieldname):
+				frappe.throw(
+					_("Purchase Orders {0} and {1} have different {2} and cannot be received together").format(
+						first.name, order.name, frappe.unscrub(fieldname)
+					)
+				)
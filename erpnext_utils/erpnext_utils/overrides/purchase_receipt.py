@@ -2,55 +2,70 @@
 # License: MIT. See license.txt
 
 import frappe
-from frappe.model.mapper import get_mapped_doc
+from frappe import _
+from frappe.model.mapper import get_mapped_doc, map_child_doc, map_doc
 
+from erpnext_utils.erpnext_utils.overrides.purchase_order import merge_source_taxes
 
-@frappe.whitelist()
-def make_purchase_invoice(source_name, target_doc=None, args=None):
-	"""Override ERPNext's make_purchase_invoice to include Gate Entry references"""
-	from erpnext.accounts.party import get_payment_terms_template
-	from erpnext.stock.doctype.purchase_receipt.purchase_receipt import get_returned_qty_map, get_invoiced_qty_map
+PURCHASE_RECEIPT_TO_INVOICE_MAP = {
+	"doctype": "Purchase Invoice",
+	"field_map": {
+		"supplier_warehouse": "supplier_warehouse",
+		"is_return": "is_return",
+		"bill_date": "bill_date",
+	},
+}
 
-	doc = frappe.get_doc("Purchase Receipt", source_name)
-	returned_qty_map = get_returned_qty_map(source_name)
-	invoiced_qty_map = get_invoiced_qty_map(source_name)
+PURCHASE_RECEIPT_TO_INVOICE_ITEM_MAP = {
+	"doctype": "Purchase Invoice Item",
+	"field_map": {
+		"name": "pr_detail",
+		"parent": "purchase_receipt",
+		"qty": "received_qty",
+		"purchase_order_item": "po_detail",
+		"purchase_order": "purchase_order",
+		"is_fixed_asset": "is_fixed_asset",
+		"asset_location": "asset_location",
+		"asset_category": "asset_category",
+		"wip_composite_asset": "wip_composite_asset",
+		# Gate Entry references
+		"gate_entry": "gate_entry",
+		"gate_entry_item": "gate_entry_item",
+	},
+}
 
-	def set_missing_values(source, target):
-		if len(target.get("items")) == 0:
-			frappe.throw(_("All items have already been Invoiced/Returned"))
+# Purchase Receipt fields that must match to bill several receipts on one Purchase Invoice
+CONSOLIDATION_FIELDS = ("supplier", "company", "currency", "conversion_rate", "buying_price_list")
 
-		doc = frappe.get_doc(target)
-		doc.payment_terms_template = get_payment_terms_template(source.supplier, "Supplier", source.company)
-		doc.run_method("onload")
-		doc.run_method("set_missing_values")
 
-		if args and args.get("merge_taxes"):
-			from erpnext.accounts.doctype.purchase_invoice.purchase_invoice import merge_taxes
-			merge_taxes(source.get("taxes") or [], doc)
+class PendingQty:
+	"""
+	Qty still to be invoiced per Purchase Receipt Item.
 
-		doc.run_method("calculate_taxes_and_totals")
-		doc.set_payment_schedule()
+	Computed once per row and shared by the mapper filter and postprocess.
+	"""
 
-	def update_item(source_doc, target_doc, source_parent):
-		target_doc.qty, returned_qty = get_pending_qty(source_doc)
-		if frappe.db.get_single_value("Buying Settings", "bill_for_rejected_quantity_in_purchase_invoice"):
-			target_doc.rejected_qty = 0
-		target_doc.stock_qty = frappe.utils.flt(target_doc.qty) * frappe.utils.flt(
-			target_doc.conversion_factor, target_doc.precision("conversion_factor")
-		)
-		returned_qty_map[source_doc.name] = returned_qty
+	def __init__(self, invoiced_qty_map, returned_qty_map, bill_for_rejected_qty):
+		self.invoiced_qty_map = invoiced_qty_map
+		self.returned_qty_map = returned_qty_map
+		self.bill_for_rejected_qty = bill_for_rejected_qty
+		# Purchase Receipt Item name -> (pending qty, returned qty)
+		self.cache = {}
 
-	def get_pending_qty(item_row):
-		qty = item_row.qty
-		if frappe.db.get_single_value("Buying Settings", "bill_for_rejected_quantity_in_purchase_invoice"):
-			qty = item_row.received_qty
+	def get(self, item_row):
+		if item_row.name not in self.cache:
+			self.cache[item_row.name] = self.compute(item_row)
 
-		pending_qty = qty - invoiced_qty_map.get(item_row.name, 0)
+		return self.cache[item_row.name]
 
-		if frappe.db.get_single_value("Buying Settings", "bill_for_rejected_quantity_in_purchase_invoice"):
+	def compute(self, item_row):
+		qty = item_row.received_qty if self.bill_for_rejected_qty else item_row.qty
+		pending_qty = qty - self.invoiced_qty_map.get(item_row.name, 0)
+
+		if self.bill_for_rejected_qty:
 			return pending_qty, 0
 
-		returned_qty = frappe.utils.flt(returned_qty_map.get(item_row.name, 0))
+		returned_qty = frappe.utils.flt(self.returned_qty_map.get(item_row.name, 0))
 		if returned_qty:
 			if returned_qty >= pending_qty:
 				pending_qty = 0
@@ -61,41 +76,66 @@ def make_purchase_invoice(source_name, target_doc=None, args=None):
 
 		return pending_qty, returned_qty
 
+	def update_item(self, source_doc, target_doc, source_parent):
+		target_doc.qty, returned_qty = self.get(source_doc)
+		if self.bill_for_rejected_qty:
+			target_doc.rejected_qty = 0
+		target_doc.stock_qty = frappe.utils.flt(target_doc.qty) * frappe.utils.flt(
+			target_doc.conversion_factor, target_doc.precision("conversion_factor")
+		)
+		self.returned_qty_map[source_doc.name] = returned_qty
+
+
+def get_bill_for_rejected_qty():
+	return frappe.db.get_single_value("Buying Settings", "bill_for_rejected_quantity_in_purchase_invoice")
+
+
+def set_invoice_missing_values(sources, target, args=None, taxes=None):
+	"""Complete a mapped Purchase Invoice; `taxes` are the source taxes to merge with merge_taxes"""
+	from erpnext.accounts.party import get_payment_terms_template
+
+	if len(target.get("items")) == 0:
+		frappe.throw(_("All items have already been Invoiced/Returned"))
+
+	source = sources[0]
+	doc = frappe.get_doc(target)
+	doc.payment_terms_template = get_payment_terms_template(source.supplier, "Supplier", source.company)
+	doc.run_method("onload")
+	doc.run_method("set_missing_values")
+
+	if args and args.get("merge_taxes"):
+		from erpnext.accounts.doctype.purchase_invoice.purchase_invoice import merge_taxes
+		merge_taxes(taxes if taxes is not None else source.get("taxes") or [], doc)
+
+	doc.run_method("calculate_taxes_and_totals")
+	doc.set_payment_schedule()
+
+
+@frappe.whitelist()
+def make_purchase_invoice(source_name, target_doc=None, args=None):
+	"""Override ERPNext's make_purchase_invoice to include Gate Entry references"""
+	from erpnext.stock.doctype.purchase_receipt.purchase_receipt import get_returned_qty_map, get_invoiced_qty_map
+
+	is_return = frappe.db.get_value("Purchase Receipt", source_name, "is_return")
+	pending = PendingQty(get_invoiced_qty_map(source_name), get_returned_qty_map(source_name), get_bill_for_rejected_qty())
+
+	def set_missing_values(source, target):
+		set_invoice_missing_values([source], target, args)
+
 	doclist = get_mapped_doc(
 		"Purchase Receipt",
 		source_name,
 		{
 			"Purchase Receipt": {
-				"doctype": "Purchase Invoice",
-				"field_map": {
-					"supplier_warehouse": "supplier_warehouse",
-					"is_return": "is_return",
-					"bill_date": "bill_date",
-				},
+				**PURCHASE_RECEIPT_TO_INVOICE_MAP,
 				"validation": {
 					"docstatus": ["=", 1],
 				},
 			},
 			"Purchase Receipt Item": {
-				"doctype": "Purchase Invoice Item",
-				"field_map": {
-					"name": "pr_detail",
-					"parent": "purchase_receipt",
-					"qty": "received_qty",
-					"purchase_order_item": "po_detail",
-					"purchase_order": "purchase_order",
-					"is_fixed_asset": "is_fixed_asset",
-					"asset_location": "asset_location",
-					"asset_category": "asset_category",
-					"wip_composite_asset": "wip_composite_asset",
-					# Gate Entry references
-					"gate_entry": "gate_entry",
-					"gate_entry_item": "gate_entry_item",
-				},
-				"postprocess": update_item,
-				"filter": lambda d: get_pending_qty(d)[0] <= 0
-				if not doc.get("is_return")
-				else get_pending_qty(d)[0] > 0,
+				**PURCHASE_RECEIPT_TO_INVOICE_ITEM_MAP,
+				"postprocess": pending.update_item,
+				"filter": lambda d: pending.get(d)[0] <= 0 if not is_return else pending.get(d)[0] > 0,
 			},
 			"Purchase Taxes and Charges": {
 				"doctype": "Purchase Taxes and Charges",
@@ -108,3 +148,116 @@ def make_purchase_invoice(source_name, target_doc=None, args=None):
 	)
 
 	return doclist
+
+
+@frappe.whitelist()
+def make_purchase_invoice_from_receipts(source_names, args=None):
+	"""
+	One Purchase Invoice for several Purchase Receipts of the same supplier.
+
+	Receipts, items, taxes and the invoiced / returned quantities are each
+	read with one query. Taxes and totals are calculated once on the merged
+	invoice. Return receipts cannot be consolidated.
+
+	:param source_names: List (or JSON list) of submitted Purchase Receipts.
+	:param args: Same as make_purchase_invoice, e.g. {"merge_taxes": 1}.
+	"""
+	source_names = frappe.parse_json(source_names) if isinstance(source_names, str) else source_names
+	source_names = list(dict.fromkeys(source_names))
+	args = frappe.parse_json(args) if isinstance(args, str) else args
+	if not source_names:
+		frappe.throw(_("Please select at least one Purchase Receipt"))
+
+	receipts = {
+		row.name: frappe.get_doc({**row, "doctype": "Purchase Receipt"})
+		for row in frappe.get_list("Purchase Receipt", filters={"name": ["in", source_names]}, fields=["*"])
+	}
+	missing = [name for name in source_names if name not in receipts]
+	if missing:
+		frappe.throw(_("Purchase Receipt {0} not found").format(", ".join(missing)))
+
+	validate_receipts_for_consolidation([receipts[name] for name in source_names])
+	position = {name: idx for idx, name in enumerate(source_names)}
+
+	pending = PendingQty(
+		get_invoiced_qty_map_for_receipts(source_names),
+		get_returned_qty_map_for_receipts(source_names),
+		get_bill_for_rejected_qty(),
+	)
+
+	target = frappe.new_doc("Purchase Invoice")
+	map_doc(receipts[source_names[0]], target, PURCHASE_RECEIPT_TO_INVOICE_MAP)
+
+	item_map = {**PURCHASE_RECEIPT_TO_INVOICE_ITEM_MAP, "postprocess": pending.update_item}
+	items = frappe.get_all("Purchase Receipt Item", filters={"parent": ["in", source_names]}, fields=["*"])
+	for row in sorted(items, key=lambda item: (position[item.parent], item.idx)):
+		item = frappe.get_doc({**row, "doctype": "Purchase Receipt Item"})
+		if pending.get(item)[0] > 0:
+			map_child_doc(item, target, item_map, receipts[item.parent])
+
+	taxes = sorted(
+		frappe.get_all(
+			"Purchase Taxes and Charges",
+			filters={"parent": ["in", source_names], "parenttype": "Purchase Receipt"},
+			fields=["*"],
+		),
+		key=lambda tax: (position[tax.parent], tax.idx),
+	)
+
+	if not (args and args.get("merge_taxes")):
+		merge_source_taxes(taxes, target, receipts)
+
+	set_invoice_missing_values([receipts[name] for name in source_names], target, args, taxes)
+	target.set_onload("load_after_mapping", True)
+
+	return target
+
+
+def validate_receipts_for_consolidation(receipts):
+	first = receipts[0]
+	for receipt in receipts:
+		if receipt.docstatus != 1:
+			frappe.throw(_("Purchase Receipt {0} must be submitted").format(receipt.name))
+		if receipt.is_return:
+			frappe.throw(_("Return Purchase Receipt {0} cannot be billed together with other receipts").format(receipt.name))
+
+		for fieldname in CONSOLIDATION_FIELDS:
+			if receipt.get(fieldname) != first.get(fieldname):
+				frappe.throw(
+					_("Purchase Receipts {0} and {1} have different {2} and cannot be billed together").format(
+						first.name, receipt.name, frappe.unscrub(fieldname)
+					)
+				)
+
+
+def get_invoiced_qty_map_for_receipts(purchase_receipts):
+	"""{Purchase Receipt Item: qty on submitted Purchase Invoices} for many receipts"""
+	return frappe._dict(
+		frappe.db.sql(
+			"""
+			select pr_detail, sum(qty)
+			from `tabPurchase Invoice Item`
+			where purchase_receipt in %(purchase_receipts)s and docstatus = 1
+			group by pr_detail
+			""",
+			{"purchase_receipts": purchase_receipts},
+		)
+	)
+
+
+def get_returned_qty_map_for_receipts(purchase_receipts):
+	"""{Purchase Receipt Item: qty returned by submitted return receipts} for many receipts"""
+	return frappe._dict(
+		frappe.db.sql(
+			"""
+			select pr_item.purchase_receipt_item, sum(abs(pr_item.qty))
+			from `tabPurchase Receipt Item` pr_item
+			inner join `tabPurchase Receipt` pr on pr.name = pr_item.parent
+			where pr.docstatus = 1
+				and pr.is_return = 1
+				and pr.return_against in %(purchase_receipts)s
+			group by pr_item.purchase_receipt_item
+			""",
+			{"purchase_receipts": purchase_receipts},
+		)
+	)
@@ -0,0 +1,37 @@
+// Copyright (c) 2025, SpotLedger and contributors
+// For license information, please see license.txt
+
+frappe.query_reports['Cheque Book Utilization'] = {
+    filters: [
+        {
+            fieldname: 'bank_account',
+            label: __('Bank Account'),
+            fieldtype: 'Link',
+            options: 'Bank Account',
+            get_query: function() {
+                return { filters: { is_company_account: 1 } };
+            }
+        },
+        {
+            fieldname: 'burn_rate_days',
+            label: __('Burn Rate Period (Days)'),
+            fieldtype: 'Int',
+            description: __('Defaults to the Voucher Settings value')
+        },
+        {
+            fieldname: 'warning_days',
+            label: __('Running Out Within (Days)'),
+            fieldtype: 'Int'
+        }
+    ],
+
+    formatter: function(value, row, column, data, default_formatter) {
+        value = default_formatter(value, row, column, data);
+
+        if (column.fieldname === 'remaining_leaves' && data && data.remaining_leaves === 0) {
+            value = `<span class="text-danger">${value}</span>`;
+        }
+
+        return value;
+    }
+};
@@ -0,0 +1,37 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+import frappe
+
+from erpnext_utils.erpnext_utils.controllers.cheque_book_utilization import get_cheque_book_utilization
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	data = get_cheque_book_utilization(filters.bank_account, filters.burn_rate_days)
+
+	if filters.warning_days:
+		data = [
+			row
+			for row in data
+			if row.days_to_exhaustion is not None and row.days_to_exhaustion <= int(filters.warning_days)
+		]
+
+	return get_columns(), data
+
+
+def get_columns():
+	return [
+		{"label": "Cheque Book", "fieldname": "cheque_book", "fieldtype": "Link", "options": "Cheque Book", "width": 130},
+		{"label": "Bank Account", "fieldname": "bank_account", "fieldtype": "Link", "options": "Bank Account", "width": 200},
+		{"label": "Start Series", "fieldname": "start_series", "fieldtype": "Data", "width": 110},
+		{"label": "End Series", "fieldname": "end_series", "fieldtype": "Data", "width": 110},
+		{"label": "Total Leaves", "fieldname": "total_leaves", "fieldtype": "Int", "width": 100},
+		{"label": "Used", "fieldname": "used_count", "fieldtype": "Int", "width": 80},
+		{"label": "Voided", "fieldname": "voided_count", "fieldtype": "Int", "width": 80},
+		{"label": "Remaining", "fieldname": "remaining_leaves", "fieldtype": "Int", "width": 100},
+		{"label": "Utilization %", "fieldname": "utilization", "fieldtype": "Percent", "width": 110},
+		{"label": "Leaves / Day", "fieldname": "burn_rate", "fieldtype": "Float", "width": 100},
+		{"label": "Days Left", "fieldname": "days_to_exhaustion", "fieldtype": "Int", "width": 90},
+		{"label": "Expected Exhaustion", "fieldname": "exhaustion_date", "fieldtype": "Date", "width": 140},
+	]
@@ -0,0 +1,85 @@
+// Copyright (c) 2025, SpotLedger and contributors
+// For license information, please see license.txt
+
+frappe.query_reports['Cheque Register'] = {
+    filters: [
+        {
+            fieldname: 'from_date',
+            label: __('From Cheque Date'),
+            fieldtype: 'Date'
+        },
+        {
+            fieldname: 'to_date',
+            label: __('To Cheque Date'),
+            fieldtype: 'Date'
+        },
+        {
+            fieldname: 'bank_account',
+            label: __('Bank Account'),
+            fieldtype: 'Link',
+            options: 'Bank Account',
+            get_query: function() {
+                return { filters: { is_company_account: 1 } };
+            }
+        },
+        {
+            fieldname: 'cheque_book',
+            label: __('Cheque Book'),
+            fieldtype: 'Link',
+            options: 'Cheque Book'
+        },
+        {
+            fieldname: 'cheque_type',
+            label: __('Cheque Type'),
+            fieldtype: 'Select',
+            options: '\nIssued\nReceived'
+        },
+        {
+            fieldname: 'status',
+            label: __('Status'),
+            fieldtype: 'Select',
+            options: '\nPost Dated\nUnpresented\nCleared\nReturned\nCancelled\nDiscarded'
+        },
+        {
+            fieldname: 'group_by',
+            label: __('Group By'),
+            fieldtype: 'Select',
+            options: 'Bank Account\nCheque Book',
+            default: 'Bank Account'
+        }
+    ],
+
+    formatter: function(value, row, column, data, default_formatter) {
+        value = default_formatter(value, row, column, data);
+
+        // Cheque counts open the matching cheques in the (paginated) Cheque list
+        if (column.fieldname === 'cheque_count' && data && data.status) {
+            let report_filters = frappe.query_report.get_filter_values();
+            let group_fields = ['bank_account', 'cheque_type', 'status'];
+            if (report_filters.group_by === 'Cheque Book') {
+                group_fields.push('cheque_book');
+            }
+
+            // Empty group values are cheques without the field, not all cheques
+            let filters = {};
+            group_fields.forEach(function(fieldname) {
+                filters[fieldname] = data[fieldname] ? data[fieldname] : JSON.stringify(['is', 'not set']);
+            });
+            if (report_filters.cheque_book && !filters.cheque_book) {
+                filters.cheque_book = report_filters.cheque_book;
+            }
+
+            if (report_filters.from_date && report_filters.to_date) {
+                filters.cheque_date = JSON.stringify(['Between', [report_filters.from_date, report_filters.to_date]]);
+            } else if (report_filters.from_date) {
+                filters.cheque_date = JSON.stringify(['>=', report_filters.from_date]);
+            } else if (report_filters.to_date) {
+                filters.cheque_date = JSON.stringify(['<=', report_filters.to_date]);
+            }
+
+            value = `<a href="/app/cheque?${new URLSearchParams(filters).toString()}">${value}</a>`;
+        }
+
+        return value;
+    }
+};
@@ -0,0 +1,150 @@
+# Copyright (c) 2025, SpotLedger and contributors
+# For license information, please see license.txt
+
+"""
+Cheque Register: issued and received cheques by status, per bank account
+or cheque book, with post dated cheques bucketed by days to maturity.
+
+Totals come from the Cheque Summary table (see controllers/cheque_summary.py),
+not from Cheque. Cheque counts link to the matching cheques in the Cheque list.
+"""
+
+import frappe
+from frappe.query_builder.functions import Sum
+from frappe.utils import date_diff, flt, getdate, today
+
+# (label, lower bound, upper bound) of days until the cheque date
+POST_DATED_BUCKETS = (
+	("Post Dated 0-30 Days", None, 30),
+	("Post Dated 31-60 Days", 31, 60),
+	("Post Dated 61-90 Days", 61, 90),
+	("Post Dated 90+ Days", 91, None),
+)
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	group_by_book = filters.group_by == "Cheque Book"
+
+	return get_columns(group_by_book), get_data(filters, group_by_book), None, None, get_report_summary(filters)
+
+
+def get_columns(group_by_book):
+	columns = [
+		{
+			"label": "Bank Account",
+			"fieldname": "bank_account",
+			"fieldtype": "Link",
+			"options": "Bank Account",
+			"width": 200,
+		}
+	]
+
+	if group_by_book:
+		columns.append(
+			{
+				"label": "Cheque Book",
+				"fieldname": "cheque_book",
+				"fieldtype": "Link",
+				"options": "Cheque Book",
+				"width": 140,
+			}
+		)
+
+	columns.extend(
+		[
+			{"label": "Cheque Type", "fieldname": "cheque_type", "fieldtype": "Data", "width": 110},
+			{"label": "Status", "fieldname": "status", "fieldtype": "Data", "width": 120},
+			{"label": "Cheques", "fieldname": "cheque_count", "fieldtype": "Int", "width": 100},
+			{"label": "Amount", "fieldname": "amount", "fieldtype": "Currency", "width": 150},
+		]
+	)
+
+	return columns
+
+
+def get_summary_query(filters):
+	summary = frappe.qb.DocType("Cheque Summary")
+	query = frappe.qb.from_(summary)
+
+	for fieldname in ("bank_account", "cheque_book", "cheque_type", "status"):
+		if filters.get(fieldname):
+			query = query.where(summary[fieldname] == filters.get(fieldname))
+
+	if filters.from_date:
+		query = query.where(summary.cheque_date >= filters.from_date)
+	if filters.to_date:
+		query = query.where(summary.cheque_date <= filters.to_date)
+
+	return summary, query
+
+
+def get_data(filters, group_by_book=False):
+	summary, query = get_summary_query(filters)
+
+	group_fields = [summary.bank_account]
+	if group_by_book:
+		group_fields.append(summary.cheque_book)
+	group_fields.extend([summary.cheque_type, summary.status])
+
+	return (
+		query.select(
+			*group_fields,
+			Sum(summary.cheque_count).as_("cheque_count"),
+			Sum(summary.amount).as_("amount"),
+		)
+		.groupby(*group_fields)
+		.having(Sum(summary.cheque_count) != 0)
+		.orderby(*group_fields)
+	).run(as_dict=True)
+
+
+def get_report_summary(filters):
+	summary, query = get_summary_query(filters)
+	rows = (
+		query.select(
+			summary.cheque_type,
+			summary.status,
+			summary.cheque_date,
+			Sum(summary.amount).as_("amount"),
+		).groupby(summary.cheque_type, summary.status, summary.cheque_date)
+	).run(as_dict=True)
+
+	totals = frappe._dict(
+		{
+			"Issued": 0,
+			"Received": 0,
+			"Unpresented": 0,
+			"Cleared": 0,
+			"Returned": 0,
+			**{label: 0 for label, _lower, _upper in POST_DATED_BUCKETS},
+		}
+	)
+
+	as_on_date = getdate(today())
+	for row in rows:
+		if row.status == "Cancelled":
+			continue
+
+		if row.cheque_type in totals:
+			totals[row.cheque_type] += flt(row.amount)
+		if row.status in totals:
+			totals[row.status] += flt(row.amount)
+
+		if row.status == "Post Dated" and row.cheque_date:
+			days = date_diff(row.cheque_date, as_on_date)
+			for label, lower, upper in POST_DATED_BUCKETS:
+				if (lower is None or days >= lower) and (upper is None or days <= upper):
+					totals[label] += flt(row.amount)
+					break
+
+	indicators = {"Issued": "Blue", "Received": "Blue", "Cleared": "Green", "Returned": "Red"}
+	return [
+		{
+			"value": value,
+			"label": "Returned (Bounced)" if label == "Returned" else label,
+			"datatype": "Currency",
+			"indicator": indicators.get(label, "Orange"),
+		}
+		for label, value in totals.items()
+	]
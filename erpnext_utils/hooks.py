@@ -184,9 +184,50 @@ override_whitelisted_methods = {
 doc_events = {
 	"Payment Entry": {
 		"validate": "erpnext_utils.erpnext_utils.overrides.payment_entry.validate_cheque_details",
-		"on_submit": "erpnext_utils.erpnext_utils.overrides.payment_entry.on_submit_cheque_creation"
+		"on_submit": "erpnext_utils.erpnext_utils.overrides.payment_entry.on_submit_cheque_creation",
+		"on_cancel": "erpnext_utils.erpnext_utils.overrides.payment_entry.on_cancel_cheque_cancellation"
+	},
+	"Company": {
+		"on_update": "erpnext_utils.erpnext_utils.controllers.settings_cache.clear_company_defaults_cache",
+		"on_trash": "erpnext_utils.erpnext_utils.controllers.settings_cache.clear_company_defaults_cache"
+	},
+	"Mode of Payment": {
+		"on_update": "erpnext_utils.erpnext_utils.controllers.settings_cache.clear_cheque_modes_cache",
+		"on_trash": "erpnext_utils.erpnext_utils.controllers.settings_cache.clear_cheque_modes_cache",
+		"after_rename": "erpnext_utils.erpnext_utils.controllers.settings_cache.clear_cheque_modes_cache"
+	},
+	"Purchase Order": {
+		"on_update": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_submit": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_cancel": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_trash": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache"
+	},
+	"Purchase Receipt": {
+		"on_update": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_submit": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_cancel": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_trash": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache"
+	},
+	"Purchase Invoice": {
+		"on_update": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_submit": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_cancel": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache",
+		"on_trash": "erpnext_utils.erpnext_utils.controllers.gate_entry_links.clear_gate_entry_links_cache"
+	},
+	"Material Request": {
+		"on_change": "erpnext_utils.erpnext_utils.controllers.material_requests.clear_open_material_requests_cache",
+		"on_trash": "erpnext_utils.erpnext_utils.controllers.material_requests.clear_open_material_requests_cache"
 	}
 }
+
+# Scheduled Tasks
+# ---------------
+scheduler_events = {
+	"daily": [
+		"erpnext_utils.erpnext_utils.controllers.post_dated_cheques.process_matured_post_dated_cheques",
+		"erpnext_utils.erpnext_utils.controllers.cheque_book_utilization.warn_cheque_book_exhaustion"
+	]
+}
 #
 # each overriding function accepts a `data` argument;
 # generated from the base implementation of the doctype dashboard,
@@ -0,0 +1,6 @@
+from erpnext_utils.erpnext_utils.doctype.cheque.cheque import on_doctype_update
+
+
+def execute():
+	"""Install the Cheque indexes on sites where the doctype was not re-synced"""
+	on_doctype_update()
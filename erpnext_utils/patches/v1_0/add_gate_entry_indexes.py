@@ -0,0 +1,6 @@
+from erpnext_utils.erpnext_utils.controllers.gate_entry_links import add_gate_entry_indexes
+
+
+def execute():
+	"""Index the custom gate_entry field of the PO/PR/PI item tables for the Gate Entry dashboard"""
+	add_gate_entry_indexes()
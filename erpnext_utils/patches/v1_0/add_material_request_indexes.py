@@ -0,0 +1,6 @@
+from erpnext_utils.erpnext_utils.controllers.material_requests import add_material_request_indexes
+
+
+def execute():
+	"""Index open Purchase Material Requests for the Gate Entry dialog"""
+	add_material_request_indexes()
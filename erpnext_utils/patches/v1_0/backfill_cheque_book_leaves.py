@@ -0,0 +1,42 @@
+import frappe
+
+from erpnext_utils.erpnext_utils.controllers.cheque_books import LeafSet, cheque_number_to_int, first_free_leaf
+
+
+def execute():
+	"""Build used/voided leaf sets of Cheque Books from existing Cheques"""
+	leaves = {}
+	for cheque in frappe.get_all(
+		"Cheque",
+		filters={"cheque_book": ["is", "set"]},
+		fields=["cheque_book", "cheque_number", "status"],
+	):
+		if not str(cheque.cheque_number or "").strip().isdigit():
+			continue
+
+		used, voided = leaves.setdefault(cheque.cheque_book, (LeafSet(), LeafSet()))
+		(voided if cheque.status == "Cancelled" else used).add(cheque_number_to_int(cheque.cheque_number))
+
+	for cheque_book in frappe.get_all("Cheque Book", fields=["name", "start_series", "end_series", "current_series"]):
+		if not str(cheque_book.start_series or "").strip().isdigit():
+			continue
+
+		used, voided = leaves.get(cheque_book.name, (LeafSet(), LeafSet()))
+
+		# Leaves before current_series were handed out by the old allocator even without a Cheque
+		start = int(cheque_book.start_series)
+		current = cheque_number_to_int(cheque_book.current_series) if cheque_book.current_series else start
+		if current > start:
+			used.add_range(start, current - 1)
+
+		next_free = min(first_free_leaf(start, used, voided), int(cheque_book.end_series))
+		frappe.db.set_value(
+			"Cheque Book",
+			cheque_book.name,
+			{
+				"used_leaves": used.serialize(),
+				"voided_leaves": voided.serialize(),
+				"current_series": str(next_free).zfill(len(str(cheque_book.start_series))),
+			},
+			update_modified=False,
+		)
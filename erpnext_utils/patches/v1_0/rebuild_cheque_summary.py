@@ -0,0 +1,6 @@
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import rebuild_cheque_summary
+
+
+def execute():
+	"""Populate Cheque Summary from existing Cheques"""
+	rebuild_cheque_summary()
@@ -0,0 +1,21 @@
+import frappe
+
+from erpnext_utils.erpnext_utils.controllers.cheque_books import clear_cheque_book_ranges_cache
+
+
+def execute():
+	"""Set integer start/end numbers of Cheque Books from their string series"""
+	for cheque_book in frappe.get_all("Cheque Book", fields=["name", "start_series", "end_series"]):
+		start_series = str(cheque_book.start_series or "").strip()
+		end_series = str(cheque_book.end_series or "").strip()
+		if not (start_series.isdigit() and end_series.isdigit()):
+			continue
+
+		frappe.db.set_value(
+			"Cheque Book",
+			cheque_book.name,
+			{"start_number": int(start_series), "end_number": int(end_series)},
+			update_modified=False,
+		)
+
+	clear_cheque_book_ranges_cache()
@@ -0,0 +1,53 @@
+import frappe
+from frappe.utils import now, today
+
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import update_summary_for_status_change
+
+
+def execute():
+	"""
+	Move future dated cheques of submitted bank vouchers to "Post Dated".
+
+	Only cheques whose voucher still carries a balance on the post dated
+	cheque account are moved, so the maturity job reclassifies exactly what
+	the voucher parked there. Cheques without a voucher reference are left
+	as they are.
+	"""
+	post_dated_account = frappe.db.get_single_value("Voucher Settings", "default_post_dated_cheque")
+	if not post_dated_account:
+		return
+
+	cheques = frappe.db.sql(
+		"""
+		select
+			cheque.name, cheque.bank_account, cheque.cheque_book, cheque.cheque_type,
+			cheque.status, cheque.cheque_date, cheque.amount
+		from `tabCheque` cheque
+		where cheque.status = 'Unpresented'
+			and cheque.cheque_date > %(today)s
+			and cheque.reference_doctype in ('Bank Payment Voucher', 'Bank Receipt Voucher')
+			and ifnull(cheque.reference_name, '') != ''
+			and (
+				select sum(gle.debit - gle.credit)
+				from `tabGL Entry` gle
+				where gle.voucher_type = cheque.reference_doctype
+					and gle.voucher_no = cheque.reference_name
+					and gle.account = %(account)s
+					and gle.is_cancelled = 0
+			) != 0
+		""",
+		{"today": today(), "account": post_dated_account},
+		as_dict=True,
+	)
+	if not cheques:
+		return
+
+	cheque = frappe.qb.DocType("Cheque")
+	(
+		frappe.qb.update(cheque)
+		.set(cheque.status, "Post Dated")
+		.set(cheque.modified, now())
+		.where(cheque.name.isin([row.name for row in cheques]) & (cheque.status == "Unpresented"))
+	).run()
+
+	update_summary_for_status_change(cheques, "Post Dated")
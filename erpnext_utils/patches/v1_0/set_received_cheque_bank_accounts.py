@@ -0,0 +1,20 @@
+import frappe
+
+from erpnext_utils.erpnext_utils.controllers.cheque_summary import rebuild_cheque_summary
+
+
+def execute():
+	"""Set the deposit Bank Account of received Cheques from their Bank Receipt Voucher"""
+	frappe.db.sql(
+		"""
+		update `tabCheque` cheque
+		inner join `tabBank Receipt Voucher` voucher on voucher.name = cheque.reference_name
+		set cheque.bank_account = voucher.voucher_account
+		where cheque.cheque_type = 'Received'
+			and cheque.reference_doctype = 'Bank Receipt Voucher'
+			and ifnull(cheque.bank_account, '') = ''
+		"""
+	)
+
+	# Received cheques move out of the blank bank account rows
+	rebuild_cheque_summary()
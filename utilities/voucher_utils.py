@@ -1,5 +1,6 @@
 import frappe
 from frappe.model.naming import make_autoname
+from erpnext_utils.erpnext_utils.controllers.settings_cache import get_company_abbr
 
 
 def create_voucher_name(self):
@@ -7,7 +8,7 @@ def create_voucher_name(self):
     if not self.company:
         frappe.throw("Please select a Company before saving.")
 
-    company_abbr = frappe.db.get_value("Company", self.company, "abbr")
+    company_abbr = get_company_abbr(self.company)
     if not company_abbr:
         frappe.throw(f"Abbreviation not found for Company {self.company}")
 